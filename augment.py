@@ -0,0 +1,150 @@
+# Batched augmentation of captured frames together with their landmarks
+# Works on the collector's format: BGR uint8 arrays of shape (N, H, W, 3) for
+# images or (N, T, H, W, 3) for clips, and landmark arrays from landmarks.py of
+# shape (N, 75, 4) or (N, T, 75, 4). Random parameters are drawn once per sample,
+# so all frames of a clip get the same transform. Landmarks are transformed with
+# the pixels and entries that were not detected stay zero. Without a mask, all-zero
+# landmark rows are taken as not detected.
+
+import cv2
+import numpy as np
+
+from landmarks import POSE_LANDMARKS, HAND_LANDMARKS, LEFT_HAND_OFFSET, RIGHT_HAND_OFFSET
+
+# MediaPipe pose landmarks that trade places in a mirror image (eyes, ears, mouth corners, limbs)
+POSE_MIRROR_PAIRS = ((1, 4), (2, 5), (3, 6), (7, 8), (9, 10), (11, 12), (13, 14), (15, 16), (17, 18),
+                     (19, 20), (21, 22), (23, 24), (25, 26), (27, 28), (29, 30), (31, 32))
+
+
+def _mirror_permutation():
+    order = np.arange(POSE_LANDMARKS + 2 * HAND_LANDMARKS)
+    for left, right in POSE_MIRROR_PAIRS:
+        order[left], order[right] = right, left
+    # Frames are already mirrored at capture so MediaPipe's labels match the signer's
+    # hands; flipping again turns the signer's left hand into the mirrored signer's right
+    left = np.arange(LEFT_HAND_OFFSET, LEFT_HAND_OFFSET + HAND_LANDMARKS)
+    right = np.arange(RIGHT_HAND_OFFSET, RIGHT_HAND_OFFSET + HAND_LANDMARKS)
+    order[left], order[right] = right, left
+    return order
+
+
+MIRROR_ORDER = _mirror_permutation()
+
+
+def detected_mask(landmarks):
+    """Mask of the landmarks that were detected, inferred from rows that are not all zero"""
+    return np.any(landmarks != 0, axis=-1)
+
+
+def flip_horizontal(frames, landmarks=None, mask=None, which=None):
+    """
+    Mirror the samples selected by the boolean array `which` (all when None) in place.
+    Landmarks get x -> 1 - x and left/right landmarks swap places.
+    """
+    n = len(frames)
+    which = np.ones(n, dtype=bool) if which is None else np.asarray(which, dtype=bool)
+    if not which.any():
+        return frames, landmarks, mask
+    frames[which] = frames[which][..., ::-1, :]
+    if landmarks is not None:
+        flipped = landmarks[which][..., MIRROR_ORDER, :]
+        flipped_mask = mask[which][..., MIRROR_ORDER] if mask is not None else None
+        detected = flipped_mask if flipped_mask is not None else detected_mask(flipped)
+        flipped[..., 0] = np.where(detected, 1.0 - flipped[..., 0], 0.0)
+        landmarks[which] = flipped
+        if mask is not None:
+            mask[which] = flipped_mask
+    return frames, landmarks, mask
+
+
+def affine_matrices(count, width, height, rng, max_rotation=10.0, max_scale=0.1, max_shift=0.05):
+    """Random (count, 2, 3) pixel-space matrices rotating and scaling about the centre, plus a shift"""
+    angles = rng.uniform(-max_rotation, max_rotation, count)
+    scales = rng.uniform(1 - max_scale, 1 + max_scale, count)
+    shifts = rng.uniform(-max_shift, max_shift, (count, 2)) * (width, height)
+    matrices = np.empty((count, 2, 3), dtype=np.float64)
+    for i in range(count):
+        matrices[i] = cv2.getRotationMatrix2D((width / 2, height / 2), angles[i], scales[i])
+        matrices[i, :, 2] += shifts[i]
+    return matrices
+
+
+def warp_affine(frames, matrices, landmarks=None, mask=None):
+    """Apply one (2, 3) matrix per sample in place; frames of a clip share their sample's matrix"""
+    height, width = frames.shape[-3:-1]
+    flat = frames.reshape((len(frames), -1) + frames.shape[-3:])  # frames must be contiguous
+    scratch = np.empty(frames.shape[-3:], dtype=frames.dtype)  # warpAffine cannot work in place
+    for i, matrix in enumerate(matrices):
+        for frame in flat[i]:
+            cv2.warpAffine(frame, matrix, (width, height), dst=scratch,
+                           flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT_101)
+            np.copyto(frame, scratch)
+    if landmarks is not None:
+        detected = mask if mask is not None else detected_mask(landmarks)
+        # Normalized -> pixels -> transformed -> normalized, for all landmarks at once
+        scale = np.array([width, height], dtype=np.float64)
+        points = landmarks[..., :2].reshape(len(landmarks), -1, 2) * scale
+        linear, offset = matrices[:, :, :2], matrices[:, :, 2]
+        moved = np.einsum('nij,nkj->nki', linear, points) + offset[:, None, :]
+        moved = (moved / scale).reshape(landmarks[..., :2].shape)
+        # z is relative to the image width, so it follows the scale part of the transform
+        z_scale = np.sqrt(np.abs(np.linalg.det(linear)))
+        z = landmarks[..., 2] * z_scale.reshape((-1,) + (1,) * (landmarks.ndim - 2))
+        moved = np.where(detected[..., None], moved, 0.0)
+        landmarks[..., :2] = moved
+        landmarks[..., 2] = z
+    return frames, landmarks, mask
+
+
+def adjust_brightness_contrast(frames, alpha, beta):
+    """
+    pixel * alpha + beta per sample, in place. The tables for the whole batch are
+    computed at once and every sample (all frames of a clip together) is mapped
+    with one cv2.LUT call instead of per-pixel float arithmetic.
+    """
+    values = np.arange(256, dtype=np.float32)
+    luts = np.clip(values[None, :] * np.asarray(alpha, dtype=np.float32)[:, None]
+                   + np.asarray(beta, dtype=np.float32)[:, None], 0, 255).astype(np.uint8)
+    width = frames.shape[-2]
+    for i in range(len(frames)):
+        sample = frames[i].reshape(-1, width, 3)  # Clips as one tall image, a view for contiguous input
+        cv2.LUT(sample, luts[i], dst=sample)
+    return frames
+
+
+class Augmenter:
+    def __init__(self, flip_prob=0.5, max_rotation=10.0, max_scale=0.1, max_shift=0.05,
+                 brightness=0.15, contrast=0.2, seed=None):
+        self.flip_prob = flip_prob
+        self.max_rotation = max_rotation  # Degrees
+        self.max_scale = max_scale
+        self.max_shift = max_shift  # Fraction of the frame size
+        self.brightness = brightness  # Fraction of the 0-255 range
+        self.contrast = contrast
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, frames, landmarks=None, mask=None, copy=True):
+        """
+        Augment a batch, returns (frames, landmarks, mask). With copy=False the
+        arrays are modified in place; landmarks must be float32 for that.
+        """
+        if copy:
+            frames = frames.copy()
+            landmarks = landmarks.astype(np.float32) if landmarks is not None else None
+            mask = mask.copy() if mask is not None else None
+        n = len(frames)
+        height, width = frames.shape[-3:-1]
+
+        flip = self.rng.random(n) < self.flip_prob
+        flip_horizontal(frames, landmarks, mask, flip)
+
+        if self.max_rotation or self.max_scale or self.max_shift:
+            matrices = affine_matrices(n, width, height, self.rng, self.max_rotation, self.max_scale, self.max_shift)
+            warp_affine(frames, matrices, landmarks, mask)
+
+        if self.brightness or self.contrast:
+            alpha = self.rng.uniform(1 - self.contrast, 1 + self.contrast, n)
+            # Contrast about mid-grey, then the brightness shift
+            beta = 128 * (1 - alpha) + self.rng.uniform(-self.brightness, self.brightness, n) * 255
+            adjust_brightness_contrast(frames, alpha, beta)
+        return frames, landmarks, mask
@@ -0,0 +1,235 @@
+# End-to-end benchmark of the capture pipeline on the bundled videos
+# Replays the sample clips through the collector's own FramePipeline: the throttle,
+# flip into the ring buffer, color conversion, pose and hands side by side, drawing
+# and preview scaling, followed by the encoder queue and encoding. Frames are stamped
+# at the clips' frame rate so the throttle sees them like camera frames. Reports
+# latency percentiles per stage, end-to-end FPS, peak memory and dropped frames, and
+# saves everything as JSON tagged with the git commit so runs can be compared. Needs
+# no camera and no display.
+
+import argparse
+import cv2
+import json
+import numpy as np
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from capture_pipeline import FramePipeline
+from frame_buffer import FrameThrottle
+from frame_sources import VideoFileSource, VIDEO_EXTENSIONS
+from inference import LandmarkEngine
+from preview import PreviewScaler
+from video_writers import StreamingVideoWriter, find_working_codec
+
+CORPUS_DIRS = ["signs", "modified videos", "new videos2", os.path.join("signs_directory", "dynamic")]
+STAGES = ["read", "flip", "color", "pose", "hands", "draw", "preview", "queue", "encode"]
+RESULTS_DIR = "benchmark_results"
+
+
+def find_corpus(directories=CORPUS_DIRS):
+    paths = []
+    for directory in directories:
+        if os.path.isdir(directory):
+            paths.extend(sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                                if os.path.splitext(f)[1].lower() in VIDEO_EXTENSIONS))
+    return paths
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    values = np.asarray(samples)
+    return {
+        'count': len(values),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p90_ms': float(np.percentile(values, 90)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+    }
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+class _TimedWriter(StreamingVideoWriter):
+    """Streaming writer that also keeps the time spent encoding every frame"""
+
+    def __init__(self, *args, **kwargs):
+        self.encode_ms = []
+        super().__init__(*args, **kwargs)
+
+    def _encode(self, frame, timestamp):
+        start = time.perf_counter()
+        super()._encode(frame, timestamp)
+        self.encode_ms.append((time.perf_counter() - start) * 1000)
+
+
+def run_pipeline(paths, max_frames=None, inference_size=640, preview_size=(640, 480), encode=True,
+                 hand_tracking=False, fps=30):
+    source = VideoFileSource(paths, loop=False, realtime=False)
+    engine = LandmarkEngine(parallel=True, inference_size=inference_size, hand_tracking=hand_tracking)
+    scaler = PreviewScaler()
+    scaler.set_target(*preview_size)
+    timings = {stage: [] for stage in STAGES}
+
+    def timed(stage, func, *args):
+        t0 = time.perf_counter()
+        result = func(*args)
+        timings[stage].append((time.perf_counter() - t0) * 1000)  # Appends are safe from the hands thread
+        return result
+
+    pipeline = FramePipeline(engine, FrameThrottle(fps), scaler, timer=timed)
+    writer = None
+    output_dir = tempfile.mkdtemp(prefix="arsl_benchmark_")
+    frames = 0
+    read = 0
+    clock = time.monotonic()  # Capture times follow the clips' frame rate, not the replay speed
+    start = time.perf_counter()
+
+    try:
+        while max_frames is None or frames < max_frames:
+            ret, frame = timed("read", source.read)
+            if not ret:
+                timings["read"].pop()  # End of the corpus, not a frame
+                break
+            capture_time = clock + read / source.fps
+            read += 1
+            raw = pipeline.capture(frame, capture_time)
+            if raw is None:
+                continue  # Thinned out by the throttle, as the collector would
+            if encode and writer is None and frames == 0:
+                codec, ext = find_working_codec(output_dir, (frame.shape[1], frame.shape[0]))
+                if codec is not None:
+                    writer = _TimedWriter(os.path.join(output_dir, f"benchmark.{ext}"), codec,
+                                          fps, (frame.shape[1], frame.shape[0]))
+
+            annotated, _, _ = pipeline.annotate(raw)
+            pipeline.render_preview(annotated)
+            if writer is not None:
+                timed("queue", writer.write, raw, capture_time)
+            frames += 1
+
+        writer_stats = writer.finalize() if writer is not None else None
+        elapsed = time.perf_counter() - start
+    finally:
+        engine.close()
+        source.release()
+        shutil.rmtree(output_dir, ignore_errors=True)
+    if writer is not None:
+        timings["encode"] = writer.encode_ms
+    frame_buffer = pipeline.frame_buffer
+
+    return {
+        'frames': frames,
+        'videos': len(paths),
+        'frame_size': list(frame_buffer.frame_shape[:2][::-1]) if frame_buffer is not None else None,
+        'seconds': elapsed,
+        'fps': frames / elapsed if elapsed else 0.0,
+        'stages': {stage: percentiles(samples) for stage, samples in timings.items()},
+        'dropped_frames': pipeline.throttle.frames_dropped + (writer_stats['frames_dropped'] if writer_stats else 0),
+        'throttle_dropped': pipeline.throttle.frames_dropped,
+        'encoder': writer_stats,
+        'peak_rss_mb': peak_rss_mb(),
+        'hand_tracking': dict(engine.hand_tracker.stats) if engine.hand_tracker is not None else None,
+    }
+
+
+def compare(result, baseline):
+    """Print per-stage p50 and FPS changes against an earlier result file"""
+    print(f"\nCompared with {baseline.get('commit') or 'unknown commit'}:")
+    for stage in STAGES:
+        new, old = result['stages'].get(stage), baseline['stages'].get(stage)
+        if new and old and old['p50_ms']:
+            change = (new['p50_ms'] - old['p50_ms']) / old['p50_ms']
+            print(f"  {stage:>8}: p50 {old['p50_ms']:7.2f} -> {new['p50_ms']:7.2f} ms ({change:+.0%})")
+    if baseline.get('fps'):
+        print(f"  {'fps':>8}: {baseline['fps']:.1f} -> {result['fps']:.1f} ({result['fps'] / baseline['fps'] - 1:+.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the capture pipeline on the bundled sample videos")
+    parser.add_argument("videos", nargs="*", help="Videos or folders to replay (default: the bundled corpus)")
+    parser.add_argument("--frames", type=int, default=None, help="Stop after this many frames")
+    parser.add_argument("--inference-size", type=int, default=640, help="Longest side for inference, 0 for full")
+    parser.add_argument("--hand-tracking", action="store_true", help="Track hands in ROIs instead of full frames")
+    parser.add_argument("--fps", type=float, default=30, help="Capture rate the throttle keeps, like the collector's")
+    parser.add_argument("--preview-size", default="640x480", help="Preview widget size")
+    parser.add_argument("--no-encode", action="store_true", help="Skip the encoder stages")
+    parser.add_argument("--output", help=f"Result JSON path (default: {RESULTS_DIR}/<time>_<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    paths = []
+    for item in args.videos:
+        paths.extend(find_corpus([item]) if os.path.isdir(item) else [item])
+    paths = paths or find_corpus()
+    if not paths:
+        raise SystemExit("No videos found to replay")
+
+    preview_size = tuple(int(v) for v in args.preview_size.lower().split('x'))
+    result = run_pipeline(paths, args.frames, args.inference_size or None, preview_size, not args.no_encode,
+                          args.hand_tracking, args.fps)
+    commit, dirty = git_commit()
+    result.update({
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'settings': {'inference_size': args.inference_size, 'preview_size': list(preview_size),
+                     'encode': not args.no_encode, 'hand_tracking': args.hand_tracking,
+                     'max_frames': args.frames, 'fps': args.fps},
+        'platform': {'python': platform.python_version(), 'system': platform.platform(),
+                     'opencv': cv2.__version__, 'cpus': os.cpu_count()},
+    })
+
+    print(f"{result['frames']} frames from {result['videos']} videos in {result['seconds']:.1f}s "
+          f"({result['fps']:.1f} FPS end to end)")
+    for stage in STAGES:
+        stats = result['stages'][stage]
+        if stats:
+            print(f"  {stage:>8}: p50 {stats['p50_ms']:7.2f}  p90 {stats['p90_ms']:7.2f}  "
+                  f"p99 {stats['p99_ms']:7.2f}  max {stats['max_ms']:7.2f} ms")
+    print(f"dropped frames: {result['dropped_frames']} ({result['throttle_dropped']} by the throttle)")
+    if result['peak_rss_mb'] is not None:
+        print(f"peak RSS: {result['peak_rss_mb']:.0f} MB")
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{(commit or 'nogit')[:8]}.json")
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"saved {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
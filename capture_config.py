@@ -0,0 +1,187 @@
+# Capture settings applied to the frame source
+# Cameras are free to ignore or adjust what they are asked for, so after setting
+# FOURCC, size and FPS everything is read back and a few frames are grabbed to see
+# what the device really delivers. The resulting NegotiationReport drives the
+# capture throttle and writer sizes and is saved next to every recording. The
+# requested settings are kept in the dataset folder and applied again on start.
+
+import cv2
+import json
+import os
+import time
+
+RESOLUTIONS = ["640x480", "1280x720", "1920x1080"]
+FRAME_RATES = [15, 24, 30, 60]
+# MJPG is needed for high resolutions at full frame rate on most USB cameras,
+# an empty FOURCC leaves the device default (usually YUYV) alone
+FOURCCS = ["", "MJPG", "YUYV"]
+CONFIG_NAME = "capture_config.json"
+# A probe over a few frames is noisy, only a rate clearly below the granted one counts
+MEASURED_FPS_TOLERANCE = 0.1
+
+
+def parse_resolution(text):
+    """Parse "1280x720" into (1280, 720)"""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def fourcc_to_str(value):
+    """Decode the float CAP_PROP_FOURCC returns into its four characters"""
+    code = int(value)
+    if code <= 0:
+        return ""
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 ")
+
+
+class CaptureConfig:
+    def __init__(self, width=640, height=480, fps=30, fourcc=""):
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = float(fps)
+        self.fourcc = fourcc or ""
+
+    @property
+    def resolution(self):
+        return f"{self.width}x{self.height}"
+
+    def to_dict(self):
+        return {'width': self.width, 'height': self.height, 'fps': self.fps, 'fourcc': self.fourcc}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('width', 640), data.get('height', 480), data.get('fps', 30), data.get('fourcc', ""))
+
+    def __eq__(self, other):
+        return isinstance(other, CaptureConfig) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"CaptureConfig({self.resolution}@{self.fps:g}{' ' + self.fourcc if self.fourcc else ''})"
+
+
+class NegotiationReport:
+    """What was asked of the source, what it reported back and what its frames actually measure"""
+
+    def __init__(self, requested, granted, measured_fps=None, accepted=None):
+        self.requested = requested
+        self.granted = granted
+        self.measured_fps = measured_fps
+        self.accepted = accepted or {}  # Property name -> whether set() returned True
+        self.time = time.time()
+
+    @property
+    def capture_fps(self):
+        """
+        Rate to throttle the capture loop to: the requested rate, unless the device is
+        slower. Never above what the device delivers, so the throttle only drops frames
+        from a device that is faster than requested.
+        """
+        rate = self.requested.fps
+        if self.granted.fps and self.granted.fps > 0:
+            rate = min(rate, self.granted.fps)
+        if self.measured_fps and self.measured_fps < rate * (1 - MEASURED_FPS_TOLERANCE):
+            rate = self.measured_fps
+        return rate
+
+    def differences(self):
+        """Names of the settings the device did not grant as requested"""
+        requested, granted = self.requested.to_dict(), self.granted.to_dict()
+        different = [key for key in ('width', 'height') if requested[key] != granted[key]]
+        if granted['fps'] and abs(requested['fps'] - granted['fps']) > 0.5:
+            different.append('fps')
+        if requested['fourcc'] and requested['fourcc'] != granted['fourcc']:
+            different.append('fourcc')
+        return different
+
+    def summary(self):
+        text = f"Camera: {self.granted.resolution} @ {self.capture_fps:.1f} FPS"
+        if self.granted.fourcc:
+            text += f" ({self.granted.fourcc})"
+        different = self.differences()
+        if different:
+            text += f", requested {self.requested.resolution} @ {self.requested.fps:g}" \
+                    f" (not granted: {', '.join(different)})"
+        return text
+
+    def to_dict(self):
+        return {
+            'requested': self.requested.to_dict(),
+            'granted': self.granted.to_dict(),
+            'measured_fps': self.measured_fps,
+            'capture_fps': self.capture_fps,
+            'accepted': self.accepted,
+            'not_granted': self.differences(),
+            'negotiated_at': self.time,
+        }
+
+
+def read_capture_config(source):
+    """Settings a source is running with right now, without changing anything"""
+    fps = source.get(cv2.CAP_PROP_FPS)
+    return CaptureConfig(int(source.get(cv2.CAP_PROP_FRAME_WIDTH)), int(source.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                         fps if fps and fps > 0 else 30, fourcc_to_str(source.get(cv2.CAP_PROP_FOURCC)))
+
+
+def apply_capture_config(source, config, probe_frames=10):
+    """
+    Configure a cv2.VideoCapture-like source and report what it granted.
+    FOURCC goes first since it decides which sizes and rates the driver offers.
+    The size is taken from real frames because some backends report the requested
+    size from get() while still delivering the old one.
+    """
+    accepted = {}
+    if config.fourcc:
+        accepted['fourcc'] = bool(source.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config.fourcc)))
+    accepted['width'] = bool(source.set(cv2.CAP_PROP_FRAME_WIDTH, config.width))
+    accepted['height'] = bool(source.set(cv2.CAP_PROP_FRAME_HEIGHT, config.height))
+    accepted['fps'] = bool(source.set(cv2.CAP_PROP_FPS, config.fps))
+
+    width = int(source.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(source.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = source.get(cv2.CAP_PROP_FPS)
+    fourcc = fourcc_to_str(source.get(cv2.CAP_PROP_FOURCC))
+
+    # Probe the first frames after the switch for the real size and rate
+    stamps = []
+    for _ in range(probe_frames):
+        ret, frame = source.read()
+        if not ret:
+            continue
+        stamps.append(time.monotonic())
+        height, width = frame.shape[:2]
+    measured_fps = None
+    if len(stamps) > 2 and stamps[-1] > stamps[1]:
+        # The first read often returns a buffered frame, so it is left out
+        measured_fps = (len(stamps) - 2) / (stamps[-1] - stamps[1])
+
+    granted = CaptureConfig(width, height, fps if fps and fps > 0 else config.fps, fourcc)
+    return NegotiationReport(config, granted, measured_fps, accepted)
+
+
+def load_capture_config(path):
+    """The capture settings saved at `path`, or None if there are none"""
+    try:
+        with open(path) as f:
+            return CaptureConfig.from_dict(json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+def save_capture_config(path, config):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(config.to_dict(), f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def capture_sidecar_path(media_path):
+    """<sign>_<n>.mp4 -> <sign>_<n>.capture.json"""
+    return os.path.splitext(media_path)[0] + ".capture.json"
+
+
+def save_capture_sidecar(media_path, report, **extra):
+    """Store the negotiated capture settings next to a recording"""
+    data = report.to_dict() if report is not None else {}
+    data.update(extra)
+    with open(capture_sidecar_path(media_path), 'w') as f:
+        json.dump(data, f, indent=2)
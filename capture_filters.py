@@ -0,0 +1,74 @@
+# Frame selection for static sign capture
+# Holding a sign still produces long runs of nearly identical frames. The filter
+# enforces a minimum interval between saved images and rejects frames that look
+# almost the same as the last saved one, using a tiny grayscale thumbnail or,
+# when both frames have them, the detected landmarks. Without landmarks (hands out
+# of view, or inference too far behind) only the thumbnail is compared.
+
+import cv2
+import numpy as np
+
+
+def landmark_distance(landmarks_a, mask_a, landmarks_b, mask_b):
+    """Mean x/y distance over landmarks present in both frames, None if there are none"""
+    common = mask_a & mask_b
+    if not common.any():
+        return None
+    delta = landmarks_a[common, :2] - landmarks_b[common, :2]
+    return float(np.sqrt((delta ** 2).sum(axis=1)).mean())
+
+
+class StaticCaptureFilter:
+    def __init__(self, min_interval=0.1, pixel_threshold=2.0, landmark_threshold=0.005,
+                 thumbnail_size=(32, 24)):
+        self.min_interval = min_interval
+        self.pixel_threshold = pixel_threshold  # Mean absolute difference on a 0-255 scale
+        self.landmark_threshold = landmark_threshold  # In normalized image coordinates
+        self.thumbnail_size = thumbnail_size
+        self.stats = {'accepted': 0, 'too_soon': 0, 'duplicates': 0}
+        self._last_time = None
+        self._last_thumbnail = None
+        self._last_landmarks = None
+        self._thumbnail = np.empty(thumbnail_size[::-1], dtype=np.uint8)
+        self._small = np.empty(thumbnail_size[::-1] + (3,), dtype=np.uint8)
+
+    def ready(self, timestamp):
+        """Return True if the minimum interval since the last saved frame has passed"""
+        if self._last_time is not None and timestamp - self._last_time < self.min_interval:
+            self.stats['too_soon'] += 1
+            return False
+        return True
+
+    def accept(self, frame, timestamp, landmarks=None, mask=None):
+        """Return True if the frame is worth saving, call commit() once it has actually been saved"""
+        if not self.ready(timestamp):
+            return False
+
+        cv2.resize(frame, self.thumbnail_size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._thumbnail)
+
+        if self._last_thumbnail is not None and self._is_duplicate(landmarks, mask):
+            self.stats['duplicates'] += 1
+            return False
+        return True
+
+    def commit(self, timestamp, landmarks=None, mask=None):
+        """Remember the frame last passed to accept() as the last saved one"""
+        self._last_time = timestamp
+        if self._last_thumbnail is None:
+            self._last_thumbnail = self._thumbnail.copy()
+        else:
+            np.copyto(self._last_thumbnail, self._thumbnail)
+        self._last_landmarks = (landmarks, mask) if landmarks is not None else None
+        self.stats['accepted'] += 1
+
+    def _is_duplicate(self, landmarks, mask):
+        # Landmarks tell pose changes apart from lighting noise, use them when both frames have them
+        if self.landmark_threshold and landmarks is not None and self._last_landmarks is not None:
+            distance = landmark_distance(landmarks, mask, *self._last_landmarks)
+            if distance is not None:
+                return distance < self.landmark_threshold
+        if not self.pixel_threshold:
+            return False
+        difference = cv2.absdiff(self._thumbnail, self._last_thumbnail).mean()
+        return difference < self.pixel_threshold
@@ -0,0 +1,65 @@
+# Per-frame work of the live collector, without any UI
+# The capture thread throttles each camera frame and flips it into the ring buffer,
+# the inference thread detects landmarks on the newest frame, draws them and scales
+# the result for the preview. collector_gui.py runs these steps on its threads and
+# benchmark.py drives the same steps on recorded video, optionally timing each stage.
+
+import cv2
+import numpy as np
+
+from frame_buffer import FrameRingBuffer, MAX_BUFFER_BYTES, buffer_capacity
+
+
+def run_stage(stage, func, *args):
+    """Default stage timer: runs the stage without measuring it"""
+    return func(*args)
+
+
+class FramePipeline:
+    def __init__(self, engine, throttle, preview_scaler, buffer_seconds=4, timer=None,
+                 max_buffer_bytes=MAX_BUFFER_BYTES):
+        """`timer(stage, func, *args)` runs every stage when given, e.g. to measure its latency"""
+        self.engine = engine
+        self.throttle = throttle
+        self.preview_scaler = preview_scaler
+        self.buffer_seconds = buffer_seconds  # Clips are encoded while recording, the buffer only covers encoder lag
+        self.max_buffer_bytes = max_buffer_bytes  # Fewer seconds are buffered when they would not fit
+        self.timer = timer or run_stage
+        self.frame_buffer = None  # Ring buffer holding recent raw frames, allocated on the first frame
+        self.stats = {'frames_captured': 0, 'frames_annotated': 0, 'frames_not_annotated': 0}
+        self._annotated = None  # Reused canvas for drawing landmarks
+
+    def _ensure_frame_buffer(self, frame_shape):
+        capacity = buffer_capacity(self.buffer_seconds, self.throttle.interval, frame_shape, self.max_buffer_bytes)
+        if (self.frame_buffer is None or not self.frame_buffer.matches(frame_shape)
+                or self.frame_buffer.capacity < capacity):
+            self.frame_buffer = FrameRingBuffer(capacity, frame_shape)
+        return self.frame_buffer
+
+    def capture(self, frame, capture_time):
+        """Throttle a camera frame and flip it into the ring buffer, returns the buffered frame or None if dropped"""
+        if not self.throttle.accept(capture_time):
+            return None
+        # Flip straight into the ring buffer slot, recording only needs the raw frame
+        frame_buffer = self._ensure_frame_buffer(frame.shape)
+        raw_frame = self.timer("flip", cv2.flip, frame, 1, frame_buffer.acquire())
+        frame_buffer.commit(capture_time)
+        self.stats['frames_captured'] += 1
+        return raw_frame
+
+    def annotate(self, raw_frame):
+        """Detect landmarks on a buffered frame, returns (annotated copy, pose_results, hand_results)"""
+        if self._annotated is None or self._annotated.shape != raw_frame.shape:
+            self._annotated = np.empty_like(raw_frame)
+        frame = self._annotated
+        np.copyto(frame, raw_frame)
+
+        rgb = self.timer("color", self.engine.prepare, frame)  # Downsampled to the inference size
+        pose_results, hand_results = self.engine.process(rgb, timer=self.timer)
+        self.timer("draw", self.engine.draw, frame, pose_results, hand_results)
+        self.stats['frames_annotated'] += 1
+        return frame, pose_results, hand_results
+
+    def render_preview(self, annotated_frame):
+        """Scale an annotated frame to the preview widget's size, so the UI thread only has to blit it"""
+        return self.timer("preview", self.preview_scaler.render, annotated_frame)
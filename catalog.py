@@ -0,0 +1,172 @@
+# Index of everything recorded under ArSL_Dataset
+# The catalog lives in ArSL_Dataset/catalog.sqlite and is updated as items are
+# written, so progress displays never have to list directories. Counts and the
+# next free take number per (kind, sign, user) are also kept in memory, which
+# makes the per-sign queries the UI runs on every refresh O(1).
+
+import os
+import sqlite3
+import threading
+import time
+
+CATALOG_NAME = "catalog.sqlite"
+KIND_FOLDERS = {'image': "Images", 'video': "Videos"}
+KIND_EXTENSIONS = {'image': ('.jpg', '.jpeg', '.png'), 'video': ('.mp4', '.avi')}
+
+
+def find_media(data_dir):
+    """Yield (kind, path) for every image and video in the dataset layout"""
+    for kind, folder in KIND_FOLDERS.items():
+        root = os.path.join(data_dir, folder)
+        if not os.path.isdir(root):
+            continue
+        for sign in sorted(os.listdir(root)):
+            sign_dir = os.path.join(root, sign)
+            if not os.path.isdir(sign_dir):
+                continue
+            for user in sorted(os.listdir(sign_dir)):
+                user_dir = os.path.join(sign_dir, user)
+                if not os.path.isdir(user_dir):
+                    continue
+                for f in sorted(os.listdir(user_dir)):
+                    if os.path.splitext(f)[1].lower() in KIND_EXTENSIONS[kind]:
+                        yield kind, os.path.join(user_dir, f)
+
+
+def item_number(path):
+    """Take number from a "<sign>_<n>.<ext>" filename, or None"""
+    try:
+        return int(os.path.splitext(os.path.basename(path))[0].rsplit('_', 1)[-1])
+    except ValueError:
+        return None
+
+
+class DatasetCatalog:
+    def __init__(self, data_dir, commit_every=100):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, CATALOG_NAME)
+        self.commit_every = commit_every
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._counts = {}  # (kind, sign, user) -> number of items
+        self._max_number = {}  # (kind, sign, user) -> highest take number
+
+        os.makedirs(data_dir, exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                path TEXT PRIMARY KEY,
+                sign TEXT NOT NULL,
+                user TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                number INTEGER,
+                duration REAL,
+                frames INTEGER,
+                created REAL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS items_by_sign ON items (kind, sign, user)")
+        self.db.commit()
+        if is_new:
+            self.rebuild()
+        else:
+            self._load_counts()
+
+    def _load_counts(self):
+        with self._lock:
+            self._counts.clear()
+            self._max_number.clear()
+            rows = self.db.execute(
+                "SELECT kind, sign, user, COUNT(*), MAX(number) FROM items GROUP BY kind, sign, user")
+            for kind, sign, user, count, max_number in rows:
+                self._counts[(kind, sign, user)] = count
+                if max_number is not None:
+                    self._max_number[(kind, sign, user)] = max_number
+
+    def rebuild(self):
+        """Scan the dataset tree once and replace the catalog contents with what is on disk"""
+        rows = []
+        for kind, folder in KIND_FOLDERS.items():
+            root = os.path.join(self.data_dir, folder)
+            if not os.path.isdir(root):
+                continue
+            for sign in os.listdir(root):
+                sign_dir = os.path.join(root, sign)
+                if not os.path.isdir(sign_dir):
+                    continue
+                for user in os.listdir(sign_dir):
+                    user_dir = os.path.join(sign_dir, user)
+                    if not os.path.isdir(user_dir):
+                        continue
+                    for entry in os.scandir(user_dir):
+                        if os.path.splitext(entry.name)[1].lower() in KIND_EXTENSIONS[kind]:
+                            rows.append((entry.path, sign, user, kind, item_number(entry.name),
+                                         None, 1 if kind == 'image' else None, entry.stat().st_mtime))
+        with self._lock:
+            self.db.execute("DELETE FROM items")
+            self.db.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.commit()
+            self._uncommitted = 0
+        self._load_counts()
+        return len(rows)
+
+    def add(self, path, sign, user, kind, duration=None, frames=None):
+        """Record a newly written item, replacing the entry if the file was overwritten"""
+        number = item_number(path)
+        row = (path, sign, user, kind, number, duration, frames, time.time())
+        key = (kind, sign, user)
+        with self._lock:
+            try:
+                self.db.execute("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+                self._counts[key] = self._counts.get(key, 0) + 1
+            except sqlite3.IntegrityError:
+                self.db.execute(
+                    "UPDATE items SET sign=?, user=?, kind=?, number=?, duration=?, frames=?, created=? "
+                    "WHERE path=?", row[1:] + (path,))
+            if number is not None and number > self._max_number.get(key, -1):
+                self._max_number[key] = number
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self.db.commit()
+                self._uncommitted = 0
+
+    def remove(self, path):
+        with self._lock:
+            row = self.db.execute("SELECT kind, sign, user FROM items WHERE path=?", (path,)).fetchone()
+            if row is None:
+                return
+            self.db.execute("DELETE FROM items WHERE path=?", (path,))
+            self._counts[row] = max(0, self._counts.get(row, 0) - 1)
+            self._uncommitted += 1
+
+    def commit(self):
+        with self._lock:
+            if self._uncommitted:
+                self.db.commit()
+                self._uncommitted = 0
+
+    def count(self, kind, sign, user):
+        """Number of recorded items of a kind ('image' or 'video') for one sign and user"""
+        return self._counts.get((kind, sign, user), 0)
+
+    def next_number(self, kind, sign, user):
+        """First take number after the highest one recorded so far"""
+        return self._max_number.get((kind, sign, user), -1) + 1
+
+    def items(self, kind=None, sign=None, user=None):
+        """Catalog rows as dicts, optionally filtered"""
+        query = "SELECT path, sign, user, kind, number, duration, frames, created FROM items"
+        conditions, params = [], []
+        for column, value in (("kind", kind), ("sign", sign), ("user", user)):
+            if value is not None:
+                conditions.append(f"{column}=?")
+                params.append(value)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        columns = ("path", "sign", "user", "kind", "number", "duration", "frames", "created")
+        with self._lock:
+            return [dict(zip(columns, row)) for row in self.db.execute(query, params)]
+
+    def close(self):
+        self.commit()
+        self.db.close()
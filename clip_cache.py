@@ -0,0 +1,144 @@
+# Cache of reference sign clips decoded at display resolution
+# Each clip is decoded, converted and letterboxed once into a single RGB array.
+# Playing, looping and switching back to a sign afterwards only blits frames.
+# Clips are evicted least-recently-used once the memory cap is reached.
+
+import cv2
+import numpy as np
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from preview import PreviewScaler
+
+
+class DecodedClip:
+    def __init__(self, frames, fps):
+        self.frames = frames  # (N, H, W, 3) uint8 RGB, already padded to the display size
+        self.fps = fps if fps and fps > 0 else 30
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes
+
+    def __len__(self):
+        return len(self.frames)
+
+
+def decode_clip(path, size=None):
+    """Decode a whole video into RGB frames letterboxed to size=(width, height)"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open {path}")
+    scaler = PreviewScaler(pad=True, buffers=1)
+    if size:
+        scaler.set_target(*size)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    expected = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = None
+    overflow = []
+    count = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            rgb = scaler.render(frame)
+            if frames is None:
+                # The container's frame count is only an estimate, extra frames go to overflow
+                frames = np.empty((max(expected, 1),) + rgb.shape, dtype=np.uint8)
+            if count < len(frames):
+                frames[count] = rgb
+            else:
+                overflow.append(rgb.copy())
+            count += 1
+    finally:
+        cap.release()
+    if frames is None:
+        raise IOError(f"No frames in {path}")
+    if overflow:
+        frames = np.concatenate([frames, np.stack(overflow)])
+    elif count < len(frames):
+        frames = frames[:count].copy()
+    return DecodedClip(frames, fps)
+
+
+class ClipCache:
+    def __init__(self, max_bytes=512 * 1024 * 1024, prefetch_workers=1):
+        self.max_bytes = max_bytes
+        self._clips = OrderedDict()  # (path, size) -> DecodedClip, most recently used last
+        self._pending = {}  # (path, size) -> Future of a decode in progress
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Clips someone is waiting for do not queue up behind prefetches
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clip-load")
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="clip-prefetch")
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'prefetched': 0}
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, path, size=None):
+        """Return the decoded clip, waiting for the decode if it is not cached. Not for the UI thread."""
+        return self.request(path, size).result()
+
+    def request(self, path, size=None):
+        """
+        Return a Future of the decoded clip without blocking: already done on a cache
+        hit, the running decode if the clip is being prefetched, a new decode otherwise.
+        """
+        key = (path, tuple(size) if size else None)
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is not None:
+                self._clips.move_to_end(key)
+                self.stats['hits'] += 1
+                future = Future()
+                future.set_result(clip)
+                return future
+            self.stats['misses'] += 1
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self._executor.submit(self._load, key)
+            return future
+
+    def prefetch(self, paths, size=None):
+        """Decode clips in the background so that selecting them later is a cache hit"""
+        for path in paths:
+            key = (path, tuple(size) if size else None)
+            with self._lock:
+                if key in self._clips or key in self._pending:
+                    continue
+                self._pending[key] = self._prefetch_executor.submit(self._load, key, True)
+
+    def clear(self):
+        with self._lock:
+            self._clips.clear()
+            self._bytes = 0
+
+    def _load(self, key, prefetched=False):
+        try:
+            clip = decode_clip(*key)
+        except BaseException:
+            with self._lock:
+                self._pending.pop(key, None)
+            raise
+        # Stored before it stops being pending, so no request in between starts another decode
+        with self._lock:
+            self._store(key, clip)
+            self._pending.pop(key, None)
+            if prefetched:
+                self.stats['prefetched'] += 1
+        return clip
+
+    def _store(self, key, clip):
+        """Add a clip, with the lock held"""
+        if clip.nbytes > self.max_bytes or key in self._clips:
+            return  # Too big to cache, the caller still gets it
+        self._clips[key] = clip
+        self._bytes += clip.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._clips.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.stats['evictions'] += 1
@@ -2,7 +2,7 @@
 # This tool allows recording of both static images and dynamic videos of signs
 
 import cv2
-import mediapipe as mp
+import numpy as np
 import os
 import time
 import tkinter as tk
@@ -12,31 +12,70 @@ import json
 import threading
 import queue
 import math
+import argparse
+from frame_sources import open_source
+from frame_buffer import FrameThrottle
+from capture_pipeline import FramePipeline
+from inference import LandmarkEngine
+from landmarks import LandmarkTrack, results_to_array, landmark_path, save_landmarks
+from image_writer import AsyncImageWriter
+from capture_filters import StaticCaptureFilter
+from preview import PreviewScaler, PhotoBlitter
+from clip_cache import ClipCache
+from catalog import DatasetCatalog
+from landmark_store import LandmarkStore
+from signs_watcher import SignsWatcher, is_sign_file
+from video_writers import StreamingVideoWriter, ConstantRateVideoWriter, find_working_codec
+from multi_camera import MultiCameraCapture
+from segment_writer import find_interrupted_takes, journal_directory, recover_takes, segments_supported
+from capture_config import (CaptureConfig, NegotiationReport, RESOLUTIONS, FRAME_RATES, FOURCCS, CONFIG_NAME,
+                            apply_capture_config, read_capture_config, parse_resolution, save_capture_sidecar,
+                            load_capture_config, save_capture_config)
 
 class SignDatasetCollector:
-    def __init__(self, username, signs_dir):
+    def __init__(self, username, signs_dir, source=0):
         # Basic configuration
         self.username = username
         self.signs_dir = signs_dir
         self.sign_config = {}
         self.load_sign_configuration()
         
-        # Initialize MediaPipe for pose and hand tracking
-        self.mp_pose = mp.solutions.pose
-        self.mp_hands = mp.solutions.hands
-        self.pose = self.mp_pose.Pose(min_detection_confidence=0.5)
-        self.hands = self.mp_hands.Hands(min_detection_confidence=0.5)
+        # Initialize MediaPipe for pose and hand tracking, both models run side by side.
+        # HD frames are downsampled for inference, recording stays at full resolution.
+        self.landmark_engine = LandmarkEngine(parallel=True, inference_size=640)
+        self.mp_pose = self.landmark_engine.mp_pose
+        self.mp_hands = self.landmark_engine.mp_hands
+        self.pose = self.landmark_engine.pose
+        self.hands = self.landmark_engine.hands
         
         # Set up data storage
         self.data_dir = "ArSL_Dataset"
         self._create_directories()
-        
-        # Camera and frame handling setup
-        self.cap = cv2.VideoCapture(0)
+        self.catalog = DatasetCatalog(self.data_dir)  # Index of recorded items for progress queries
+        self.landmark_store = LandmarkStore.for_dataset(self.data_dir)  # Landmark sequences of all takes
+        
+        # Camera and frame handling setup, any frame source works (camera, video files, images, synthetic)
+        self.cap = open_source(source)
+        self.cap_lock = threading.Lock()  # Reconfiguring the source must not race with reads
+        current = read_capture_config(self.cap)
+        self.capture_report = NegotiationReport(current, current)  # Replaced by configure_capture()
         self.frame_queue = queue.Queue(maxsize=2)  # Small queue to reduce latency
-        self.preview_queue = queue.Queue(maxsize=1)  # Preview queue for UI updates
-        self.last_frame_time = 0
-        self.frame_interval = 1.0 / 30  # Target 30 frames per second
+        self.preview_queue = queue.Queue(maxsize=1)  # Preview queue for UI updates, RGB at widget size
+        self.inference_queue = queue.Queue(maxsize=1)  # Latest raw frame waiting for landmark detection
+        self.landmark_listeners = set()  # LandmarkTracks of the recordings in progress
+        # Throttling, the ring buffer, annotation and preview scaling for every frame
+        self.pipeline = FramePipeline(self.landmark_engine, FrameThrottle(30), PreviewScaler(), buffer_seconds=4)
+        self.throttle = self.pipeline.throttle  # Target 30 frames per second
+        self.preview_scaler = self.pipeline.preview_scaler
+        self.preview_scaler.set_target(320, 240)  # Until the UI reports its real size
+        self.capture_stats = self.pipeline.stats
+        self.angles = None  # MultiCameraCapture for extra camera angles recorded alongside dynamic signs
+
+        # Camera settings chosen in an earlier session
+        self.capture_config_path = os.path.join(self.data_dir, CONFIG_NAME)
+        saved_config = load_capture_config(self.capture_config_path)
+        if saved_config is not None:
+            self.configure_capture(saved_config)
         
         # Recording state
         self.recording = False
@@ -59,75 +98,125 @@ class SignDatasetCollector:
         with open(config_path, 'w') as f:
             json.dump(self.sign_config, f)
 
+    @property
+    def frame_interval(self):
+        return self.throttle.interval
+
+    @frame_interval.setter
+    def frame_interval(self, interval):
+        self.throttle.set_fps(1.0 / interval)
+
+    @property
+    def frame_buffer(self):
+        """Ring buffer holding recent raw frames, None until the first frame arrives"""
+        return self.pipeline.frame_buffer
+
+    def configure_capture(self, config):
+        """Apply capture settings to the source and adopt whatever it granted, returns the NegotiationReport"""
+        with self.cap_lock:
+            report = apply_capture_config(self.cap, config)
+            self.capture_report = report
+            # At or below the device's rate; the throttle tolerates jitter around it
+            self.frame_interval = 1.0 / report.capture_fps
+        return report
+
+    def save_capture_config(self, config):
+        """Remember capture settings for the next session"""
+        save_capture_config(self.capture_config_path, config)
+
+    def frame_size(self):
+        """(width, height) of the frames being captured"""
+        if self.frame_buffer is not None:
+            height, width = self.frame_buffer.frame_shape[:2]
+            return (width, height)
+        return (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
     def get_signs(self):
         signs = {"static": [], "dynamic": []}
         for f in os.listdir(os.path.join(self.signs_dir, "static")):
-            if os.path.splitext(f)[1].lower() in ['.jpg', '.png', '.mp4']:
+            if is_sign_file('static', f):
                 signs["static"].append(f)
         for f in os.listdir(os.path.join(self.signs_dir, "dynamic")):
-            if os.path.splitext(f)[1].lower() in ['.mp4', '.avi']:
+            if is_sign_file('dynamic', f):
                 signs["dynamic"].append(f)
         return signs
 
-    def process_frame(self, frame):
-        current_time = time.time()
-        if current_time - self.last_frame_time < self.frame_interval:
-            return None, None  # Return both raw and annotated
+    def annotate_frame(self, raw_frame, return_results=False):
+        """Run pose and hand tracking on a flipped raw frame and return a copy with the landmarks drawn"""
+        frame, pose_results, hand_results = self.pipeline.annotate(raw_frame)
+        if return_results:
+            return frame, (pose_results, hand_results)
+        return frame
 
-        # Flip frame horizontally for correct orientation
-        frame = cv2.flip(frame, 1)
-        raw_frame = frame.copy()  # Create a copy of the flipped frame for raw output
+    def add_landmark_listener(self, track):
+        """Send every landmark detection result to `track` until it is removed"""
+        self.landmark_listeners.add(track)
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def remove_landmark_listener(self, track):
+        self.landmark_listeners.discard(track)
 
-        # Track body pose
-        pose_results = self.pose.process(rgb)
-        if pose_results.pose_landmarks:
-            mp.solutions.drawing_utils.draw_landmarks(
-                frame, pose_results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
-        
-        # Track hand movements
-        hand_results = self.hands.process(rgb)
-        if hand_results.multi_hand_landmarks:
-            for landmarks in hand_results.multi_hand_landmarks:
-                mp.solutions.drawing_utils.draw_landmarks(
-                    frame, landmarks, self.mp_hands.HAND_CONNECTIONS)
-
-        self.last_frame_time = current_time
-        return raw_frame, frame  # Return raw (flipped, no drawings) and annotated frame
+    def start(self):
+        """Start the capture and landmark inference threads"""
+        threading.Thread(target=self.camera_loop, daemon=True).start()
+        threading.Thread(target=self.inference_loop, daemon=True).start()
 
     def camera_loop(self):
-        """Main camera capture loop that runs in a separate thread"""
+        """Main camera capture loop that runs in a separate thread, it never waits for MediaPipe"""
         while self.cap.isOpened():
-            ret, frame = self.cap.read()
+            with self.cap_lock:
+                ret, frame = self.cap.read()
             if not ret:
                 continue
-                
-            raw_frame, annotated_frame = self.process_frame(frame)
-            if raw_frame is not None and annotated_frame is not None:
-                # Store raw frames for recording
-                try:
-                    self.frame_queue.put_nowait(raw_frame)
-                except queue.Full:
-                    try:
-                        self.frame_queue.get_nowait()
-                        self.frame_queue.put_nowait(raw_frame)
-                    except (queue.Empty, queue.Full):
-                        pass
-                
-                # Create smaller preview for UI with annotations
-                preview_frame = cv2.resize(annotated_frame, (320, 240))
-                try:
-                    self.preview_queue.put_nowait(preview_frame)
-                except queue.Full:
-                    try:
-                        self.preview_queue.get_nowait()
-                        self.preview_queue.put_nowait(preview_frame)
-                    except (queue.Empty, queue.Full):
-                        pass
+            capture_time = time.monotonic()  # Stamp as close to the read as possible
+            raw_frame = self.pipeline.capture(frame, capture_time)
+            if raw_frame is None:
+                continue  # Throttled
+
+            # Store raw frames for recording, the queue only holds views into the ring buffer
+            _put_latest(self.frame_queue, (capture_time, raw_frame))
+
+            # Hand the newest frame to the inference worker, replacing one it has not picked up yet
+            if not _put_latest(self.inference_queue, (capture_time, raw_frame)):
+                self.capture_stats['frames_not_annotated'] += 1
+
+    def inference_loop(self):
+        """Landmark detection for the annotated preview, runs at whatever rate MediaPipe manages"""
+        while True:
+            try:
+                capture_time, raw_frame = self.inference_queue.get(timeout=0.5)
+            except queue.Empty:
+                if not self.cap.isOpened():
+                    break
+                continue
+            annotated_frame, pose_results, hand_results = self.pipeline.annotate(raw_frame)
+
+            # Share the landmarks with the recordings that are waiting for them
+            listeners = list(self.landmark_listeners)
+            if listeners:
+                landmarks, mask = results_to_array(pose_results, hand_results)
+                for track in listeners:
+                    track.add(capture_time, landmarks, mask)
+
+            # Render the preview at the widget's size here, so the UI thread only has to blit it
+            preview_frame = self.pipeline.render_preview(annotated_frame)
+            _put_latest(self.preview_queue, preview_frame)
+
+
+def _put_latest(target_queue, item):
+    """Put an item in a small queue, replacing the oldest entry when full. Returns False if one was replaced."""
+    try:
+        target_queue.put_nowait(item)
+        return True
+    except queue.Full:
+        try:
+            target_queue.get_nowait()
+            target_queue.put_nowait(item)
+        except (queue.Empty, queue.Full):
+            pass
+        return False
 
 class CollectorGUI(tk.Tk):
-    def __init__(self):
+    def __init__(self, source=0, angles=()):
         super().__init__()
         self.title("ArSL Dataset Collector Pro v4")
         self.geometry("1200x800")
@@ -155,6 +244,8 @@ class CollectorGUI(tk.Tk):
         self.camera_frame = ttk.LabelFrame(self.paned_window, text="Camera Preview")
         self.camera_label = ttk.Label(self.camera_frame)
         self.camera_label.pack(fill=tk.BOTH, expand=True)
+        self.camera_blitter = PhotoBlitter(self.camera_label)
+        self.camera_frame.bind('<Configure>', self._on_camera_frame_resize)
         self.paned_window.add(self.camera_frame, weight=1)
         
         # Media preview
@@ -183,6 +274,15 @@ class CollectorGUI(tk.Tk):
         self.initial_delay = 3
         self.video_delay = 1
         self.collection_running = False
+        self.constant_frame_rate = True  # Resample recordings onto an exact FPS grid using capture timestamps
+        self.jpeg_quality = 75  # Same as the PIL default the images were always saved with
+        self.use_cv2_encoder = True  # Encode static images with OpenCV instead of PIL
+        self.image_writer_workers = 2
+        self.static_min_interval = 0.1  # Seconds between saved static images
+        self.duplicate_threshold = 2.0  # Mean thumbnail difference below which a frame counts as a duplicate, 0 disables
+        # Takes are written as segments of this length so a crash loses at most one, 0 disables.
+        # Only used when ffmpeg can join them without re-encoding
+        self.segment_seconds = 1.0
         
         # Control buttons frame
         buttons_frame = ttk.Frame(control_frame)
@@ -231,9 +331,16 @@ class CollectorGUI(tk.Tk):
         self.current_sign_index = 0
         self.signs = {"static": [], "dynamic": []}
         self.media_player = None
+        self.clip_cache = ClipCache(max_bytes=512 * 1024 * 1024)  # Decoded reference clips
+        self.signs_watcher = None
+        self.sign_watch_latencies = []  # Seconds from the watcher noticing a sign file to the UI showing it
         self.test_video_path = ""
         self.recording_popup = None
         self.test_recording_active = False
+        self.camera_reconfiguring = False  # Recordings wait until the new capture settings are in place
+        self.pending_capture_config = None  # Camera settings saved during a recording, applied after it
+        self.source = source
+        self.angle_sources = list(angles)  # Extra cameras recorded with dynamic signs
         
         self._ask_signs_directory()
         self._ask_username()
@@ -380,11 +487,39 @@ class CollectorGUI(tk.Tk):
         if not username:
             self.destroy()
             return
-        self.collector = SignDatasetCollector(username, self.signs_dir)
+        self.collector = SignDatasetCollector(username, self.signs_dir, self.source)
+        self._recover_interrupted_takes()
         self.load_signs()
-        threading.Thread(target=self.collector.camera_loop, daemon=True).start()
+        self.collector.start()
+        if self.angle_sources:
+            try:
+                self.collector.angles = MultiCameraCapture(self.angle_sources).start()
+            except IOError as e:
+                messagebox.showwarning("Extra Angles", f"Recording from the main camera only: {e}")
         self.update_camera_preview()
 
+    def _recover_interrupted_takes(self):
+        """Offer to keep or discard takes left behind by a crash, as .part segment folders"""
+        journal_dir = journal_directory(self.collector.data_dir)
+        videos_dir = os.path.join(self.collector.data_dir, "Videos")
+        interrupted = find_interrupted_takes(journal_dir, within=videos_dir)
+        if not interrupted:
+            return
+        keep = messagebox.askyesno(
+            "Interrupted Recordings",
+            f"Found {len(interrupted)} take(s) that were interrupted while recording.\n"
+            "Recover what was recorded? (No deletes them)")
+        recovered = recover_takes(journal_dir, keep=keep, within=videos_dir)
+        for path, frames in recovered:
+            # Videos/<sign>/<user>/<sign>_<n>.<ext>, with the same data_dir prefix as recorded rows
+            parts = os.path.relpath(path, videos_dir).split(os.sep)
+            if len(parts) != 3:
+                continue
+            self.collector.catalog.add(path, parts[0], parts[1], 'video', frames=frames)
+        self.collector.catalog.commit()
+        if keep:
+            self.status.config(text=f"Recovered {len(recovered)} interrupted take(s)")
+
     def load_signs(self):
         self.signs = self.collector.get_signs()
         if not self.signs['static'] and not self.signs['dynamic']:
@@ -392,15 +527,61 @@ class CollectorGUI(tk.Tk):
             self.destroy()
             
         # Populate sign selector
+        self._populate_sign_selector()
+        
+        if self.sign_selector['values']:
+            self.sign_selector.set(self.sign_selector['values'][0])
+            self.show_current_sign()
+        
+        # Pick up reference media added or removed while the app is running
+        if self.signs_watcher:
+            self.signs_watcher.stop()
+        self.signs_watcher = SignsWatcher(self.signs_dir, self._on_signs_changed, self.signs).start()
+
+    def _populate_sign_selector(self):
         all_signs = [(f"Static: {s}", 'static', i) for i, s in enumerate(self.signs['static'])]
         all_signs.extend([(f"Dynamic: {s}", 'dynamic', i) for i, s in enumerate(self.signs['dynamic'])])
         
         self.sign_selector['values'] = [s[0] for s in all_signs]
         self.sign_mappings = {s[0]: (s[1], s[2]) for s in all_signs}
-        
-        if self.sign_selector['values']:
-            self.sign_selector.set(self.sign_selector['values'][0])
+
+    def _on_signs_changed(self, change):
+        """Called from the watcher thread, the update itself runs on the Tk thread"""
+        self.after(0, lambda: self._apply_sign_change(change))
+
+    def _apply_sign_change(self, change):
+        # Remember which sign is selected so the index can follow it
+        current = None
+        if self.current_sign_index < len(self.signs['static']):
+            current = ('static', self.signs['static'][self.current_sign_index])
+        elif self.current_sign_index - len(self.signs['static']) < len(self.signs['dynamic']):
+            current = ('dynamic', self.signs['dynamic'][self.current_sign_index - len(self.signs['static'])])
+        
+        signs = self.signs[change.sign_type]
+        for name in change.removed:
+            if name in signs:
+                signs.remove(name)
+        for name in change.added:
+            if name not in signs:
+                signs.append(name)
+        self._populate_sign_selector()
+        
+        current_removed = current is not None and current[1] not in self.signs[current[0]]
+        if current is not None and not current_removed:
+            offset = 0 if current[0] == 'static' else len(self.signs['static'])
+            self.current_sign_index = offset + self.signs[current[0]].index(current[1])
+        total = len(self.signs['static']) + len(self.signs['dynamic'])
+        self.current_sign_index = min(self.current_sign_index, max(0, total - 1))
+        if current_removed and total and not self.collection_running:
             self.show_current_sign()
+        
+        # Latency from the watcher receiving the file event to the selector being updated,
+        # including the wait for a copy to finish
+        latency = change.latency()
+        self.sign_watch_latencies.append(latency)
+        summary = f"{len(change.added)} added, {len(change.removed)} removed"
+        summary += f" (on screen {latency:.2f}s after the change was noticed)"
+        self.status.config(text=f"{change.sign_type.capitalize()} signs updated: {summary}")
 
     def on_sign_selected(self, event):
         selected = self.sign_selector.get()
@@ -416,32 +597,9 @@ class CollectorGUI(tk.Tk):
         current_time = time.time()
         if current_time - self.last_preview_update >= self.preview_interval:
             try:
+                # Already scaled and converted on the inference thread
                 frame = self.collector.preview_queue.get_nowait()
-                img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                
-                # Cache container size
-                if not hasattr(self, '_container_size'):
-                    self._container_size = (
-                        self.camera_frame.winfo_width(),
-                        self.camera_frame.winfo_height()
-                    )
-                
-                # Only resize if container size has changed
-                if (self._container_size[0] != self.camera_frame.winfo_width() or
-                    self._container_size[1] != self.camera_frame.winfo_height()):
-                    self._container_size = (
-                        self.camera_frame.winfo_width(),
-                        self.camera_frame.winfo_height()
-                    )
-                    
-                if self._container_size[0] > 0 and self._container_size[1] > 0:
-                    img = self._resize_with_aspect_ratio(img, 
-                                                       self._container_size[0], 
-                                                       self._container_size[1])
-                    
-                imgtk = ImageTk.PhotoImage(image=img)
-                self.camera_label.imgtk = imgtk
-                self.camera_label.configure(image=imgtk)
+                self.camera_blitter.show(frame)
                 self.last_preview_update = current_time
                 
             except queue.Empty:
@@ -449,6 +607,10 @@ class CollectorGUI(tk.Tk):
                 
         self.after(max(1, int(self.preview_interval * 1000)), self.update_camera_preview)
 
+    def _on_camera_frame_resize(self, event):
+        if self.collector:
+            self.collector.preview_scaler.set_target(event.width, event.height)
+
     def show_current_sign(self):
         # Update the combobox selection to match current_sign_index
         if self.current_sign_index < len(self.signs['static']):
@@ -457,12 +619,8 @@ class CollectorGUI(tk.Tk):
             display_name = f"Static: {sign_name}"
             
             # Update progress bar for static signs
-            sign_dir = os.path.join(self.collector.data_dir, "Images", os.path.splitext(sign_name)[0], self.collector.username)
-            if os.path.exists(sign_dir):
-                existing_files = len([f for f in os.listdir(sign_dir) if f.endswith('.jpg')])
-                self.progress.configure(maximum=200, value=existing_files)
-            else:
-                self.progress.configure(maximum=200, value=0)
+            existing_files = self.collector.catalog.count('image', os.path.splitext(sign_name)[0], self.collector.username)
+            self.progress.configure(maximum=200, value=existing_files)
                 
         else:
             sign_type = 'dynamic'
@@ -471,12 +629,8 @@ class CollectorGUI(tk.Tk):
             display_name = f"Dynamic: {sign_name}"
             
             # Update progress bar for dynamic signs
-            sign_dir = os.path.join(self.collector.data_dir, "Videos", os.path.splitext(sign_name)[0], self.collector.username)
-            if os.path.exists(sign_dir):
-                existing_files = len([f for f in os.listdir(sign_dir) if f.endswith(('.mp4', '.avi'))])
-                self.progress.configure(maximum=200, value=existing_files)
-            else:
-                self.progress.configure(maximum=200, value=0)
+            existing_files = self.collector.catalog.count('video', os.path.splitext(sign_name)[0], self.collector.username)
+            self.progress.configure(maximum=200, value=existing_files)
         
         self.sign_selector.set(display_name)
         media_path = os.path.join(self.signs_dir, sign_type, sign_name)
@@ -491,7 +645,7 @@ class CollectorGUI(tk.Tk):
         if ext in ['.jpg', '.png', '.jpeg']:
             self.media_player = ImagePlayer(self.media_label, path)
         elif ext in ['.mp4', '.avi']:
-            self.media_player = VideoPlayer(self.media_label, path)
+            self.media_player = VideoPlayer(self.media_label, path, self.clip_cache)
         
         # Set initial size based on container
         container_width = self.media_frame.winfo_width()
@@ -499,6 +653,16 @@ class CollectorGUI(tk.Tk):
         self.media_player.resize(container_width, container_height)
         self.media_player.play()
         self.play_btn.config(text="||")
+        self._prefetch_next_signs()
+
+    def _prefetch_next_signs(self, count=3):
+        """Decode the reference clips of the next few signs in the background"""
+        all_signs = [('static', s) for s in self.signs['static']] + [('dynamic', s) for s in self.signs['dynamic']]
+        upcoming = all_signs[self.current_sign_index + 1:self.current_sign_index + 1 + count]
+        paths = [os.path.join(self.signs_dir, sign_type, sign) for sign_type, sign in upcoming
+                 if os.path.splitext(sign)[1].lower() in ['.mp4', '.avi']]
+        if paths and isinstance(self.media_player, VideoPlayer):
+            self.clip_cache.prefetch(paths, self.media_player.display_size())
 
     def toggle_media_playback(self):
         if self.media_player and isinstance(self.media_player, VideoPlayer):
@@ -512,6 +676,9 @@ class CollectorGUI(tk.Tk):
     def start_collection(self):
         if self.collection_running:
             return
+        if self.camera_reconfiguring:
+            self.status.config(text="Camera is being reconfigured, try again in a moment")
+            return
         
         if self.current_sign_index >= len(self.signs['static']) + len(self.signs['dynamic']):
             self.show_completion_message()
@@ -594,30 +761,105 @@ class CollectorGUI(tk.Tk):
             sign_dir = os.path.join(self.collector.data_dir, "Images", sign_name, self.collector.username)
             os.makedirs(sign_dir, exist_ok=True)
             
-            for i in range(count):
+            # Collect landmark results while capturing, they are saved next to the images at the end
+            track = LandmarkTrack()
+            self.collector.add_landmark_listener(track)
+            saved = []
+            
+            # Encoding and disk writes happen on the writer pool, this loop only hands frames over
+            username = self.collector.username
+            writer = AsyncImageWriter(workers=self.image_writer_workers, quality=self.jpeg_quality,
+                                      use_cv2=self.use_cv2_encoder,
+                                      on_written=lambda path: self.collector.catalog.add(
+                                          path, sign_name, username, 'image', duration=0, frames=1))
+            # Keep a minimum spacing between images and skip frames that barely differ from the last one
+            capture_filter = StaticCaptureFilter(min_interval=self.static_min_interval,
+                                                 pixel_threshold=self.duplicate_threshold,
+                                                 landmark_threshold=0.005 if self.duplicate_threshold else 0)
+            start_time = time.monotonic()
+            # A signer holding perfectly still makes every frame a duplicate, so the session
+            # also ends after twice the time the requested images need at the minimum spacing
+            deadline = start_time + 2 * count * max(self.static_min_interval, self.collector.frame_interval) + 5
+            last_preview = 0
+            i = 0
+            
+            while i < count and self.collection_running and time.monotonic() < deadline:
                 try:
-                    frame = self.collector.frame_queue.get(timeout=1)
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    img = Image.fromarray(frame)
-                    img.save(os.path.join(sign_dir, f"{sign_name}_{i}.jpg"))
-                    
-                    # Update progress and preview using proper thread-safe calls
-                    self.after(0, lambda i=i: progress.config(value=(i+1)/count * 100))
-                    self.after(0, lambda f=frame: self.update_popup_preview(preview_label, f))
-                    
+                    capture_time, frame = self.collector.frame_queue.get(timeout=1)
                 except queue.Empty:
                     continue
+                if not capture_filter.ready(capture_time):
+                    continue
+                # Inference runs a little behind capture, give it a moment to catch up with this frame.
+                # On timeout the filter falls back to comparing thumbnails only.
+                if capture_filter.landmark_threshold:
+                    track.wait_until(capture_time, timeout=0.2)
+                landmarks, mask, _ = track.lookup([capture_time])
+                if mask[0].any():
+                    landmarks, mask = landmarks[0], mask[0]
+                else:
+                    landmarks, mask = None, None
+                if not capture_filter.accept(frame, capture_time, landmarks, mask):
+                    continue
+                image_path = os.path.join(sign_dir, f"{sign_name}_{i}.jpg")
+                if not writer.submit(image_path, frame):
+                    continue  # Writers are saturated, try again with the next frame
+                capture_filter.commit(capture_time, landmarks, mask)
+                saved.append((image_path, capture_time))
+                i += 1
+                
+                # Update progress and preview using proper thread-safe calls
+                self.after(0, lambda i=i: progress.config(value=i/count * 100))
+                if time.monotonic() - last_preview >= 0.1:
+                    last_preview = time.monotonic()
+                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    self.after(0, lambda f=rgb: self.update_popup_preview(preview_label, f))
             
+            stopped_by_user = not self.collection_running  # k or Esc, the sign is not done yet
+            stats = writer.close()
+            self.collector.catalog.commit()
+            elapsed = time.monotonic() - start_time
+            rate = stats['written'] / elapsed if elapsed > 0 else 0
+            self._save_image_landmarks(track, saved)
+            self.after(0, lambda: self.status.config(
+                text=f"{'Stopped after' if stopped_by_user else 'Saved'} {stats['written']} images at {rate:.1f}/s "
+                     f"(dropped {stats['dropped']}, failed {stats['failed']}, "
+                     f"skipped {capture_filter.stats['duplicates']} near-duplicates)"
+            ))
+            if stats['last_error']:
+                self.after(0, lambda: messagebox.showwarning(
+                    "Images Not Saved", f"{stats['failed']} image(s) could not be saved.\nLast error: {stats['last_error']}"))
             self.after(0, popup.destroy)
+            self.collection_running = False
+            self.session_stats['recorded_items'] += stats['written']
+            if stopped_by_user:
+                return
             self.current_sign_index += 1
             self.show_current_sign()
             self.check_completion()
-            self.collection_running = False
-            self.session_stats['recorded_items'] += count
             self.session_stats['completed_signs'].add(self.current_sign_index)
         
         threading.Thread(target=actual_collection_thread, daemon=True).start()
         
+    def _save_image_landmarks(self, track, saved):
+        """Write one landmark file per saved image once inference has caught up"""
+        if saved:
+            track.wait_until(saved[-1][1])
+        self.collector.remove_landmark_listener(track)
+        for image_path, capture_time in saved:
+            landmarks, mask, age = track.lookup([capture_time])
+            save_landmarks(landmark_path(image_path), landmarks, mask, [capture_time], age)
+
+    def _save_clip_landmarks(self, track, writer):
+        """Write the landmark sequence of a finished clip, one entry per written video frame"""
+        timestamps = writer.frame_timestamps
+        if timestamps:
+            track.wait_until(timestamps[-1])
+        self.collector.remove_landmark_listener(track)
+        landmarks, mask, age = track.lookup(timestamps)
+        save_landmarks(landmark_path(writer.path), landmarks, mask, timestamps, age)
+        return landmarks, mask, timestamps
+
     def check_completion(self):
         if self.current_sign_index >= len(self.signs['static']) + len(self.signs['dynamic']):
             self.show_completion_message()
@@ -639,9 +881,9 @@ class CollectorGUI(tk.Tk):
             sign_dir = os.path.join(self.collector.data_dir, "Videos", sign_name, self.collector.username)
             os.makedirs(sign_dir, exist_ok=True)
            
-            # Find the highest existing video number
-            existing_videos = [file for file in os.listdir(sign_dir) if file.startswith(sign_name)]
-            existing_count = len(existing_videos)
+            # Existing takes and the highest video number come from the catalog
+            catalog = self.collector.catalog
+            existing_count = catalog.count('video', sign_name, self.collector.username)
             
             if video_count <= existing_count:
                 self.after(0, lambda: messagebox.showinfo(
@@ -654,43 +896,14 @@ class CollectorGUI(tk.Tk):
             remaining_count = video_count - existing_count
             
             
-            start_number = 0
-            if existing_videos:
-                numbers = []
-                for video_file in existing_videos:
-                    # Extract number from filename like "(sign_name)_123.ext"
-                    try:
-                        sign_num = int(video_file.split('_')[-1].split('.')[0])
-                        numbers.append(sign_num)
-                    except (ValueError, IndexError):
-                        continue
-                if numbers:
-                    # find the highest number to continue the recording from there
-                    start_number = max(numbers) + 1
-        
-           # Try different codecs in order of preference
-            codecs = [
-            ('XVID', 'avi'),
-            ('mp4v', 'mp4'),
-            ('MJPG', 'avi'),
-            ]
-        
-           # Determine frame size from the camera
-            frame_size = (int(self.collector.cap.get(3)), int(self.collector.cap.get(4)))
+            # continue the recording after the highest number
+            start_number = catalog.next_number('video', sign_name, self.collector.username)
+        
+           # Determine frame size from what the camera actually delivers
+            frame_size = self.collector.frame_size()
            
            # Find working codec
-            working_codec = None
-            working_ext = None
-            for codec, ext in codecs:
-                fourcc = cv2.VideoWriter_fourcc(*codec)
-                test_path = os.path.join(sign_dir, f"test.{ext}")
-                test_writer = cv2.VideoWriter(test_path, fourcc, 30, frame_size)
-                if test_writer.isOpened():
-                    test_writer.release()
-                    os.remove(test_path)   # Clean up test file
-                    working_codec = codec
-                    working_ext = ext
-                    break
+            working_codec, working_ext = find_working_codec(sign_dir, frame_size)
             
             if not working_codec:
                 # If no codec worked
@@ -698,42 +911,75 @@ class CollectorGUI(tk.Tk):
                 return
             
             
+            frame_buffer = self.collector.frame_buffer
+            if frame_buffer is None:
+                self.after(0, lambda: messagebox.showerror("Error", "No frames received from the camera!"))
+                self.collection_running = False
+                return
+
             for video_num in range(start_number, start_number + remaining_count):
                 if not self.collection_running:
                     # Clean up and exit if recording was stopped
                     break
 
                 video_path = os.path.join(sign_dir, f"{sign_name}_{video_num}.{working_ext}")
-                frames = []
-                start_time = time.time()
+                take_start = time.monotonic()  # Every clip of the take starts its frame grid here
+                try:
+                    writer = self._open_clip_writer(video_path, working_codec, frame_size, frame_buffer, duration,
+                                                    start_time=take_start)
+                except IOError:
+                    self.after(0, lambda: messagebox.showerror("Error", f"Failed to create video {video_num + 1}"))
+                    continue
                 
-                # Collect frames
-                while (time.time() - start_time) < duration and self.collection_running:
+                # Frames are encoded while the clip is being recorded
+                track = LandmarkTrack()
+                self.collector.add_landmark_listener(track)
+                angle_take = self._start_angle_take(sign_dir, sign_name, video_num, working_codec,
+                                                    working_ext, frame_buffer, duration, take_start, writer.fps)
+                self._stream_frames(frame_buffer, writer, duration, lambda: self.collection_running,
+                                    start_time=take_start)
+                if angle_take is not None:
                     try:
-                        frame = self.collector.frame_queue.get(timeout=0.1)
-                        frames.append(frame)
-                    except queue.Empty:
-                        continue
+                        angle_stats = angle_take.result()
+                        if angle_stats.get('unmatched'):
+                            self.after(0, lambda a=angle_stats: self.status.config(
+                                text=f"Extra angles of take {video_num}: {a['unmatched']} unmatched frames, "
+                                     f"max skew {a['max_skew'] * 1000:.1f} ms"))
+                    except Exception as e:
+                        self.after(0, lambda e=e: messagebox.showwarning(
+                            "Extra Angles", f"Angle clips of take {video_num} failed: {e}"))
                         
                 # Only save the video if it wasn't interrupted
                 if self.collection_running:
-                    # Calculate FPS and save video
-                    actual_fps = max(1, len(frames) / duration)
-                    out = cv2.VideoWriter(video_path, fourcc, actual_fps, frame_size)
-                    
-                    if not out.isOpened():
-                        self.after(0, lambda: messagebox.showerror("Error", f"Failed to create video {video_num + 1}"))
+                    stats = writer.finalize()
+                    if stats.get('error'):
+                        # No clip at video_path; the take stays in the journal for recovery on the next start
+                        self.collector.remove_landmark_listener(track)
+                        self.after(0, lambda e=stats['error']: self.status.config(
+                            text=f"Video {video_num + 1} was not saved: {e}"))
+                        self.after(0, lambda e=stats['error']: messagebox.showerror(
+                            "Error", f"Video {video_num + 1} could not be saved: {e}\n"
+                                     "It will be recovered the next time the collector starts."))
                         continue
-                    
-                    for frame in frames:
-                        out.write(frame)
-                    out.release()
+                    landmarks, mask, timestamps = self._save_clip_landmarks(track, writer)
+                    npz_path = landmark_path(video_path)
+                    self.collector.landmark_store.add_take(
+                        sign_name, self.collector.username, video_num, landmarks, mask, timestamps,
+                        source=os.path.relpath(npz_path, self.collector.data_dir),
+                        source_mtime_ns=os.stat(npz_path).st_mtime_ns)
+                    save_capture_sidecar(video_path, self.collector.capture_report,
+                                         frame_size=list(frame_size), writer_fps=writer.fps)
+                    catalog.add(video_path, sign_name, self.collector.username, 'video',
+                                duration=stats['frames_written'] / writer.fps, frames=stats['frames_written'])
+                    catalog.commit()
                     
                     # Update progress
                     current_progress = video_num - start_number + 1
                     self.after(0, lambda: self.progress.configure(value=current_progress))
                     self.after(0, lambda: self.status.config(
-                        text=f"Recorded {current_progress}/{remaining_count} videos"
+                        text=f"Recorded {current_progress}/{remaining_count} videos "
+                             f"(dropped {stats['frames_dropped']}, max queue {stats['max_queue_depth']}, "
+                             f"duplicated {stats.get('frames_duplicated', 0)}, skipped {stats.get('frames_skipped', 0)})"
                     ))
                     
                     # Show delay popup between recordings if not the last video
@@ -745,7 +991,9 @@ class CollectorGUI(tk.Tk):
                         time.sleep(self.video_delay)
                         self.after(0, lambda: self.remove_delay_popup())
                 else:
-                    # Recording was stopped, break the loop
+                    # Recording was stopped, discard the partial video and break the loop
+                    writer.abort()
+                    self.collector.remove_landmark_listener(track)
                     break
             
             # Update UI after recording completes or is stopped
@@ -753,6 +1001,66 @@ class CollectorGUI(tk.Tk):
 
         threading.Thread(target=recording_thread, daemon=True).start()
 
+    def _stream_frames(self, frame_buffer, writer, duration, is_running, on_preview=None, preview_interval=0.1,
+                       start_time=None):
+        """
+        Feed every frame captured during `duration` seconds from `start_time` (default now)
+        from the ring buffer to the writer as soon as it arrives. Returns the (start, end) time of the take.
+        """
+        if start_time is None:
+            start_time = time.monotonic()
+        seq = frame_buffer.first_seq_since(start_time)
+        last_preview = 0
+        while (time.monotonic() - start_time) < duration and is_running():
+            if not frame_buffer.wait_for(seq, timeout=0.1):
+                continue
+            item = frame_buffer.get(seq)
+            if item is None:
+                # Fell a whole buffer behind, skip to the oldest frame still held
+                seq = frame_buffer.oldest
+                continue
+            frame, timestamp = item
+            writer.write(frame, timestamp)
+            seq += 1
+            if on_preview and time.monotonic() - last_preview >= preview_interval:
+                on_preview(frame)
+                last_preview = time.monotonic()
+        return start_time, time.monotonic()
+
+    def _start_angle_take(self, sign_dir, sign_name, video_num, codec, ext, frame_buffer, duration, start_time, fps):
+        """
+        Record the extra camera angles of a take on their own thread, paired against the
+        main camera's frames and on the main clip's frame grid. Clips go to an "angles"
+        folder so they are not counted as takes. Returns a Future with the take statistics.
+        """
+        angles = self.collector.angles
+        if angles is None:
+            return None
+        angle_dir = os.path.join(sign_dir, "angles")
+        os.makedirs(angle_dir, exist_ok=True)
+        paths = [os.path.join(angle_dir, f"{sign_name}_{video_num}_cam{i + 1}.{ext}")
+                 for i in range(len(angles.streams))]
+        return angles.record_take_async(paths, duration, codec, reference=frame_buffer,
+                                        is_running=lambda: self.collection_running, start_time=start_time, fps=fps)
+
+    def _open_clip_writer(self, path, codec, frame_size, frame_buffer, duration=None, start_time=None,
+                          journal=True):
+        """
+        Open the streaming writer for a take, resampled to a constant frame rate if enabled.
+        Takes of the dataset are journaled for recovery, test recordings (journal=False) are not.
+        """
+        target_fps = 1.0 / self.collector.frame_interval
+        segment_seconds = self.segment_seconds if self.segment_seconds and segments_supported() else None
+        journal_dir = journal_directory(self.collector.data_dir) if journal else None
+        if self.constant_frame_rate:
+            return ConstantRateVideoWriter(path, codec, target_fps, frame_size, start_time=start_time,
+                                           duration=duration, segment_seconds=segment_seconds,
+                                           journal_dir=journal_dir)
+        # Without resampling the container FPS has to match the rate the camera is delivering
+        fps = frame_buffer.measured_fps() or target_fps
+        return StreamingVideoWriter(path, codec, fps, frame_size, segment_seconds=segment_seconds,
+                                    journal_dir=journal_dir)
+
     def show_delay_popup(self, current_video, total_videos):
         """Show a popup during the delay between videos"""
         self.delay_popup = tk.Toplevel(self)
@@ -792,7 +1100,7 @@ class CollectorGUI(tk.Tk):
         original_width, original_height = image.size
         ratio = min(max_width/original_width, max_height/original_height)
         new_size = (int(original_width * ratio), int(original_height * ratio))
-        return image.resize(new_size, Image.LANCZOS)
+        return image.resize(new_size, Image.BILINEAR)
 
     def toggle_test_recording(self):
         if not self.test_recording_active:
@@ -801,6 +1109,9 @@ class CollectorGUI(tk.Tk):
             self.stop_recording(self.recording_popup)
 
     def start_test_recording(self):
+      if self.camera_reconfiguring:
+        self.status.config(text="Camera is being reconfigured, try again in a moment")
+        return
       # Ask for delay before recording
       delay = simpledialog.askinteger("Delay", "Enter delay before recording (seconds):", 
                                   parent=self, minvalue=0)
@@ -818,28 +1129,11 @@ class CollectorGUI(tk.Tk):
       # Create test_recordings directory 
       os.makedirs("test_recordings", exist_ok=True)  
       
-      # Try different codecs
-      codecs = [
-        ('XVID', 'avi'),
-        ('mp4v', 'mp4'),
-        ('MJPG', 'avi'),
-      ]
-    
-      # Get frame size from camera
-      frame_size = (int(self.collector.cap.get(3)), int(self.collector.cap.get(4)))
+      # Get frame size from what the camera actually delivers
+      frame_size = self.collector.frame_size()
     
       # Find working codec
-      working_codec, working_ext = None, None
-      for codec, ext in codecs:
-        fourcc = cv2.VideoWriter_fourcc(*codec)
-        test_path = os.path.join("test_recordings", f"test.{ext}")
-        test_writer = cv2.VideoWriter(test_path, fourcc, 30, frame_size)
-        if test_writer.isOpened():
-            test_writer.release()
-            os.remove(test_path)
-            working_codec = codec
-            working_ext = ext
-            break
+      working_codec, working_ext = find_working_codec("test_recordings", frame_size)
     
       if not working_codec:
         messagebox.showerror("Error", "Could not initialize video recording")
@@ -861,7 +1155,7 @@ class CollectorGUI(tk.Tk):
                 ))
                 last_count = countdown_sec
             try:
-                frame = self.collector.frame_queue.get_nowait()
+                _, frame = self.collector.frame_queue.get_nowait()
                 img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
                 img = self._resize_with_aspect_ratio(img, 640, 480)
                 imgtk = ImageTk.PhotoImage(image=img)
@@ -876,36 +1170,34 @@ class CollectorGUI(tk.Tk):
         # Update status to show recording has started
         self.after(0, lambda: self.status.config(text="Started recording"))
         
-        # Start actual recording
-        frames = []
-        start_time = time.time()
-        recording_end = start_time + duration
-        
-        while time.time() < recording_end and self.test_recording_active:
-            try:
-                frame = self.collector.frame_queue.get(timeout=0.1)
-                frames.append(frame)
-                # Update preview
-                img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                img = self._resize_with_aspect_ratio(img, 640, 480)
-                imgtk = ImageTk.PhotoImage(image=img)
-                self.after(0, lambda: self.update_preview(preview_label, imgtk))
-            except queue.Empty:
-                continue
+        # Start actual recording, frames are kept in the collector's ring buffer
+        frame_buffer = self.collector.frame_buffer
+        if frame_buffer is None:
+            self.after(0, lambda: messagebox.showerror("Error", "No frames received from the camera!"))
+            self.after(0, lambda: self.stop_recording(self.recording_popup))
+            return
+        try:
+            writer = self._open_clip_writer(self.test_video_path, working_codec, frame_size, frame_buffer,
+                                            journal=False)
+        except IOError:
+            self.after(0, lambda: messagebox.showerror("Error", "Could not initialize video recording"))
+            self.after(0, lambda: self.stop_recording(self.recording_popup))
+            return
         
-        end_time = time.time()
+        def update_preview(frame):
+            img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            img = self._resize_with_aspect_ratio(img, 640, 480)
+            imgtk = ImageTk.PhotoImage(image=img)
+            self.after(0, lambda: self.update_preview(preview_label, imgtk))
+        
+        start_time, end_time = self._stream_frames(frame_buffer, writer, duration,
+                                                   lambda: self.test_recording_active,
+                                                   on_preview=update_preview)
+        writer.finalize(end_time)
+        save_capture_sidecar(self.test_video_path, self.collector.capture_report,
+                             frame_size=list(frame_size), writer_fps=writer.fps)
         actual_duration = end_time - start_time
         
-        # Calculate actual FPS
-        actual_fps = len(frames) / actual_duration if actual_duration > 0 else 30
-        
-        # Write frames
-        fourcc = cv2.VideoWriter_fourcc(*working_codec)
-        out = cv2.VideoWriter(self.test_video_path, fourcc, actual_fps, frame_size)
-        for frame in frames:
-            out.write(frame)
-        out.release()
-        
         self.after(0, lambda: self.on_test_recording_complete(actual_duration))
     
       threading.Thread(target=recording_thread, daemon=True).start()
@@ -939,7 +1231,7 @@ class CollectorGUI(tk.Tk):
                 time.sleep(max(0, next_frame_time - current_time - 0.001))  # Precision sleep
             
             try:
-                frame = self.frame_queue.get(timeout=0.1)
+                _, frame = self.frame_queue.get(timeout=0.1)
                 out.write(frame)
                 next_frame_time += frame_interval
                 progress_callback(f"Recording {sign_name} - {int(time.time() - start_time)}s/{duration}s")
@@ -957,7 +1249,7 @@ class CollectorGUI(tk.Tk):
 
     def record_test(self):
         while self.collector.test_recording:
-            frame = self.collector.frame_queue.get()
+            _, frame = self.collector.frame_queue.get()
             self.test_writer.write(frame)
 
     def stop_test_recording(self):
@@ -1057,10 +1349,18 @@ class CollectorGUI(tk.Tk):
         menubar.add_cascade(label="Tools", menu=tools_menu)
         tools_menu.add_command(label="View Progress", command=self.show_progress_window)
         tools_menu.add_command(label="Settings", command=self.show_settings)
+        tools_menu.add_command(label="Rebuild Dataset Catalog", command=self.rebuild_catalog)
     
+    def rebuild_catalog(self):
+        """Rescan ArSL_Dataset, e.g. after files were copied in or deleted outside the app"""
+        count = self.collector.catalog.rebuild()
+        self.show_current_sign()
+        self.status.config(text=f"Catalog rebuilt: {count} items")
+
     def emergency_stop(self):
         """Stop all recording activities immediately"""
         self.test_recording_active = False
+        # The recording thread aborts the take in progress, which deletes its segment folder
         self.collection_running = False
         if hasattr(self, 'recording_popup') and self.recording_popup:
             self.recording_popup.destroy()
@@ -1081,10 +1381,8 @@ class CollectorGUI(tk.Tk):
         if len(self.signs['static']) > 0:
             for sign in self.signs['static']:
                 sign_name = os.path.splitext(sign)[0]
-                sign_dir = os.path.join(self.collector.data_dir, "Images", sign_name, self.collector.username)
-                if os.path.exists(sign_dir):
-                    files = len([f for f in os.listdir(sign_dir) if f.endswith('.jpg')])
-                    static_recorded += min(files, 200)  # Cap at 200
+                files = self.collector.catalog.count('image', sign_name, self.collector.username)
+                static_recorded += min(files, 200)  # Cap at 200
                 static_total += 200
         
         dynamic_recorded = 0
@@ -1092,10 +1390,8 @@ class CollectorGUI(tk.Tk):
         if len(self.signs['dynamic']) > 0:
             for sign in self.signs['dynamic']:
                 sign_name = os.path.splitext(sign)[0]
-                sign_dir = os.path.join(self.collector.data_dir, "Videos", sign_name, self.collector.username)
-                if os.path.exists(sign_dir):
-                    files = len([f for f in os.listdir(sign_dir) if f.endswith(('.mp4', '.avi'))])
-                    dynamic_recorded += min(files, 200)  # Cap at 200
+                files = self.collector.catalog.count('video', sign_name, self.collector.username)
+                dynamic_recorded += min(files, 200)  # Cap at 200
                 dynamic_total += 200
         
         elapsed_time = time.time() - self.session_stats['start_time']
@@ -1167,16 +1463,67 @@ class CollectorGUI(tk.Tk):
         initial_delay.insert(0, str(self.initial_delay))
         initial_delay.grid(row=0, column=1, padx=5, pady=5)
         
+        constant_rate_var = tk.BooleanVar(value=self.constant_frame_rate)
+        ttk.Checkbutton(recording_frame, text="Constant frame rate (resample by capture time)",
+                        variable=constant_rate_var).grid(row=1, column=0, columnspan=2, sticky="w", padx=5, pady=5)
+        
+        ttk.Label(recording_frame, text="JPEG quality:").grid(row=2, column=0, padx=5, pady=5)
+        jpeg_quality = ttk.Spinbox(recording_frame, from_=50, to=100, width=5)
+        jpeg_quality.set(self.jpeg_quality)
+        jpeg_quality.grid(row=2, column=1, sticky="w", padx=5, pady=5)
+        
+        cv2_encoder_var = tk.BooleanVar(value=self.use_cv2_encoder)
+        ttk.Checkbutton(recording_frame, text="Fast JPEG encoding (OpenCV)",
+                        variable=cv2_encoder_var).grid(row=3, column=0, columnspan=2, sticky="w", padx=5, pady=5)
+        
+        ttk.Label(recording_frame, text="Min. seconds between images:").grid(row=4, column=0, padx=5, pady=5)
+        min_interval = ttk.Entry(recording_frame, width=8)
+        min_interval.insert(0, str(self.static_min_interval))
+        min_interval.grid(row=4, column=1, sticky="w", padx=5, pady=5)
+        
+        ttk.Label(recording_frame, text="Duplicate threshold (0 = off):").grid(row=5, column=0, padx=5, pady=5)
+        duplicate_threshold = ttk.Entry(recording_frame, width=8)
+        duplicate_threshold.insert(0, str(self.duplicate_threshold))
+        duplicate_threshold.grid(row=5, column=1, sticky="w", padx=5, pady=5)
+        
+        ttk.Label(recording_frame, text="Crash-safe segment length (s, 0 = off, needs ffmpeg):").grid(row=6, column=0, padx=5, pady=5)
+        segment_seconds = ttk.Entry(recording_frame, width=8)
+        segment_seconds.insert(0, str(self.segment_seconds))
+        segment_seconds.grid(row=6, column=1, sticky="w", padx=5, pady=5)
+        
         # Camera settings
         camera_frame = ttk.Frame(notebook)
         notebook.add(camera_frame, text="Camera")
         
         # Add camera resolution selection
+        capture_report = self.collector.capture_report
         ttk.Label(camera_frame, text="Resolution:").grid(row=0, column=0, padx=5, pady=5)
-        resolutions = ["640x480", "1280x720", "1920x1080"]
-        resolution_cb = ttk.Combobox(camera_frame, values=resolutions)
+        resolution_cb = ttk.Combobox(camera_frame, values=RESOLUTIONS)
+        resolution_cb.set(capture_report.requested.resolution)
         resolution_cb.grid(row=0, column=1, padx=5, pady=5)
         
+        ttk.Label(camera_frame, text="FPS:").grid(row=1, column=0, padx=5, pady=5)
+        fps_cb = ttk.Combobox(camera_frame, values=FRAME_RATES, width=6)
+        fps_cb.set(f"{capture_report.requested.fps:g}")
+        fps_cb.grid(row=1, column=1, sticky="w", padx=5, pady=5)
+        
+        ttk.Label(camera_frame, text="FOURCC (MJPG for HD on USB):").grid(row=2, column=0, padx=5, pady=5)
+        fourcc_cb = ttk.Combobox(camera_frame, values=FOURCCS, width=6)
+        fourcc_cb.set(capture_report.requested.fourcc)
+        fourcc_cb.grid(row=2, column=1, sticky="w", padx=5, pady=5)
+        
+        ttk.Label(camera_frame, text="Inference size (longest side, 0 = full):").grid(row=3, column=0, padx=5, pady=5)
+        inference_size = ttk.Entry(camera_frame, width=8)
+        inference_size.insert(0, str(self.collector.landmark_engine.inference_size or 0))
+        inference_size.grid(row=3, column=1, sticky="w", padx=5, pady=5)
+        
+        hand_tracking_var = tk.BooleanVar(value=self.collector.landmark_engine.hand_tracker is not None)
+        ttk.Checkbutton(camera_frame, text="Track hands in a region instead of detecting every frame",
+                        variable=hand_tracking_var).grid(row=4, column=0, columnspan=2, sticky="w", padx=5, pady=5)
+        
+        ttk.Label(camera_frame, text=capture_report.summary(), wraplength=450).grid(
+            row=5, column=0, columnspan=2, sticky="w", padx=5, pady=5)
+        
         def save_settings():
             # Handle username change
             new_username = username_entry.get().strip()
@@ -1188,10 +1535,55 @@ class CollectorGUI(tk.Tk):
                     self.status.config(text=f"Username changed to: {new_username}")
             
             self.initial_delay = int(initial_delay.get())
+            self.constant_frame_rate = constant_rate_var.get()
+            self.jpeg_quality = int(jpeg_quality.get())
+            self.use_cv2_encoder = cv2_encoder_var.get()
+            self.static_min_interval = float(min_interval.get())
+            self.duplicate_threshold = float(duplicate_threshold.get())
+            self.segment_seconds = float(segment_seconds.get())
+            
+            self.collector.landmark_engine.inference_size = int(inference_size.get()) or None
+            self.collector.landmark_engine.set_hand_tracking(hand_tracking_var.get())
+            
+            width, height = parse_resolution(resolution_cb.get())
+            config = CaptureConfig(width, height, float(fps_cb.get()), fourcc_cb.get().strip().upper())
+            if config != self.collector.capture_report.requested:
+                self.reconfigure_camera(config)
             settings.destroy()
             
         ttk.Button(settings, text="Save", command=save_settings).pack(pady=10)
 
+    def reconfigure_camera(self, config):
+        """Reconfigure the camera off the UI thread, device switches can take a second"""
+        if self.collection_running or self.test_recording_active:
+            # A new size or rate replaces the ring buffer the recording is reading from,
+            # so the change waits until the recording is over
+            if self.pending_capture_config is None:
+                self.after(500, self._apply_pending_capture_config)
+            self.pending_capture_config = config
+            self.status.config(text=f"Camera will switch to {config} after the current recording")
+            return
+        self.camera_reconfiguring = True
+        self.status.config(text=f"Configuring camera for {config}...")
+        
+        def configure():
+            try:
+                report = self.collector.configure_capture(config)
+                self.collector.save_capture_config(config)
+                self.after(0, lambda: self.status.config(text=report.summary()))
+            finally:
+                self.camera_reconfiguring = False
+        
+        threading.Thread(target=configure, daemon=True).start()
+
+    def _apply_pending_capture_config(self):
+        if self.collection_running or self.test_recording_active:
+            self.after(500, self._apply_pending_capture_config)
+            return
+        config, self.pending_capture_config = self.pending_capture_config, None
+        if config is not None:
+            self.reconfigure_camera(config)
+
     def export_session_stats(self):
         """Export session statistics to a file"""
         filename = filedialog.asksaveasfilename(
@@ -1200,7 +1592,10 @@ class CollectorGUI(tk.Tk):
             initialfile=f"session_stats_{time.strftime('%Y%m%d_%H%M%S')}.json"
         )
         if filename:
+            tracker = self.collector.landmark_engine.hand_tracker
             stats = {
+                'preview_ui_ms': dict(self.camera_blitter.stats),
+                'hand_tracking': dict(tracker.stats) if tracker is not None else None,
                 'duration': time.time() - self.session_stats['start_time'],
                 'completed_signs': len(self.session_stats['completed_signs']),
                 'recorded_items': self.session_stats['recorded_items'],
@@ -1242,48 +1637,85 @@ class MediaPlayer:
         self.playing = False
 
 class VideoPlayer:
-    def __init__(self, parent, path):
+    def __init__(self, parent, path, cache=None):
         self.parent = parent
         self.path = path
-        self.cap = cv2.VideoCapture(path)
+        self.cache = cache or ClipCache()
+        self.clip = None  # Frames decoded at display size, fetched from the cache on play
+        self._request = None  # Future of the clip while it is being decoded
         self.playing = False
-        self.delay = int(1000/self.cap.get(cv2.CAP_PROP_FPS))
+        self.delay = 33
         self.current_frame = 0
         self.container_width = 0
         self.container_height = 0
+        self.blitter = PhotoBlitter(parent)
+        self._after_id = None
 
     def resize(self, width, height):
-        self.container_width = width
-        self.container_height = height
+        if (width, height) != (self.container_width, self.container_height):
+            self.container_width = width
+            self.container_height = height
+            self.clip = None
+            self._request = None
+
+    def display_size(self):
+        if self.container_width > 1 and self.container_height > 1:
+            return (self.container_width, self.container_height)
+        return None
 
     def play(self):
         self.playing = True
         self._update_frame()
 
     def _update_frame(self):
-        if self.playing and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if ret:
-                img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                if self.container_width > 0 and self.container_height > 0:
-                    img = ImageOps.pad(img, (self.container_width, self.container_height), color='black')
-                self.tkimg = ImageTk.PhotoImage(image=img)
-                self.parent.config(image=self.tkimg)
-                self.parent.after(self.delay, self._update_frame)
-            else:
-                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                self._update_frame()
+        self._after_id = None
+        if not self.playing:
+            return
+        if self.clip is None:
+            # Decoding happens off the UI thread, check back until the clip is ready
+            if self._request is None:
+                self._request = self.cache.request(self.path, self.display_size())
+                if not self._request.done():
+                    self._show_placeholder()
+            if not self._request.done():
+                self._after_id = self.parent.after(30, self._update_frame)
+                return
+            try:
+                self.clip = self._request.result()
+            except IOError:
+                self.playing = False
+                return
+            finally:
+                self._request = None
+            self.delay = max(1, int(1000 / self.clip.fps))
+            self.current_frame %= len(self.clip)
+        # Looping is just wrapping the index, nothing is decoded again
+        self.blitter.show(self.clip.frames[self.current_frame])
+        self.current_frame = (self.current_frame + 1) % len(self.clip)
+        self._after_id = self.parent.after(self.delay, self._update_frame)
+
+    def _show_placeholder(self):
+        size = self.display_size()
+        if size is not None:
+            self.blitter.show(np.zeros((size[1], size[0], 3), dtype=np.uint8))
 
     def pause(self):
         self.playing = False
+        self._cancel()
 
     def resume(self):
         self.playing = True
+        self._cancel()
         self._update_frame()
 
     def stop(self):
         self.playing = False
-        self.cap.release()
+        self._cancel()
+
+    def _cancel(self):
+        if self._after_id is not None:
+            self.parent.after_cancel(self._after_id)
+            self._after_id = None
 
 
 class ImagePlayer:
@@ -1310,5 +1742,11 @@ class ImagePlayer:
         pass
 
 if __name__ == "__main__":
-    app = CollectorGUI()
+    parser = argparse.ArgumentParser(description="ArSL dataset collector")
+    parser.add_argument("--source", default="0",
+                        help="Camera index, video file, directory of videos/images or 'synthetic[:WxH]'")
+    parser.add_argument("--angle", action="append", default=[],
+                        help="Extra camera recorded alongside dynamic signs, repeat for more angles")
+    args = parser.parse_args()
+    app = CollectorGUI(source=args.source, angles=args.angle)
     app.mainloop()
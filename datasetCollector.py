@@ -1,7 +1,8 @@
 import cv2
-import mediapipe as mp
 import os
 import time
+from inference import LandmarkEngine
+from landmarks import results_to_array, landmark_path, save_landmarks
 
 class DatasetCollector:
     def __init__(self, images_per_sign=200, videos_per_sign=100, fps=30):
@@ -15,13 +16,12 @@ class DatasetCollector:
         self.videos_per_sign = videos_per_sign
         self.fps = fps
         
-        # Initialize MediaPipe solutions
-        self.mp_pose = mp.solutions.pose
-        self.mp_hands = mp.solutions.hands
-        
-        # Set up pose and hand tracking models
-        self.pose = self.mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
-        self.hands = self.mp_hands.Hands(static_image_mode=False, max_num_hands=2, min_detection_confidence=0.5)
+        # Set up pose and hand tracking models, run side by side on every frame
+        self.landmark_engine = LandmarkEngine(parallel=True, static_image_mode=False)
+        self.mp_pose = self.landmark_engine.mp_pose
+        self.mp_hands = self.landmark_engine.mp_hands
+        self.pose = self.landmark_engine.pose
+        self.hands = self.landmark_engine.hands
         
         # Directory setup
         self.data_dir = "ArSL_Dataset"
@@ -36,6 +36,7 @@ class DatasetCollector:
         self.recording_in_progress = False
         self.current_frame = None
         self.current_recording = None
+        self.last_landmarks = None  # (landmarks, mask) of the last processed frame
 
     def _create_directories(self):
         """Create all required folders if they don't exist"""
@@ -64,18 +65,10 @@ class DatasetCollector:
         # Convert to RGB for MediaPipe processing
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         
-        # Detect and draw pose landmarks
-        pose_results = self.pose.process(frame_rgb)
-        if pose_results.pose_landmarks:
-            mp.solutions.drawing_utils.draw_landmarks(
-                frame, pose_results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
-        
-        # Detect and draw hand landmarks
-        hand_results = self.hands.process(frame_rgb)
-        if hand_results.multi_hand_landmarks:
-            for landmarks in hand_results.multi_hand_landmarks:
-                mp.solutions.drawing_utils.draw_landmarks(
-                    frame, landmarks, self.mp_hands.HAND_CONNECTIONS)
+        # Detect and draw pose and hand landmarks
+        pose_results, hand_results = self.landmark_engine.process(frame_rgb)
+        self.last_landmarks = results_to_array(pose_results, hand_results)
+        self.landmark_engine.draw(frame, pose_results, hand_results)
         
         return frame
 
@@ -110,6 +103,8 @@ class DatasetCollector:
                 if key == ord('s'):
                     img_path = os.path.join(word_dir, f"Image_{image_count}.jpg")
                     cv2.imwrite(img_path, enhanced_frame)  # Modified: Save enhanced frame
+                    landmarks, mask = self.last_landmarks
+                    save_landmarks(landmark_path(img_path), landmarks[None], mask[None])
                     print(f"Saved: {img_path}")
                     image_count += 1
                 elif key == ord('q'):
@@ -136,6 +131,7 @@ class DatasetCollector:
                 print(f"Press 'r' to start recording {word} video {video_count+1}. Press 's' to stop.")
                 recording = False
                 out = None  # Video writer initialized only when recording starts
+                clip_landmarks, clip_masks = [], []  # One entry per written frame
                 
                 while True:
                     ret, frame = cap.read()
@@ -166,6 +162,7 @@ class DatasetCollector:
                         # Stop recording
                         recording = False
                         out.release()
+                        save_landmarks(landmark_path(video_path), clip_landmarks, clip_masks)
                         print(f"Saved: {video_path}")
                         video_count += 1
                         break
@@ -179,6 +176,8 @@ class DatasetCollector:
                     # Write enhanced frame if recording
                     if recording:
                         out.write(enhanced_frame)  # Write enhanced frame
+                        clip_landmarks.append(self.last_landmarks[0])
+                        clip_masks.append(self.last_landmarks[1])
 
         cap.release()
         cv2.destroyAllWindows()
@@ -0,0 +1,285 @@
+# Packs ArSL_Dataset into large tar shards for training
+# Reading millions of small files over NFS is dominated by per-file opens, so
+# every image or video is stored, together with its landmark .npz and capture
+# sidecar, in WebDataset-style tar shards ("<key>.<ext>" members, one key per
+# sample). An SQLite index records sign, user, kind and the byte range of every
+# member. Packing again only appends new or changed files as new shards;
+# existing shards are never rewritten.
+
+import argparse
+import os
+import queue
+import sqlite3
+import tarfile
+import threading
+import time
+
+from capture_config import capture_sidecar_path
+from catalog import find_media
+from landmarks import landmark_path
+
+INDEX_NAME = "index.sqlite"
+SHARD_PATTERN = "shard-{:06d}.tar"
+DEFAULT_SHARD_SIZE = 1024 * 1024 * 1024
+READ_BUFFER = 8 * 1024 * 1024
+
+
+def sample_key(relative_path):
+    """Images/<sign>/<user>/<sign>_3.jpg -> Images/<sign>/<user>/<sign>_3"""
+    return os.path.splitext(relative_path.replace(os.sep, "/"))[0]
+
+
+def sample_files(media_path):
+    """(extension, path) of the media file and the side files stored with it"""
+    files = [(os.path.splitext(media_path)[1].lstrip('.').lower(), media_path)]
+    for ext, path in (("npz", landmark_path(media_path)), ("capture.json", capture_sidecar_path(media_path))):
+        if os.path.exists(path):
+            files.append((ext, path))
+    return files
+
+
+def open_index(shard_dir):
+    db = sqlite3.connect(os.path.join(shard_dir, INDEX_NAME))
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS members (
+            source TEXT PRIMARY KEY,
+            key TEXT NOT NULL,
+            ext TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            sign TEXT NOT NULL,
+            user TEXT NOT NULL,
+            shard TEXT NOT NULL,
+            data_offset INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL
+        )""")
+    db.execute("CREATE INDEX IF NOT EXISTS members_by_sample ON members (kind, sign, user)")
+    db.execute("CREATE INDEX IF NOT EXISTS members_by_position ON members (shard, data_offset)")
+    db.commit()
+    return db
+
+
+class ShardPacker:
+    def __init__(self, data_dir, shard_dir, shard_size=DEFAULT_SHARD_SIZE):
+        self.data_dir = data_dir
+        self.shard_dir = shard_dir
+        self.shard_size = shard_size
+        os.makedirs(shard_dir, exist_ok=True)
+        self.db = open_index(shard_dir)
+        self.stats = {'samples': 0, 'members': 0, 'bytes': 0, 'shards': 0, 'unchanged': 0, 'removed': 0}
+        self._tar = None
+        self._shard_name = None
+        self._rows = []  # Index rows of the shard being written
+        existing = [f for f in os.listdir(shard_dir) if f.startswith("shard-") and f.endswith(".tar")]
+        self._next_shard = 1 + max((int(f[6:-4]) for f in existing), default=-1)
+
+    def pack(self):
+        """Append every new or modified sample under data_dir, returns the stats"""
+        known = {}  # key -> {source: mtime_ns}
+        for key, source, mtime_ns in self.db.execute("SELECT key, source, mtime_ns FROM members"):
+            known.setdefault(key, {})[source] = mtime_ns
+        seen = set()
+        try:
+            for kind, media_path in find_media(self.data_dir):
+                relative = os.path.relpath(media_path, self.data_dir)
+                parts = relative.split(os.sep)
+                sign, user = parts[1], parts[2]
+                key = sample_key(relative)
+                seen.add(key)
+                files = sample_files(media_path)
+                current = {os.path.relpath(path, self.data_dir): os.stat(path).st_mtime_ns for _, path in files}
+                # A side file that was added or deleted changes the sample as well
+                if known.get(key) == current:
+                    self.stats['unchanged'] += 1
+                    continue
+                self._add_sample(key, kind, sign, user, files)
+        finally:
+            self._close_shard()
+        # Samples whose media file is gone; their bytes stay in the old shards unreferenced
+        removed = [(key,) for key in known if key not in seen]
+        self.db.executemany("DELETE FROM members WHERE key=?", removed)
+        self.db.commit()
+        self.stats['removed'] = len(removed)
+        return self.stats
+
+    def _add_sample(self, key, kind, sign, user, files):
+        if self._tar is None or self._tar.fileobj.tell() >= self.shard_size:
+            self._close_shard()
+            self._open_shard()
+        for ext, path in files:
+            info = self._tar.gettarinfo(path, arcname=f"{key}.{ext}")
+            with open(path, 'rb') as f:
+                self._tar.addfile(info, f)
+            # tarfile only fills in offset_data when reading; the data ends the archive
+            # written so far, padded to whole blocks, and the headers come before it
+            data_offset = self._tar.offset - -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+            source = os.path.relpath(path, self.data_dir)
+            self._rows.append((source, key, ext, kind, sign, user, self._shard_name,
+                               data_offset, info.size, os.stat(path).st_mtime_ns))
+            self.stats['members'] += 1
+            self.stats['bytes'] += info.size
+        self.stats['samples'] += 1
+
+    def _open_shard(self):
+        self._shard_name = SHARD_PATTERN.format(self._next_shard)
+        self._next_shard += 1
+        # Written under a temporary name, readers only ever see complete shards
+        self._tar = tarfile.open(os.path.join(self.shard_dir, self._shard_name + ".tmp"), 'w',
+                                 format=tarfile.PAX_FORMAT)
+
+    def _close_shard(self):
+        if self._tar is None:
+            return
+        self._tar.close()
+        tmp_path = os.path.join(self.shard_dir, self._shard_name + ".tmp")
+        os.replace(tmp_path, os.path.join(self.shard_dir, self._shard_name))
+        # Index rows only after the shard is in place; a re-packed sample replaces all its
+        # old rows, so side files that were deleted since do not linger in older shards
+        self.db.executemany("DELETE FROM members WHERE key=?", {(row[1],) for row in self._rows})
+        self.db.executemany("INSERT OR REPLACE INTO members VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._rows)
+        self.db.commit()
+        self.stats['shards'] += 1
+        self._rows = []
+        self._tar = None
+
+    def close(self):
+        self._close_shard()
+        self.db.close()
+
+
+class ShardReader:
+    """
+    Yields samples as {"key", "kind", "sign", "user", "<ext>": bytes, ...} in shard
+    order. A background thread reads ahead through large buffered sequential reads.
+    """
+
+    def __init__(self, shard_dir, kind=None, sign=None, user=None, prefetch=64):
+        self.shard_dir = shard_dir
+        self.filters = {'kind': kind, 'sign': sign, 'user': user}
+        self.prefetch = prefetch
+
+    def __len__(self):
+        query, params = self._query("SELECT COUNT(DISTINCT key) FROM members")
+        db = sqlite3.connect(os.path.join(self.shard_dir, INDEX_NAME))
+        try:
+            return db.execute(query, params).fetchone()[0]
+        finally:
+            db.close()
+
+    def _query(self, select):
+        conditions, params = [], []
+        for column, value in self.filters.items():
+            if value is not None:
+                conditions.append(f"{column}=?")
+                params.append(value)
+        if conditions:
+            select += " WHERE " + " AND ".join(conditions)
+        return select, params
+
+    def _members(self):
+        query, params = self._query("SELECT key, ext, kind, sign, user, shard, data_offset, size FROM members")
+        db = sqlite3.connect(os.path.join(self.shard_dir, INDEX_NAME))
+        try:
+            return db.execute(query + " ORDER BY shard, data_offset", params).fetchall()
+        finally:
+            db.close()
+
+    def _read_all(self, out, stop):
+        current, handle = None, None
+        sample = None
+        try:
+            for key, ext, kind, sign, user, shard, offset, size in self._members():
+                if shard != current:
+                    if handle is not None:
+                        handle.close()
+                    handle = open(os.path.join(self.shard_dir, shard), 'rb', buffering=READ_BUFFER)
+                    if hasattr(os, "posix_fadvise"):
+                        os.posix_fadvise(handle.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    current = shard
+                if sample is not None and sample['key'] != key:
+                    out.put(sample)
+                    sample = None
+                if sample is None:
+                    sample = {'key': key, 'kind': kind, 'sign': sign, 'user': user}
+                if handle.tell() != offset:
+                    handle.seek(offset)
+                sample[ext] = handle.read(size)
+                if stop.is_set():
+                    return
+            if sample is not None:
+                out.put(sample)
+        finally:
+            if handle is not None:
+                handle.close()
+            out.put(None)
+
+    def __iter__(self):
+        out = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._read_all, args=(out, stop), daemon=True)
+        thread.start()
+        try:
+            while True:
+                sample = out.get()
+                if sample is None:
+                    break
+                yield sample
+        finally:
+            stop.set()
+            # Unblock the reader if it is waiting on a full queue
+            while thread.is_alive():
+                try:
+                    out.get_nowait()
+                except queue.Empty:
+                    thread.join(timeout=0.05)
+
+
+def read_tree(data_dir):
+    """The baseline loader: walk the directories and open every file"""
+    for kind, media_path in find_media(data_dir):
+        sample = {'kind': kind}
+        for ext, path in sample_files(media_path):
+            with open(path, 'rb') as f:
+                sample[ext] = f.read()
+        yield sample
+
+
+def time_loader(samples):
+    start = time.perf_counter()
+    count = total = 0
+    for sample in samples:
+        count += 1
+        total += sum(len(v) for v in sample.values() if isinstance(v, bytes))
+    elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed else 0.0, total / elapsed / 1e6 if elapsed else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack ArSL_Dataset into tar shards and benchmark loading")
+    parser.add_argument("command", choices=["pack", "bench"])
+    parser.add_argument("data_dir", nargs="?", default="ArSL_Dataset", help="Dataset root (default: ArSL_Dataset)")
+    parser.add_argument("--output", default="ArSL_Shards", help="Shard directory (default: ArSL_Shards)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE // (1024 * 1024),
+                        help="Target shard size in MB")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        start = time.time()
+        packer = ShardPacker(args.data_dir, args.output, args.shard_size * 1024 * 1024)
+        stats = packer.pack()
+        packer.close()
+        print(f"Packed {stats['samples']} samples ({stats['members']} files, {stats['bytes'] / 1e6:.1f} MB) "
+              f"into {stats['shards']} new shards in {time.time() - start:.1f}s, "
+              f"{stats['unchanged']} samples already packed, {stats['removed']} removed")
+    else:
+        # Run on a cold cache (e.g. freshly mounted NFS) for numbers that mean something
+        tree_rate, tree_mb = time_loader(read_tree(args.data_dir))
+        shard_rate, shard_mb = time_loader(ShardReader(args.output))
+        print(f"directory walk: {tree_rate:8.1f} samples/s  {tree_mb:7.1f} MB/s")
+        print(f"shard reader:   {shard_rate:8.1f} samples/s  {shard_mb:7.1f} MB/s")
+        if tree_rate:
+            print(f"speedup: {shard_rate / tree_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Offline landmark extraction over an existing ArSL_Dataset tree
+# Walks ArSL_Dataset/Images/<sign>/<user> and ArSL_Dataset/Videos/<sign>/<user>
+# and writes the same .npz landmark files the collector saves while recording.
+# Files whose landmarks are already newer than the media are skipped, so an
+# interrupted run can simply be started again.
+
+import argparse
+import numpy as np
+import os
+import time
+
+from catalog import find_media
+from landmarks import landmark_path, save_landmarks
+from parallel_inference import ProcessPoolLandmarkEngine
+
+
+def output_path(media_path, data_dir, output_dir=None):
+    """Landmark file for a media file, next to it or mirrored under output_dir"""
+    if output_dir is None:
+        return landmark_path(media_path)
+    relative = os.path.relpath(media_path, data_dir)
+    return landmark_path(os.path.join(output_dir, relative))
+
+
+def is_up_to_date(media_path, out_path):
+    return (os.path.exists(out_path) and
+            os.path.getmtime(out_path) >= os.path.getmtime(media_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract pose/hand landmarks for an ArSL_Dataset tree")
+    parser.add_argument("data_dir", nargs="?", default="ArSL_Dataset", help="Dataset root (default: ArSL_Dataset)")
+    parser.add_argument("--output-dir", help="Write landmark files here instead of next to the media")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Re-extract files that are already up to date")
+    args = parser.parse_args()
+
+    jobs = []
+    skipped = 0
+    for kind, media_path in find_media(args.data_dir):
+        out_path = output_path(media_path, args.data_dir, args.output_dir)
+        if not args.force and is_up_to_date(media_path, out_path):
+            skipped += 1
+            continue
+        jobs.append((kind, media_path, out_path))
+    print(f"{len(jobs)} files to process, {skipped} already up to date")
+    if not jobs:
+        return
+
+    start = time.time()
+    done = failed = frames = 0
+    outputs = {media_path: out_path for _, media_path, out_path in jobs}
+    # Images are independent of each other, videos use tracking like the live collector
+    with ProcessPoolLandmarkEngine(workers=args.workers, static_image_mode=True) as pool:
+        for (kind, media_path), result, error in pool.map_files((kind, path) for kind, path, _ in jobs):
+            if error is not None:
+                failed += 1
+                print(f"Failed: {error}")
+            else:
+                landmarks, mask, timestamps = result
+                out_path = outputs[media_path]
+                os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                # Recorded frames are already mirrored, so no flip here; every frame was processed
+                save_landmarks(out_path, landmarks, mask, timestamps, np.zeros(len(timestamps)))
+                frames += len(timestamps)
+                done += 1
+            elapsed = time.time() - start
+            if (done + failed) % 50 == 0 or done + failed == len(jobs):
+                print(f"{done + failed}/{len(jobs)} files, {(done + failed) / elapsed:.1f} files/s, "
+                      f"{frames / elapsed:.1f} frames/s")
+
+    elapsed = time.time() - start
+    print(f"Done: {done} extracted, {failed} failed in {elapsed:.1f}s "
+          f"({done / elapsed:.1f} files/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# Fixed-capacity frame store shared between the capture thread and the recorders
+# All frames live in one preallocated uint8 array, so memory is fixed for the whole
+# session and nothing is allocated per captured frame. Buffers are sized in seconds
+# but capped by a byte budget, so high resolutions and rates cannot preallocate gigabytes.
+
+import numpy as np
+import threading
+
+MAX_BUFFER_BYTES = 512 * 1024 * 1024  # Cap on one ring buffer, 1080p60 for 4 seconds would be about 1.5 GB
+MIN_BUFFER_FRAMES = 16
+
+
+def buffer_capacity(seconds, interval, frame_shape, max_bytes=MAX_BUFFER_BYTES, dtype=np.uint8):
+    """Frames needed to hold `seconds` at one frame per `interval`, limited to `max_bytes` of frame data"""
+    frame_bytes = int(np.prod(frame_shape)) * np.dtype(dtype).itemsize
+    capacity = int(seconds / interval)
+    if max_bytes:
+        capacity = min(capacity, max(MIN_BUFFER_FRAMES, max_bytes // frame_bytes))
+    return max(1, capacity)
+
+
+class FrameRingBuffer:
+    def __init__(self, capacity, frame_shape, dtype=np.uint8):
+        self.capacity = int(capacity)
+        self.frame_shape = tuple(frame_shape)
+        self.frames = np.empty((self.capacity,) + self.frame_shape, dtype=dtype)
+        self.timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self._head = 0  # Sequence number of the next frame to be written
+        self._cond = threading.Condition()
+
+    @property
+    def head(self):
+        """Sequence number the next committed frame will get"""
+        return self._head
+
+    @property
+    def oldest(self):
+        """Oldest sequence number still held in the buffer"""
+        return max(0, self._head - self.capacity)
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes + self.timestamps.nbytes
+
+    def acquire(self):
+        """
+        Return the slot the next frame goes into, for writing in place
+        (e.g. cv2.flip(frame, 1, dst=slot)). The frame becomes visible on commit().
+        """
+        return self.frames[self._head % self.capacity]
+
+    def commit(self, timestamp):
+        """Publish the frame written into the acquired slot, returns its sequence number"""
+        with self._cond:
+            seq = self._head
+            self.timestamps[seq % self.capacity] = timestamp
+            self._head = seq + 1
+            self._cond.notify_all()
+        return seq
+
+    def write(self, frame, timestamp):
+        """Copy a frame into the next slot and publish it"""
+        np.copyto(self.acquire(), frame)
+        return self.commit(timestamp)
+
+    def get(self, seq):
+        """
+        Return (frame, timestamp) for a sequence number, or None if it was overwritten
+        or not captured yet. The frame is a view into the buffer, copy it if it has to
+        outlive the next `capacity` captured frames.
+        """
+        if seq < self.oldest or seq >= self._head:
+            return None
+        slot = seq % self.capacity
+        return self.frames[slot], self.timestamps[slot]
+
+    def wait_for(self, seq, timeout=None):
+        """Block until frame `seq` has been committed, returns False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._head > seq, timeout)
+
+    def frames_between(self, start_seq, end_seq):
+        """
+        Yield (seq, frame, timestamp) for every frame in [start_seq, end_seq) that is
+        still in the buffer. Frames that were overwritten are skipped.
+        """
+        for seq in range(max(start_seq, self.oldest), min(end_seq, self._head)):
+            item = self.get(seq)
+            if item is not None:
+                yield seq, item[0], item[1]
+
+    def first_seq_since(self, timestamp):
+        """Sequence number of the first frame captured at or after `timestamp`, head if none yet"""
+        seq = self._head
+        while seq > self.oldest:
+            item = self.get(seq - 1)
+            if item is None or item[1] < timestamp:
+                break
+            seq -= 1
+        return seq
+
+    def measured_fps(self, window=30):
+        """Capture rate over the last `window` frames, or None if there are too few"""
+        last = self._head - 1
+        first = max(self.oldest, last - window + 1)
+        if last - first < 2:
+            return None
+        elapsed = self.timestamps[last % self.capacity] - self.timestamps[first % self.capacity]
+        return (last - first) / elapsed if elapsed > 0 else None
+
+    def matches(self, frame_shape):
+        return self.frame_shape == tuple(frame_shape)
+
+
+class FrameThrottle:
+    """
+    Limits captured frames to `fps` on a deadline that advances by one interval per
+    kept frame. A frame up to `tolerance` intervals early is still kept, so a source
+    that already delivers at the target rate keeps every frame despite jitter, while a
+    faster source is thinned out to the target rate on average.
+    """
+
+    def __init__(self, fps=30, tolerance=0.4):
+        self.interval = 1.0 / fps
+        self.tolerance = tolerance
+        self.frames_dropped = 0
+        self._next_due = None
+
+    def set_fps(self, fps):
+        self.interval = 1.0 / fps
+        self._next_due = None
+
+    def accept(self, timestamp):
+        """True if the frame captured at `timestamp` should be kept"""
+        due = self._next_due
+        if due is not None and timestamp < due - self.tolerance * self.interval:
+            self.frames_dropped += 1
+            return False
+        if due is None:
+            due = timestamp
+        # A slow or stalled source leaves the deadline behind; let it lag at most one
+        # interval so jitter never makes the next frame look early, and a stall is
+        # followed by at most one extra frame instead of a burst
+        due = max(due, timestamp - self.interval)
+        self._next_due = due + self.interval
+        return True
@@ -0,0 +1,271 @@
+# Frame sources for the dataset collector
+# Every source mimics the small part of the cv2.VideoCapture interface that the
+# collector uses (isOpened/read/get/set/release), so camera_loop runs unchanged
+# whether frames come from a webcam, a recorded clip, a folder of images or a generator.
+
+import cv2
+import numpy as np
+import os
+import time
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FrameSource:
+    """Base class for everything camera_loop can read frames from"""
+
+    def __init__(self, fps=30, realtime=True):
+        self.fps = fps
+        self.realtime = realtime  # Pace reads like a real camera would
+        self.frames_read = 0
+        self._opened = True
+        self._next_read_time = None
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self):
+        if not self._opened:
+            return False, None
+        self._wait_for_next_frame()
+        frame = self._read_frame()
+        if frame is None:
+            return False, None
+        self.frames_read += 1
+        return True, frame
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_size()[0])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_size()[1])
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FPS and value > 0:
+            self.fps = value
+            return True
+        return False
+
+    def release(self):
+        self._opened = False
+
+    def frame_size(self):
+        """Return (width, height) of the frames this source produces"""
+        raise NotImplementedError
+
+    def _read_frame(self):
+        """Return the next BGR frame, or None when the source is exhausted"""
+        raise NotImplementedError
+
+    def _wait_for_next_frame(self):
+        if not self.realtime or self.fps <= 0:
+            return
+        now = time.monotonic()
+        if self._next_read_time is None:
+            self._next_read_time = now
+        elif now < self._next_read_time:
+            time.sleep(self._next_read_time - now)
+        # Never try to catch up on frames we were too slow to read, like a camera
+        self._next_read_time = max(self._next_read_time, now) + 1.0 / self.fps
+
+
+class CameraSource(FrameSource):
+    """Live camera device, a thin wrapper over cv2.VideoCapture"""
+
+    def __init__(self, index=0):
+        self.cap = cv2.VideoCapture(index)
+        super().__init__(fps=self.cap.get(cv2.CAP_PROP_FPS) or 30, realtime=False)
+        self.index = index
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret:
+            self.frames_read += 1
+        return ret, frame
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def release(self):
+        self.cap.release()
+
+    def frame_size(self):
+        return (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+
+class VideoFileSource(FrameSource):
+    """Plays one or more video files back to back, optionally looping forever"""
+
+    def __init__(self, paths, loop=True, realtime=True, fps=None):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.paths = list(paths)
+        if not self.paths:
+            raise ValueError("VideoFileSource needs at least one video file")
+        self.loop = loop
+        self.cap = None
+        self.current = -1
+        self._size = None
+        self._open_next()
+        file_fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap is not None else 0
+        super().__init__(fps=fps or file_fps or 30, realtime=realtime)
+
+    def _open_next(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        for _ in range(len(self.paths)):
+            self.current += 1
+            if self.current >= len(self.paths):
+                if not self.loop:
+                    return False
+                self.current = 0
+            cap = cv2.VideoCapture(self.paths[self.current])
+            if cap.isOpened():
+                self.cap = cap
+                if self._size is None:
+                    self._size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                                  int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+                return True
+            cap.release()
+        return False
+
+    def _read_frame(self):
+        while self.cap is not None:
+            ret, frame = self.cap.read()
+            if ret:
+                # Keep one frame size for the whole playlist, like a real camera
+                if (frame.shape[1], frame.shape[0]) != self._size:
+                    frame = cv2.resize(frame, self._size)
+                return frame
+            if not self._open_next():
+                break
+        self._opened = False
+        return None
+
+    def release(self):
+        super().release()
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def frame_size(self):
+        return self._size or (0, 0)
+
+
+class ImageDirectorySource(FrameSource):
+    """Serves the images of a directory in name order as a frame stream"""
+
+    def __init__(self, directory, loop=True, realtime=True, fps=30):
+        super().__init__(fps=fps, realtime=realtime)
+        self.paths = sorted(
+            os.path.join(directory, f) for f in os.listdir(directory)
+            if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS)
+        if not self.paths:
+            raise ValueError(f"No images found in {directory}")
+        self.loop = loop
+        self.position = 0
+        first = cv2.imread(self.paths[0])
+        if first is None:
+            raise ValueError(f"Could not read image {self.paths[0]}")
+        self._size = (first.shape[1], first.shape[0])
+
+    def _read_frame(self):
+        while True:
+            if self.position >= len(self.paths):
+                if not self.loop:
+                    self._opened = False
+                    return None
+                self.position = 0
+            path = self.paths[self.position]
+            self.position += 1
+            frame = cv2.imread(path)
+            if frame is None:
+                continue
+            if (frame.shape[1], frame.shape[0]) != self._size:
+                frame = cv2.resize(frame, self._size)
+            return frame
+
+    def frame_size(self):
+        return self._size
+
+
+class SyntheticSource(FrameSource):
+    """Generates moving test frames, useful for benchmarks and machines without media"""
+
+    def __init__(self, width=640, height=480, fps=30, realtime=True, max_frames=None):
+        super().__init__(fps=fps, realtime=realtime)
+        self.width = width
+        self.height = height
+        self.max_frames = max_frames
+        self._make_background()
+
+    def _make_background(self):
+        # Static gradient background, the moving square is drawn per frame
+        gradient = np.linspace(0, 255, self.width, dtype=np.uint8)
+        self._background = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self._background[:] = gradient[None, :, None]
+
+    def set(self, prop, value):
+        # Any size can be generated, so size requests are always granted
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT) and value > 0:
+            if prop == cv2.CAP_PROP_FRAME_WIDTH:
+                self.width = int(value)
+            else:
+                self.height = int(value)
+            self._make_background()
+            return True
+        return super().set(prop, value)
+
+    def _read_frame(self):
+        if self.max_frames is not None and self.frames_read >= self.max_frames:
+            self._opened = False
+            return None
+        frame = self._background.copy()
+        side = max(8, min(self.width, self.height) // 6)
+        x = (self.frames_read * 7) % max(1, self.width - side)
+        y = (self.frames_read * 5) % max(1, self.height - side)
+        cv2.rectangle(frame, (x, y), (x + side, y + side), (0, 0, 255), -1)
+        cv2.putText(frame, str(self.frames_read), (10, self.height - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        return frame
+
+    def frame_size(self):
+        return (self.width, self.height)
+
+
+def open_source(spec=0, loop=True, realtime=True):
+    """
+    Build a frame source from a command line style description:
+    a camera index ("0"), a video file, a directory of videos or images,
+    or "synthetic" / "synthetic:1280x720" for generated frames
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CameraSource(int(spec))
+    if spec.startswith("synthetic"):
+        width, height = 640, 480
+        if ':' in spec:
+            width, height = (int(v) for v in spec.split(':', 1)[1].lower().split('x'))
+        return SyntheticSource(width, height, realtime=realtime)
+    if os.path.isdir(spec):
+        videos = sorted(os.path.join(spec, f) for f in os.listdir(spec)
+                        if os.path.splitext(f)[1].lower() in VIDEO_EXTENSIONS)
+        if videos:
+            return VideoFileSource(videos, loop=loop, realtime=realtime)
+        return ImageDirectorySource(spec, loop=loop, realtime=realtime)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, loop=loop, realtime=realtime)
+    raise ValueError(f"Unknown frame source: {spec}")
@@ -0,0 +1,86 @@
+# Background JPEG writer for static sign capture
+# Encoding and disk writes run on a small pool of worker threads behind a bounded
+# queue, so the capture loop only pays for handing the frame over.
+
+import cv2
+import queue
+import threading
+import time
+from PIL import Image
+
+_STOP = object()
+
+
+class AsyncImageWriter:
+    def __init__(self, workers=2, max_queue=64, quality=75, use_cv2=True, on_written=None):
+        self.quality = quality
+        self.use_cv2 = use_cv2  # Encode with cv2.imencode instead of the PIL round-trip
+        self.on_written = on_written  # Called with the path from a worker thread after every write
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.stats = {
+            'submitted': 0,
+            'written': 0,
+            'dropped': 0,  # Queue was full, frame not saved
+            'failed': 0,
+            'last_error': None,  # Message of the most recent failed write
+            'write_seconds': 0.0,
+        }
+        self._lock = threading.Lock()
+        self._workers = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, path, frame, copy=True):
+        """
+        Queue a BGR frame to be saved as JPEG, returns False if the queue is full.
+        Frames are copied by default because capture reuses its buffers.
+        """
+        try:
+            self.queue.put_nowait((path, frame.copy() if copy else frame))
+        except queue.Full:
+            with self._lock:
+                self.stats['dropped'] += 1
+            return False
+        with self._lock:
+            self.stats['submitted'] += 1
+        return True
+
+    def close(self):
+        """Wait for every queued image to be written and stop the workers"""
+        for _ in self._workers:
+            self.queue.put(_STOP)
+        for worker in self._workers:
+            worker.join()
+        return self.stats
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            path, frame = item
+            start = time.monotonic()
+            try:
+                self._write(path, frame)
+            except (IOError, OSError, ValueError) as e:
+                with self._lock:
+                    self.stats['failed'] += 1
+                    self.stats['last_error'] = f"{path}: {e}"
+                continue
+            with self._lock:
+                self.stats['written'] += 1
+                self.stats['write_seconds'] += time.monotonic() - start
+            if self.on_written:
+                self.on_written(path)
+
+    def _write(self, path, frame):
+        if self.use_cv2:
+            # imencode + a plain file write also handles the Arabic sign names on Windows
+            ok, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                raise ValueError("JPEG encoding failed")
+            with open(path, 'wb') as f:
+                f.write(data.tobytes())
+        else:
+            img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            img.save(path, quality=self.quality)
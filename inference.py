@@ -0,0 +1,422 @@
+# Landmark inference shared by the collectors
+# Pose and hands are two independent MediaPipe graphs that release the GIL while
+# they run, so running them side by side brings per-frame latency close to the
+# slower of the two instead of their sum.
+# Both models work on small inputs, so frames can be downsampled once to an
+# inference size. Landmarks come back normalized to the image, which makes them
+# valid for the full-resolution frame without any rescaling.
+# In hand tracking mode the hand model runs on a crop around where the hands are
+# expected and the full-frame detector only runs when the crop loses a hand.
+# Each frame goes through one of the two hand graphs, never both.
+
+import argparse
+import cv2
+import mediapipe as mp
+import numpy as np
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from capture_pipeline import run_stage
+
+DEFAULT_BENCHMARK_DIR = os.path.join("signs_directory", "dynamic")
+
+# Pose landmarks around each hand: wrist, pinky, index and thumb
+POSE_HAND_POINTS = ((15, 17, 19, 21), (16, 18, 20, 22))
+
+
+class HandRoiTracker:
+    """
+    Predicts a region holding the hands from the previous hand landmarks and the
+    latest pose wrists and runs the hand model on that crop only. When the pose
+    shows a hand the last result did not have, the frame goes straight to the
+    full-frame detector. When the crop finds fewer hands than expected, or with
+    low confidence, its result is kept for that frame and the next frame is run
+    through the full-frame detector, so no frame pays for both graphs.
+
+    In video mode a hands graph runs its palm detector on every frame where it tracks
+    fewer than `max_num_hands` hands, whatever the input size. The crop therefore
+    goes through a graph built for exactly the number of hands expected in it, so
+    once those are tracked the crop skips palm detection. `stats['palm_detections']`
+    counts the frames on which a graph had to run its detector.
+    """
+
+    def __init__(self, full_hands, make_roi_hands, min_confidence=0.5, padding=0.5, min_size=0.2,
+                 max_area=0.6, redetect_interval=90, full_max_hands=2):
+        self.full_hands = full_hands
+        self.full_max_hands = full_max_hands
+        self.make_roi_hands = make_roi_hands  # make_roi_hands(max_num_hands) -> hands graph for the crop
+        self.roi_graphs = {}  # max_num_hands -> graph, created on first use
+        self.min_confidence = min_confidence
+        self.padding = padding  # Margin around the predicted hand points, relative to the box size
+        self.min_size = min_size  # Smallest crop side, relative to the shorter frame side
+        self.max_area = max_area  # Crops covering more of the frame than this are not worth it
+        self.redetect_interval = redetect_interval  # Run a full detection at least this often
+        self.stats = {'full_detections': 0, 'roi_hits': 0, 'roi_misses': 0, 'palm_detections': 0}
+        self._tracked = {}  # Graph -> hands it tracked on its last frame
+        self._hand_points = []  # Normalized (x, y) of the last hand landmarks
+        self._hand_count = 0
+        self._pose_points = []
+        self._pose_hands = 0
+        self._roi = None
+        self._since_full = 0
+        self._missed = False  # The crop lost a hand on the previous frame
+
+    @property
+    def hit_rate(self):
+        """Share of frames where the crop found every expected hand"""
+        total = self.stats['full_detections'] + self.stats['roi_hits'] + self.stats['roi_misses']
+        return self.stats['roi_hits'] / total if total else 0.0
+
+    def observe_pose(self, pose_results):
+        """Remember the hand points of the latest pose result for the next prediction"""
+        self._pose_points = []
+        self._pose_hands = 0
+        if not pose_results.pose_landmarks:
+            return
+        landmarks = pose_results.pose_landmarks.landmark
+        for indices in POSE_HAND_POINTS:
+            wrist = landmarks[indices[0]]
+            if wrist.visibility < 0.5 or not (0 <= wrist.x <= 1 and 0 <= wrist.y <= 1):
+                continue
+            self._pose_hands += 1
+            self._pose_points.extend((landmarks[i].x, landmarks[i].y) for i in indices)
+
+    def process(self, rgb):
+        height, width = rgb.shape[:2]
+        roi = self._predict_roi(width, height)
+        # A hand the crop has not been tracking would be missed, detect it on the full frame
+        expect_miss = self._missed or self._pose_hands > self._hand_count
+        if roi is not None and not expect_miss and self._since_full < self.redetect_interval:
+            x0, y0, x1, y1 = roi
+            expected = min(2, max(1, self._hand_count, self._pose_hands))
+            graph = self.roi_graphs.get(expected)
+            if graph is None:
+                graph = self.roi_graphs[expected] = self.make_roi_hands(expected)
+            results = self._run(graph, expected, np.ascontiguousarray(rgb[y0:y1, x0:x1]))
+            self._remap(results, roi, width, height)
+            self._since_full += 1
+            if self._accept(results):
+                self.stats['roi_hits'] += 1
+                self._remember(results)
+            else:
+                # Keep what the crop found and re-detect on the next frame instead of running
+                # the full-frame graph on this one as well
+                self.stats['roi_misses'] += 1
+                self._missed = True
+            return results
+        self._missed = False
+        results = self._run(self.full_hands, self.full_max_hands, rgb)
+        self.stats['full_detections'] += 1
+        self._since_full = 0
+        self._roi = None
+        self._remember(results)
+        return results
+
+    def _run(self, graph, max_hands, rgb):
+        # Fewer tracked hands than the graph allows means it runs palm detection on this frame
+        if self._tracked.get(graph, 0) < max_hands:
+            self.stats['palm_detections'] += 1
+        results = graph.process(rgb)
+        self._tracked[graph] = len(results.multi_hand_landmarks or [])
+        return results
+
+    def _predict_roi(self, width, height):
+        points = self._hand_points + self._pose_points
+        if not points:
+            return None
+        xs = [min(max(x, 0.0), 1.0) * width for x, _ in points]
+        ys = [min(max(y, 0.0), 1.0) * height for _, y in points]
+        side = max(max(xs) - min(xs), max(ys) - min(ys))
+        side = max(side * (1 + 2 * self.padding), self.min_size * min(width, height))
+        cx, cy = (max(xs) + min(xs)) / 2, (max(ys) + min(ys)) / 2
+        x0, y0 = int(max(0, cx - side / 2)), int(max(0, cy - side / 2))
+        x1, y1 = int(min(width, cx + side / 2)), int(min(height, cy + side / 2))
+        if (x1 - x0) * (y1 - y0) > self.max_area * width * height:
+            return None
+        # Keep the previous crop while the hands stay inside it, which lets the
+        # hand model keep tracking instead of re-detecting in a shifted image
+        if self._roi is not None:
+            px0, py0, px1, py1 = self._roi
+            if px0 <= x0 and py0 <= y0 and x1 <= px1 and y1 <= py1:
+                return self._roi
+        self._roi = (x0, y0, x1, y1)
+        return self._roi
+
+    def _accept(self, results):
+        hands = results.multi_hand_landmarks or []
+        if len(hands) < max(self._hand_count, self._pose_hands):
+            return False
+        for handedness in results.multi_handedness or []:
+            if handedness.classification[0].score < self.min_confidence:
+                return False
+        return True
+
+    def _remap(self, results, roi, width, height):
+        """Turn landmarks normalized to the crop into landmarks normalized to the frame"""
+        x0, y0, x1, y1 = roi
+        scale_x, scale_y = (x1 - x0) / width, (y1 - y0) / height
+        for hand in results.multi_hand_landmarks or []:
+            for lm in hand.landmark:
+                lm.x = x0 / width + lm.x * scale_x
+                lm.y = y0 / height + lm.y * scale_y
+                lm.z *= scale_x  # z uses the same scale as x
+
+    def reset(self):
+        """Forget the hands seen so far, for a new clip"""
+        for graph in self.roi_graphs.values():
+            graph.reset()
+        self._tracked = {}
+        self._hand_points = []
+        self._hand_count = 0
+        self._pose_points = []
+        self._pose_hands = 0
+        self._roi = None
+        self._since_full = 0
+        self._missed = False
+
+    def close(self):
+        """Close the crop graphs, the full-frame graph belongs to the caller"""
+        for graph in self.roi_graphs.values():
+            graph.close()
+        self.roi_graphs = {}
+        self._tracked = {}
+
+    def _remember(self, results):
+        hands = results.multi_hand_landmarks or []
+        self._hand_count = len(hands)
+        self._hand_points = [(lm.x, lm.y) for hand in hands for lm in hand.landmark]
+
+
+class LandmarkEngine:
+    def __init__(self, parallel=True, static_image_mode=False, min_detection_confidence=0.5, inference_size=None,
+                 hand_tracking=False):
+        self.mp_pose = mp.solutions.pose
+        self.mp_hands = mp.solutions.hands
+        self.pose = self.mp_pose.Pose(static_image_mode=static_image_mode,
+                                      min_detection_confidence=min_detection_confidence)
+        self.hands = self.mp_hands.Hands(static_image_mode=static_image_mode,
+                                         min_detection_confidence=min_detection_confidence)
+        self.parallel = parallel
+        self.min_detection_confidence = min_detection_confidence
+        self.hand_tracker = None
+        self._tracker_lock = threading.Lock()  # Keeps the ROI graph from closing while a frame uses it
+        if hand_tracking and not static_image_mode:
+            self.set_hand_tracking(True)
+        self.inference_size = inference_size  # Longest side in pixels the models see, None for full resolution
+        self._small = None  # Reused downsampling buffers
+        self._small_rgb = None
+        # Hands run on the pool while pose runs on the calling thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hands") if parallel else None
+
+    def set_hand_tracking(self, enabled):
+        """Switch between full-frame hand detection and ROI tracking"""
+        with self._tracker_lock:
+            if not enabled:
+                if self.hand_tracker is not None:
+                    self.hand_tracker.close()
+                self.hand_tracker = None
+            elif self.hand_tracker is None:
+                def make_roi_hands(max_hands):
+                    return self.mp_hands.Hands(max_num_hands=max_hands,
+                                               min_detection_confidence=self.min_detection_confidence)
+                self.hand_tracker = HandRoiTracker(self.hands, make_roi_hands, self.min_detection_confidence)
+
+    def _process_hands(self, rgb):
+        with self._tracker_lock:
+            tracker = self.hand_tracker
+            return tracker.process(rgb) if tracker is not None else self.hands.process(rgb)
+
+    def _inference_shape(self, shape):
+        """(width, height) to run the models at, or None if the frame is already small enough"""
+        height, width = shape[:2]
+        limit = self.inference_size
+        if not limit or max(width, height) <= limit:
+            return None
+        ratio = limit / max(width, height)
+        return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+    def prepare(self, bgr):
+        """
+        Convert a BGR frame to the RGB input of process(), downsampling first so only
+        the small frame is color converted. The result is reused by the next call.
+        """
+        size = self._inference_shape(bgr.shape)
+        if size is None:
+            return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        shape = (size[1], size[0], 3)
+        if self._small is None or self._small.shape != shape:
+            self._small = cv2.resize(bgr, size, interpolation=cv2.INTER_AREA)
+            self._small_rgb = None
+        else:
+            cv2.resize(bgr, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        self._small_rgb = cv2.cvtColor(self._small, cv2.COLOR_BGR2RGB, dst=self._small_rgb)
+        return self._small_rgb
+
+    def process(self, rgb, timer=None):
+        """
+        Run pose and hand tracking on an RGB frame, returns (pose_results, hand_results).
+        `timer(stage, func, *args)` runs the "pose" and "hands" stages when given.
+        """
+        run = timer or run_stage
+        size = self._inference_shape(rgb.shape)
+        if size is not None:
+            rgb = cv2.resize(rgb, size, interpolation=cv2.INTER_AREA)
+        if self._executor is None:
+            pose_results = run("pose", self.pose.process, rgb)
+            hand_results = run("hands", self._process_hands, rgb)
+        else:
+            hands_future = self._executor.submit(run, "hands", self._process_hands, rgb)
+            pose_results = run("pose", self.pose.process, rgb)
+            hand_results = hands_future.result()
+        tracker = self.hand_tracker
+        if tracker is not None:
+            tracker.observe_pose(pose_results)
+        return pose_results, hand_results
+
+    def draw(self, frame, pose_results, hand_results):
+        """Draw pose and hand landmarks onto a BGR frame in place"""
+        if pose_results.pose_landmarks:
+            mp.solutions.drawing_utils.draw_landmarks(
+                frame, pose_results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
+        if hand_results.multi_hand_landmarks:
+            for landmarks in hand_results.multi_hand_landmarks:
+                mp.solutions.drawing_utils.draw_landmarks(
+                    frame, landmarks, self.mp_hands.HAND_CONNECTIONS)
+
+    def reset(self):
+        """Drop the tracking state of the models so the next frame starts a new clip"""
+        self.pose.reset()
+        self.hands.reset()
+        if self.hand_tracker is not None:
+            self.hand_tracker.reset()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self.pose.close()
+        self.hands.close()
+        with self._tracker_lock:
+            if self.hand_tracker is not None:
+                self.hand_tracker.close()
+
+
+def load_benchmark_frames(paths, max_frames):
+    """Decode up to max_frames mirrored RGB frames from the given videos"""
+    frames = []
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB))
+        cap.release()
+        if len(frames) >= max_frames:
+            break
+    return frames
+
+
+def time_engine(engine, frames):
+    """Return per-frame latencies in milliseconds"""
+    latencies = []
+    for rgb in frames:
+        start = time.perf_counter()
+        engine.process(rgb)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def palm_detections(hands, frames, max_hands=2):
+    """Frames on which a video-mode hands graph runs its palm detector, for comparison with tracking"""
+    hands.reset()
+    runs, tracked = 0, 0
+    for rgb in frames:
+        runs += tracked < max_hands
+        tracked = len(hands.process(rgb).multi_hand_landmarks or [])
+    return runs
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        'mean_ms': sum(ordered) / len(ordered),
+        'p50_ms': pick(0.50),
+        'p95_ms': pick(0.95),
+        'fps': 1000 * len(ordered) / sum(ordered),
+    }
+
+
+def upscale_frames(frames, height):
+    """Resize benchmark frames to a camera resolution, e.g. 1080 for 1920x1080 input"""
+    scaled = []
+    for rgb in frames:
+        ratio = height / rgb.shape[0]
+        scaled.append(cv2.resize(rgb, (round(rgb.shape[1] * ratio), height), interpolation=cv2.INTER_LINEAR))
+    return scaled
+
+
+def run_benchmark(paths, max_frames=300, warmup=10, inference_size=None, input_height=None, hand_tracking=False):
+    frames = load_benchmark_frames(paths, max_frames)
+    if not frames:
+        raise SystemExit("No frames could be decoded from the benchmark videos")
+    if input_height:
+        frames = upscale_frames(frames, input_height)
+    configs = [("serial", False, None, False), ("parallel", True, None, False)]
+    if inference_size:
+        configs.append((f"parallel@{inference_size}", True, inference_size, False))
+    if hand_tracking:
+        configs.append(("tracking", True, None, True))
+    results = {}
+    for name, parallel, size, tracking in configs:
+        engine = LandmarkEngine(parallel=parallel, inference_size=size, hand_tracking=tracking)
+        time_engine(engine, frames[:warmup])
+        results[name] = summarize(time_engine(engine, frames))
+        if engine.hand_tracker is not None:
+            results[name]['hand_tracking'] = dict(engine.hand_tracker.stats)
+        elif hand_tracking and name == "parallel":
+            results[name]['palm_detections'] = palm_detections(engine.hands, frames[:warmup] + frames)
+        engine.close()
+    return len(frames), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and parallel pose+hands latency")
+    parser.add_argument("videos", nargs="*", help=f"Videos to decode (default: {DEFAULT_BENCHMARK_DIR})")
+    parser.add_argument("--frames", type=int, default=300, help="Number of frames to time")
+    parser.add_argument("--inference-size", type=int, default=None,
+                        help="Also time inference downsampled to this longest side, e.g. 480")
+    parser.add_argument("--input-height", type=int, default=None,
+                        help="Resize the decoded frames to this height first, e.g. 1080 to simulate an HD camera")
+    parser.add_argument("--hand-tracking", action="store_true", help="Also time the hand ROI tracking mode")
+    args = parser.parse_args()
+
+    paths = args.videos or sorted(
+        os.path.join(DEFAULT_BENCHMARK_DIR, f) for f in os.listdir(DEFAULT_BENCHMARK_DIR)
+        if f.lower().endswith(('.mp4', '.avi')))
+    frame_count, results = run_benchmark(paths, args.frames, inference_size=args.inference_size,
+                                         input_height=args.input_height, hand_tracking=args.hand_tracking)
+
+    print(f"{frame_count} frames from {len(paths)} videos")
+    for name, stats in results.items():
+        print(f"{name:>8}: mean {stats['mean_ms']:.1f} ms  p50 {stats['p50_ms']:.1f} ms  "
+              f"p95 {stats['p95_ms']:.1f} ms  ({stats['fps']:.1f} FPS)")
+    speedup = results['serial']['mean_ms'] / results['parallel']['mean_ms']
+    print(f"speedup: {speedup:.2f}x")
+    if args.inference_size:
+        reduced = results[f"parallel@{args.inference_size}"]
+        print(f"reduced-resolution speedup: {results['parallel']['mean_ms'] / reduced['mean_ms']:.2f}x")
+    if args.hand_tracking:
+        tracking = results['tracking']
+        counts = tracking['hand_tracking']
+        print(f"hand tracking speedup: {results['parallel']['mean_ms'] / tracking['mean_ms']:.2f}x  "
+              f"(full detections {counts['full_detections']}, ROI hits {counts['roi_hits']}, "
+              f"ROI misses {counts['roi_misses']})")
+        print(f"palm detector runs: {counts['palm_detections']} with tracking, "
+              f"{results['parallel']['palm_detections']} full-frame only")
+
+
+if __name__ == "__main__":
+    main()
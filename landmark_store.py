@@ -0,0 +1,191 @@
+# Landmark sequences of all dynamic-sign takes in one memory-mapped store
+# Frames of every take are appended to three flat files, landmarks.f32
+# (frames, 75, 4) float32, mask.bool (frames, 75) and timestamps.f64 (frames,).
+# index.sqlite maps (sign, user, take) to the take's first frame and frame count.
+# Readers slice the files through np.memmap, so loading a take is zero-copy and
+# never touches video. Appends only ever write past the end of the files, and a
+# take becomes visible once its index row is committed after the data is on disk.
+
+import argparse
+import numpy as np
+import os
+import sqlite3
+import threading
+import time
+
+from catalog import find_media, item_number
+from landmarks import NUM_LANDMARKS, LANDMARK_DIMS, landmark_path
+
+STORE_NAME = "landmark_store"
+FILES = {
+    # name: (file, dtype, shape of one frame)
+    'landmarks': ("landmarks.f32", np.float32, (NUM_LANDMARKS, LANDMARK_DIMS)),
+    'mask': ("mask.bool", np.bool_, (NUM_LANDMARKS,)),
+    'timestamps': ("timestamps.f64", np.float64, ()),
+}
+
+
+class LandmarkStore:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS takes (
+                sign TEXT NOT NULL,
+                user TEXT NOT NULL,
+                take INTEGER NOT NULL,
+                start INTEGER NOT NULL,
+                frames INTEGER NOT NULL,
+                source TEXT,
+                source_mtime_ns INTEGER,
+                added REAL,
+                PRIMARY KEY (sign, user, take)
+            )""")
+        self.db.commit()
+        self._maps = {}
+        self._mapped_frames = 0
+
+    @classmethod
+    def for_dataset(cls, data_dir):
+        return cls(os.path.join(data_dir, STORE_NAME))
+
+    @property
+    def total_frames(self):
+        """Frames covered by committed takes; anything after that in the files is an unfinished append"""
+        with self._lock:
+            return self._committed_frames()
+
+    def _committed_frames(self):
+        # Takes are only ever appended, so the highest end is the end of committed data
+        row = self.db.execute("SELECT MAX(start + frames) FROM takes").fetchone()
+        return row[0] or 0
+
+    def add_take(self, sign, user, take, landmarks, mask, timestamps=None, source=None, source_mtime_ns=None):
+        """
+        Append a take. Adding a take that is already stored appends the new data and
+        points the index at it; the old frames stay in the files unreferenced.
+        """
+        landmarks = np.ascontiguousarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, LANDMARK_DIMS)
+        frames = len(landmarks)
+        arrays = {
+            'landmarks': landmarks,
+            'mask': np.ascontiguousarray(mask, dtype=np.bool_).reshape(frames, NUM_LANDMARKS),
+            'timestamps': (np.zeros(frames) if timestamps is None
+                           else np.ascontiguousarray(timestamps, dtype=np.float64).reshape(frames)),
+        }
+        with self._lock:
+            start = self._committed_frames()
+            for name, (filename, dtype, frame_shape) in FILES.items():
+                frame_bytes = np.dtype(dtype).itemsize * int(np.prod(frame_shape))
+                path = os.path.join(self.directory, filename)
+                with open(path, 'ab') as f:
+                    # Cut off whatever an interrupted append left behind the committed data
+                    if f.tell() != start * frame_bytes:
+                        f.truncate(start * frame_bytes)
+                    f.write(arrays[name].tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.db.execute("INSERT OR REPLACE INTO takes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (sign, user, int(take), start, frames, source, source_mtime_ns, time.time()))
+            self.db.commit()
+        return start
+
+    def _map(self, needed):
+        """Memory-map the files, remapping when committed data grew past the current maps"""
+        if needed > self._mapped_frames or not self._maps:
+            total = self.total_frames
+            self._maps = {}
+            if total:
+                for name, (filename, dtype, frame_shape) in FILES.items():
+                    self._maps[name] = np.memmap(os.path.join(self.directory, filename), dtype=dtype,
+                                                 mode='r', shape=(total,) + frame_shape)
+            self._mapped_frames = total
+        return self._maps
+
+    def get(self, sign, user, take):
+        """
+        Return (landmarks, mask, timestamps) of a take as read-only views into the
+        memory-mapped files, or None if the take is not stored.
+        """
+        with self._lock:
+            row = self.db.execute("SELECT start, frames FROM takes WHERE sign=? AND user=? AND take=?",
+                                  (sign, user, int(take))).fetchone()
+        if row is None:
+            return None
+        start, frames = row
+        maps = self._map(start + frames)
+        if not frames:
+            return empty_take()
+        end = start + frames
+        return maps['landmarks'][start:end], maps['mask'][start:end], maps['timestamps'][start:end]
+
+    def takes(self, sign=None, user=None):
+        """[(sign, user, take, frames)] of the stored takes, optionally filtered"""
+        query = "SELECT sign, user, take, frames FROM takes"
+        conditions, params = [], []
+        for column, value in (("sign", sign), ("user", user)):
+            if value is not None:
+                conditions.append(f"{column}=?")
+                params.append(value)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self._lock:
+            return self.db.execute(query + " ORDER BY sign, user, take", params).fetchall()
+
+    def source_mtimes(self):
+        """{source path: mtime_ns} of the landmark files the takes were imported from"""
+        with self._lock:
+            return dict(self.db.execute("SELECT source, source_mtime_ns FROM takes WHERE source IS NOT NULL"))
+
+    def close(self):
+        self._maps = {}
+        self.db.close()
+
+
+def empty_take():
+    return (np.zeros((0, NUM_LANDMARKS, LANDMARK_DIMS), dtype=np.float32),
+            np.zeros((0, NUM_LANDMARKS), dtype=np.bool_), np.zeros(0))
+
+
+def import_dataset(store, data_dir):
+    """Append the .npz landmark files of every video take that is new or changed, returns the count"""
+    known = store.source_mtimes()
+    imported = 0
+    for kind, media_path in find_media(data_dir):
+        npz_path = landmark_path(media_path)
+        take = item_number(media_path)
+        if kind != 'video' or take is None or not os.path.exists(npz_path):
+            continue
+        source = os.path.relpath(npz_path, data_dir)
+        mtime_ns = os.stat(npz_path).st_mtime_ns
+        if known.get(source) == mtime_ns:
+            continue
+        user_dir = os.path.dirname(media_path)
+        sign, user = os.path.basename(os.path.dirname(user_dir)), os.path.basename(user_dir)
+        with np.load(npz_path) as data:
+            timestamps = data['timestamps'] if 'timestamps' in data else None
+            store.add_take(sign, user, take, data['landmarks'], data['mask'], timestamps, source, mtime_ns)
+        imported += 1
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped landmark store for dynamic-sign takes")
+    parser.add_argument("command", choices=["import", "info"])
+    parser.add_argument("data_dir", nargs="?", default="ArSL_Dataset", help="Dataset root (default: ArSL_Dataset)")
+    args = parser.parse_args()
+
+    store = LandmarkStore.for_dataset(args.data_dir)
+    if args.command == "import":
+        start = time.time()
+        count = import_dataset(store, args.data_dir)
+        print(f"Imported {count} takes in {time.time() - start:.1f}s")
+    takes = store.takes()
+    print(f"{len(takes)} takes, {store.total_frames} frames in {store.directory}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# Landmark arrays saved next to every captured image and video
+# Each frame is a (75, 4) float32 array: 33 pose landmarks, then 21 left-hand and
+# 21 right-hand landmarks, each as (x, y, z, visibility) in MediaPipe's normalized
+# image coordinates. A boolean mask marks which landmarks were actually detected.
+
+import bisect
+import numpy as np
+import os
+import threading
+
+POSE_LANDMARKS = 33
+HAND_LANDMARKS = 21
+NUM_LANDMARKS = POSE_LANDMARKS + 2 * HAND_LANDMARKS
+LANDMARK_DIMS = 4  # x, y, z, visibility
+LEFT_HAND_OFFSET = POSE_LANDMARKS
+RIGHT_HAND_OFFSET = POSE_LANDMARKS + HAND_LANDMARKS
+
+
+def empty_landmarks(frames=None):
+    """Zeroed landmark array and all-False mask, for one frame or `frames` frames"""
+    shape = (NUM_LANDMARKS,) if frames is None else (frames, NUM_LANDMARKS)
+    return np.zeros(shape + (LANDMARK_DIMS,), dtype=np.float32), np.zeros(shape, dtype=bool)
+
+
+def results_to_array(pose_results, hand_results):
+    """
+    Convert MediaPipe pose and hands results into (landmarks, mask).
+    Frames are mirrored before inference, so MediaPipe's handedness labels
+    match the signer's real hands. Hand landmarks carry the handedness score
+    in the visibility column.
+    """
+    landmarks, mask = empty_landmarks()
+
+    if pose_results.pose_landmarks:
+        for i, lm in enumerate(pose_results.pose_landmarks.landmark[:POSE_LANDMARKS]):
+            landmarks[i] = (lm.x, lm.y, lm.z, lm.visibility)
+        mask[:POSE_LANDMARKS] = True
+
+    if hand_results.multi_hand_landmarks:
+        handedness = hand_results.multi_handedness or []
+        for i, hand in enumerate(hand_results.multi_hand_landmarks):
+            if i < len(handedness):
+                classification = handedness[i].classification[0]
+                label, score = classification.label, classification.score
+            else:
+                label, score = "Right", 0.0
+            offset = LEFT_HAND_OFFSET if label == "Left" else RIGHT_HAND_OFFSET
+            if mask[offset]:
+                continue  # Both hands got the same label, keep the first one
+            for j, lm in enumerate(hand.landmark[:HAND_LANDMARKS]):
+                landmarks[offset + j] = (lm.x, lm.y, lm.z, score)
+            mask[offset:offset + HAND_LANDMARKS] = True
+
+    return landmarks, mask
+
+
+def landmark_path(media_path):
+    """Path of the landmark file stored next to an image or video"""
+    return os.path.splitext(media_path)[0] + ".npz"
+
+
+def save_landmarks(path, landmarks, mask, timestamps=None, landmark_age=None):
+    """
+    Save a (frames, 75, 4) landmark array and its (frames, 75) mask.
+    `landmark_age` is the time in seconds between each frame and the inference
+    result used for it, 0 when the frame itself was processed.
+    """
+    arrays = {
+        'landmarks': np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, LANDMARK_DIMS),
+        'mask': np.asarray(mask, dtype=bool).reshape(-1, NUM_LANDMARKS),
+    }
+    if timestamps is not None:
+        arrays['timestamps'] = np.asarray(timestamps, dtype=np.float64)
+    if landmark_age is not None:
+        arrays['landmark_age'] = np.asarray(landmark_age, dtype=np.float32)
+    # Written next to the target and renamed, so an interrupted save never leaves a
+    # truncated file that looks newer than its media
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_landmarks(path):
+    """Load a landmark file, returns (landmarks, mask)"""
+    with np.load(path) as data:
+        return data['landmarks'], data['mask']
+
+
+class LandmarkTrack:
+    """
+    Inference results collected while a take is recorded. Landmark detection runs
+    on its own thread and may skip frames, so every recorded frame is matched with
+    the result closest to its capture time, within `max_gap` seconds.
+    """
+
+    def __init__(self, max_gap=0.07):
+        self.max_gap = max_gap
+        self.timestamps = []
+        self.landmarks = []
+        self.masks = []
+        self._cond = threading.Condition()
+
+    def add(self, timestamp, landmarks, mask):
+        with self._cond:
+            # Results arrive in capture order, keep the list sorted anyway
+            index = bisect.bisect(self.timestamps, timestamp)
+            self.timestamps.insert(index, timestamp)
+            self.landmarks.insert(index, landmarks)
+            self.masks.insert(index, mask)
+            self._cond.notify_all()
+
+    def wait_until(self, timestamp, timeout=1.0):
+        """Wait for inference to reach the given capture time, returns False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self.timestamps and self.timestamps[-1] >= timestamp, timeout)
+
+    def lookup(self, frame_timestamps):
+        """Return (landmarks, mask, landmark_age) arrays for the given frame capture times"""
+        landmarks, mask = empty_landmarks(len(frame_timestamps))
+        age = np.full(len(frame_timestamps), np.nan, dtype=np.float32)
+        with self._cond:
+            for i, timestamp in enumerate(frame_timestamps):
+                index = bisect.bisect_left(self.timestamps, timestamp)
+                best = None
+                for candidate in (index - 1, index):
+                    if 0 <= candidate < len(self.timestamps):
+                        gap = abs(self.timestamps[candidate] - timestamp)
+                        if gap <= self.max_gap and (best is None or gap < best[1]):
+                            best = (candidate, gap)
+                if best is not None:
+                    landmarks[i] = self.landmarks[best[0]]
+                    mask[i] = self.masks[best[0]]
+                    age[i] = best[1]
+        return landmarks, mask, age
@@ -0,0 +1,256 @@
+# Synchronized capture from several cameras at once
+# Every source gets its own capture thread and ring buffer, and all frames are
+# stamped with the same monotonic clock. Takes are recorded by walking the
+# reference stream and pairing each of its frames with the closest frame of
+# every other stream within a tolerance. Each matched set is written to one clip
+# per stream, all on the reference timeline and on one frame grid that starts at
+# the same moment, so the clips stay frame-aligned.
+
+import argparse
+import cv2
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from frame_buffer import FrameRingBuffer, FrameThrottle, buffer_capacity
+from frame_sources import open_source
+from video_writers import ConstantRateVideoWriter, find_working_codec
+
+
+class StreamCapture:
+    """Capture thread for one source, feeding a ring buffer with raw mirrored frames"""
+
+    def __init__(self, source, fps=30, buffer_seconds=4, mirror=True):
+        self.source = open_source(source)
+        self.throttle = FrameThrottle(fps)
+        self.frame_interval = self.throttle.interval
+        self.buffer_seconds = buffer_seconds
+        self.mirror = mirror
+        self.frame_buffer = None
+        self.frames_captured = 0
+        self._running = False
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.source.release()
+
+    def wait_ready(self, timeout=5.0):
+        """Wait until the first frame arrived and the buffer exists"""
+        return self._ready.wait(timeout)
+
+    def frame_size(self):
+        shape = self.frame_buffer.frame_shape
+        return (shape[1], shape[0])
+
+    def _loop(self):
+        while self._running and self.source.isOpened():
+            ret, frame = self.source.read()
+            if not ret:
+                continue
+            capture_time = time.monotonic()
+            if not self.throttle.accept(capture_time):
+                continue
+            if self.frame_buffer is None or not self.frame_buffer.matches(frame.shape):
+                capacity = buffer_capacity(self.buffer_seconds, self.frame_interval, frame.shape)
+                self.frame_buffer = FrameRingBuffer(capacity, frame.shape)
+                self._ready.set()
+            slot = self.frame_buffer.acquire()
+            if self.mirror:
+                cv2.flip(frame, 1, dst=slot)
+            else:
+                slot[...] = frame
+            self.frame_buffer.commit(capture_time)
+            self.frames_captured += 1
+
+
+class _StreamCursor:
+    """Walks one stream's ring buffer to find the frame closest to a reference time"""
+
+    def __init__(self, frame_buffer, start_seq):
+        self.frame_buffer = frame_buffer
+        self.seq = start_seq
+
+    def nearest(self, timestamp, tolerance, timeout):
+        """Return (frame, timestamp) of the closest frame within tolerance, or None"""
+        frame_buffer = self.frame_buffer
+        # Wait until this stream has captured past the window, or give up
+        deadline = time.monotonic() + timeout
+        while True:
+            head = frame_buffer.head
+            if head > 0:
+                latest = frame_buffer.get(head - 1)
+                if latest is not None and latest[1] > timestamp + tolerance:
+                    break
+            if time.monotonic() >= deadline:
+                break
+            frame_buffer.wait_for(head, timeout=max(0.0, deadline - time.monotonic()))
+
+        self.seq = max(self.seq, frame_buffer.oldest)
+        best = None
+        while self.seq < frame_buffer.head:
+            item = frame_buffer.get(self.seq)
+            if item is None:
+                self.seq = frame_buffer.oldest
+                continue
+            gap = abs(item[1] - timestamp)
+            if best is None or gap < best[2]:
+                best = (item[0], item[1], gap)
+            if item[1] > timestamp:
+                break
+            self.seq += 1
+        if best is None or best[2] > tolerance:
+            return None
+        return best[0], best[1]
+
+
+class MultiCameraCapture:
+    def __init__(self, sources, fps=30, tolerance=None, buffer_seconds=4, mirror=True):
+        """
+        `sources` are anything open_source() accepts. The first one is the reference
+        stream unless a reference ring buffer is passed to record_take().
+        Frames further apart than `tolerance` seconds (default one frame) are not paired.
+        """
+        self.fps = fps
+        self.tolerance = tolerance if tolerance is not None else 1.0 / fps
+        self.streams = [StreamCapture(source, fps, buffer_seconds, mirror) for source in sources]
+
+    def start(self, timeout=5.0):
+        for stream in self.streams:
+            stream.start()
+        for stream in self.streams:
+            if not stream.wait_ready(timeout):
+                raise IOError(f"No frames from source {stream.source}")
+        return self
+
+    def stop(self):
+        for stream in self.streams:
+            stream.stop()
+
+    def record_take(self, paths, duration, codec, reference=None, is_running=None, start_time=None, fps=None):
+        """
+        Record `duration` seconds into one clip per stream (paths in stream order).
+        With `reference` (another ring buffer, e.g. the main collector's) the streams are
+        paired against it; otherwise the first stream is the reference and paths[0] is its clip.
+        `start_time` and `fps` set the frame grid of the clips; pass the ones of the
+        reference clip so every clip of the take starts on the same frame.
+        Returns the take statistics; the clips are deleted if `is_running()` turns False.
+        """
+        start_time = time.monotonic() if start_time is None else start_time
+        fps = fps or self.fps
+        streams = [s.frame_buffer for s in self.streams]
+        if reference is None:
+            reference, others = streams[0], streams[1:]
+            sizes = [s.frame_size() for s in self.streams]
+        else:
+            others = streams
+            sizes = [s.frame_size() for s in self.streams]
+            paths = [None] + list(paths)
+            sizes = [None] + sizes
+
+        writers = []
+        try:
+            for path, size in zip(paths, sizes):
+                writers.append(ConstantRateVideoWriter(path, codec, fps, size, start_time=start_time,
+                                                       duration=duration) if path else None)
+        except Exception:
+            for writer in writers:
+                if writer is not None:
+                    writer.abort()
+            raise
+        # The frame just before the start can still be the closest one to the first reference frame
+        cursors = [_StreamCursor(buffer, buffer.first_seq_since(start_time) - 1) for buffer in others]
+        stats = {'sets_written': 0, 'unmatched': 0, 'max_skew': 0.0}
+
+        seq = reference.first_seq_since(start_time)
+        try:
+            while time.monotonic() - start_time < duration and (is_running is None or is_running()):
+                if not reference.wait_for(seq, timeout=0.1):
+                    continue
+                item = reference.get(seq)
+                if item is None:
+                    seq = reference.oldest
+                    continue
+                seq += 1
+                ref_frame, ref_time = item
+                matches = [cursor.nearest(ref_time, self.tolerance, timeout=2 * self.tolerance + 0.05)
+                           for cursor in cursors]
+                if any(match is None for match in matches):
+                    stats['unmatched'] += 1
+                    continue
+                # Every clip of the set is stamped with the reference time so they stay aligned
+                frames = [ref_frame] + [match[0] for match in matches]
+                for writer, frame in zip(writers, frames):
+                    if writer is not None:
+                        writer.write(frame, ref_time)
+                skew = max((abs(match[1] - ref_time) for match in matches), default=0.0)
+                stats['max_skew'] = max(stats['max_skew'], float(skew))
+                stats['sets_written'] += 1
+        except Exception:
+            for writer in writers:
+                if writer is not None:
+                    writer.abort()
+            raise
+
+        if is_running is not None and not is_running():
+            for writer in writers:
+                if writer is not None:
+                    writer.abort()
+            stats['aborted'] = True
+            return stats
+        stats['writers'] = [writer.finalize() for writer in writers if writer is not None]
+        return stats
+
+    def record_take_async(self, paths, duration, codec, reference=None, is_running=None, start_time=None, fps=None):
+        """Run record_take on its own thread, returns a Future with its statistics or exception"""
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self.record_take(paths, duration, codec, reference, is_running, start_time, fps))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record synchronized takes from several cameras")
+    parser.add_argument("--source", action="append", required=True,
+                        help="Camera index, video file or directory, repeat once per angle")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds per take")
+    parser.add_argument("--takes", type=int, default=1)
+    parser.add_argument("--output", default="multi_camera_takes")
+    parser.add_argument("--name", default="take")
+    args = parser.parse_args()
+
+    capture = MultiCameraCapture(args.source).start()
+    os.makedirs(args.output, exist_ok=True)
+    codec, ext = find_working_codec(args.output, capture.streams[0].frame_size())
+    if codec is None:
+        raise SystemExit("No suitable codec found")
+    try:
+        for take in range(args.takes):
+            paths = [os.path.join(args.output, f"{args.name}_{take}_cam{i}.{ext}")
+                     for i in range(len(capture.streams))]
+            stats = capture.record_take(paths, args.duration, codec)
+            print(f"Take {take}: {stats['sets_written']} synchronized sets, {stats['unmatched']} unmatched, "
+                  f"max skew {stats['max_skew'] * 1000:.1f} ms")
+    finally:
+        capture.stop()
+
+
+if __name__ == "__main__":
+    main()
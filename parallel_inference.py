@@ -0,0 +1,351 @@
+# Landmark inference spread over worker processes
+# Each worker owns its own Pose and Hands models, so the Python work around the
+# MediaPipe calls runs on all cores instead of behind one GIL. Frames are copied
+# once into slots of a shared memory block and only the slot number travels to the
+# worker; the small landmark arrays come back through a queue and are handed out
+# again in the order the frames were submitted. Whole image and video files can be
+# submitted as well, which is what extract_landmarks.py does. A worker that dies
+# makes every waiting call raise WorkerDied instead of blocking forever.
+
+import argparse
+import cv2
+import multiprocessing as mp
+import numpy as np
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+from landmarks import empty_landmarks
+
+DEFAULT_BENCHMARK_DIR = os.path.join("signs_directory", "dynamic")
+
+
+def landmarks_for_file(kind, path, image_engine, video_engine):
+    """
+    Landmarks of an image or video file, returns (landmarks, mask, timestamps).
+    Video frames are tracked like in the live collector; `video_engine` is reset
+    first so no tracking state carries over from the previous clip.
+    """
+    from landmarks import results_to_array
+
+    if kind == "image":
+        frame = cv2.imread(path)
+        if frame is None:
+            raise IOError(f"Could not read {path}")
+        landmarks, mask = results_to_array(*image_engine.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+        return landmarks[None], mask[None], np.zeros(1)
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open {path}")
+    video_engine.reset()
+    frame_landmarks, frame_masks, timestamps = [], [], []
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            timestamps.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+            landmarks, mask = results_to_array(*video_engine.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+            frame_landmarks.append(landmarks)
+            frame_masks.append(mask)
+    finally:
+        cap.release()
+    if not timestamps:
+        landmarks, mask = empty_landmarks(0)
+        return landmarks, mask, np.zeros(0)
+    return np.stack(frame_landmarks), np.stack(frame_masks), np.asarray(timestamps)
+
+
+def _worker_main(shm_name, slot_bytes, tasks, results, static_image_mode, inference_size):
+    # Imported here so the parent does not need MediaPipe loaded to start workers
+    from inference import LandmarkEngine
+    from landmarks import results_to_array
+
+    shm = shared_memory.SharedMemory(name=shm_name) if shm_name else None
+    engine = LandmarkEngine(parallel=False, static_image_mode=static_image_mode, inference_size=inference_size)
+    video_engine = None  # Created for the first video file, then reused for every clip
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            index, slot, item = task
+            try:
+                if slot is None:
+                    # A whole file, item is (kind, path)
+                    if item[0] == "video" and video_engine is None:
+                        video_engine = LandmarkEngine(parallel=False, static_image_mode=False)
+                    results.put((index, None, landmarks_for_file(*item, engine, video_engine), None))
+                    continue
+                frame = np.ndarray(item, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                rgb = engine.prepare(frame)  # Copies out of the slot
+                results.put((index, slot, results_to_array(*engine.process(rgb)), None))
+            except Exception as e:
+                results.put((index, slot, None, repr(e)))
+    finally:
+        engine.close()
+        if video_engine is not None:
+            video_engine.close()
+        if shm is not None:
+            shm.close()
+
+
+class WorkerDied(RuntimeError):
+    """A worker process exited while frames were still being processed"""
+
+
+class ProcessPoolLandmarkEngine:
+    def __init__(self, frame_shape=None, workers=None, slots=None, static_image_mode=True, inference_size=None):
+        """
+        `frame_shape` is the largest BGR frame that will be submitted, None when only
+        files are submitted. Consecutive frames go to different workers, so MediaPipe's
+        video tracking cannot carry over between them; frames are treated as
+        independent images by default.
+        """
+        self.workers = workers or os.cpu_count()
+        self.slots = slots or 2 * self.workers
+        self.slot_bytes = int(np.prod(frame_shape)) if frame_shape is not None else 0
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0}
+
+        self._shm = None
+        if self.slot_bytes:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self._free_slots = queue.Queue()
+        for slot in range(self.slots):
+            self._free_slots.put(slot)
+        self._next_index = 0  # Index the next submitted frame gets
+        self._next_result = 0  # Index the next get() returns
+        self._ready = {}  # index -> result that arrived out of order
+        self._cond = threading.Condition()
+        self._error = None  # Set when a worker died, every later call raises it
+        self._stopping = False  # Workers exit on purpose from here on
+        self._closed = False
+        self._processes = []
+        try:
+            # Spawned workers start clean instead of inheriting the parent's threads and models
+            context = mp.get_context("spawn")
+            self._tasks = context.Queue()
+            self._results = context.Queue()
+            shm_name = self._shm.name if self._shm is not None else None
+            for _ in range(self.workers):
+                process = context.Process(target=_worker_main, daemon=True,
+                                          args=(shm_name, self.slot_bytes, self._tasks, self._results,
+                                                static_image_mode, inference_size))
+                process.start()
+                self._processes.append(process)
+        except BaseException:
+            self._shutdown()
+            raise
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def _take_slot(self):
+        while True:
+            self._check()
+            try:
+                return self._free_slots.get(timeout=0.2)
+            except queue.Empty:
+                pass
+
+    def submit(self, frame):
+        """Copy a BGR frame into shared memory and queue it, blocks while all slots are busy. Returns its index."""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of shape {frame.shape} does not fit the {self.slot_bytes} byte slots")
+        slot = self._take_slot()
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+        np.copyto(view, frame)
+        return self._put(slot, frame.shape)
+
+    def submit_file(self, kind, path):
+        """Queue an image or video file ("image" or "video") for landmark extraction. Returns its index."""
+        self._check()
+        return self._put(None, (kind, path))
+
+    def _put(self, slot, item):
+        index = self._next_index
+        self._next_index += 1
+        self.stats['submitted'] += 1
+        self._tasks.put((index, slot, item))
+        return index
+
+    def pending(self):
+        """Number of submitted frames whose results were not taken yet"""
+        return self._next_index - self._next_result
+
+    def get(self, timeout=None):
+        """
+        Return (index, landmarks, mask) of the next frame in submission order, or
+        (index, landmarks, mask, timestamps) for a file; raises queue.Empty on timeout,
+        WorkerDied if a worker process exited and IOError for a file that failed.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._next_result in self._ready or self._error, timeout):
+                raise queue.Empty
+            if self._next_result not in self._ready:
+                self._check()
+            index = self._next_result
+            result, error = self._ready.pop(index)
+            self._next_result += 1
+        if error is not None:
+            raise IOError(error)
+        return (index,) + tuple(result)
+
+    def map(self, frames):
+        """Yield (landmarks, mask) for every frame, in order, keeping all workers busy"""
+        for frame in frames:
+            self.submit(frame)
+            while self._next_result in self._ready:
+                yield self.get()[1:]
+        while self.pending():
+            yield self.get()[1:]
+
+    def map_files(self, files):
+        """
+        Yield ((kind, path), result, error) for every (kind, path), in order, where
+        result is (landmarks, mask, timestamps) or None if the file failed
+        """
+        submitted = []
+        for item in files:
+            self.submit_file(*item)
+            submitted.append(item)
+            # Keep a bounded number of files in flight
+            while self.pending() >= self.slots or self._next_result in self._ready:
+                yield self._file_result(submitted)
+        while self.pending():
+            yield self._file_result(submitted)
+
+    def _file_result(self, submitted):
+        item = submitted[self._next_result]
+        submitted[self._next_result] = None
+        try:
+            return item, self.get()[1:], None
+        except IOError as e:
+            return item, None, str(e)
+
+    def _check(self):
+        if self._error is not None:
+            # The pool is unusable, release the workers and the shared memory right away
+            self._shutdown()
+            raise self._error
+
+    def _collect(self):
+        while not self._closed:
+            try:
+                index, slot, result, error = self._results.get(timeout=0.2)
+            except queue.Empty:
+                # A worker that crashed, was killed or failed to start never answers again
+                dead = [p for p in self._processes if p.exitcode is not None]
+                if dead and not self._stopping:
+                    with self._cond:
+                        self._error = WorkerDied(f"Landmark worker exited with code {dead[0].exitcode}")
+                        self._cond.notify_all()
+                    return
+                continue
+            if slot is not None:
+                self._free_slots.put(slot)
+                if error is not None:
+                    # A frame that failed still gets a result, with nothing detected
+                    result, error = empty_landmarks(), None
+                    self.stats['failed'] += 1
+            elif error is not None:
+                self.stats['failed'] += 1
+            self.stats['completed'] += 1
+            with self._cond:
+                self._ready[index] = (result, error)
+                self._cond.notify_all()
+
+    def close(self):
+        if self._closed:
+            return
+        self._stopping = True
+        try:
+            for process in self._processes:
+                if process.is_alive():
+                    self._tasks.put(None)
+            for process in self._processes:
+                process.join(timeout=5)
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        self._stopping = True
+        self._closed = True
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1)
+        if hasattr(self, "_tasks"):
+            # Do not wait on the queue's feeder thread for tasks nobody will read
+            self._tasks.cancel_join_thread()
+        collector = getattr(self, "_collector", None)
+        if collector is not None and collector is not threading.current_thread():
+            collector.join(timeout=1)
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_frames(paths, max_frames):
+    """Decode up to max_frames mirrored BGR frames from the given videos"""
+    frames = []
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.flip(frame, 1))
+        cap.release()
+        if len(frames) >= max_frames:
+            break
+    return frames
+
+
+def time_pool(frames, workers, inference_size=None, warmup=2):
+    """Frames per second processed by a pool of `workers` processes"""
+    shape = max((frame.shape for frame in frames), key=np.prod)
+    with ProcessPoolLandmarkEngine(shape, workers=workers, inference_size=inference_size) as engine:
+        # Let every worker load its models before timing
+        for _ in engine.map(frames[:warmup * workers]):
+            pass
+        start = time.perf_counter()
+        count = sum(1 for _ in engine.map(frames))
+        return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how landmark throughput scales with worker processes")
+    parser.add_argument("videos", nargs="*", help=f"Videos to decode (default: {DEFAULT_BENCHMARK_DIR})")
+    parser.add_argument("--frames", type=int, default=600, help="Number of frames to process per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()],
+                        help="Worker counts to try")
+    parser.add_argument("--inference-size", type=int, default=None, help="Downsample frames to this longest side")
+    args = parser.parse_args()
+
+    paths = args.videos or sorted(
+        os.path.join(DEFAULT_BENCHMARK_DIR, f) for f in os.listdir(DEFAULT_BENCHMARK_DIR)
+        if f.lower().endswith(('.mp4', '.avi')))
+    frames = load_frames(paths, args.frames)
+    if not frames:
+        raise SystemExit("No frames could be decoded from the benchmark videos")
+
+    print(f"{len(frames)} frames from {len(paths)} videos")
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        fps = time_pool(frames, workers, args.inference_size)
+        baseline = baseline or fps / workers
+        print(f"{workers:>3} workers: {fps:7.1f} frames/s  (scaling efficiency {fps / (baseline * workers):.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Preview rendering shared by the camera preview and the reference video player
+# Frames are resized once, straight to the size of the widget, with a cheap
+# interpolation and converted to RGB into reused buffers. The Tk main thread
+# only has to wrap the finished buffer and paste it into an existing PhotoImage.
+
+import cv2
+import numpy as np
+import threading
+import time
+from PIL import Image, ImageTk
+
+
+class PreviewScaler:
+    def __init__(self, pad=False, interpolation=cv2.INTER_LINEAR, buffers=3):
+        self.pad = pad  # Letterbox to the full target size instead of fitting inside it
+        self.interpolation = interpolation
+        self.buffer_count = buffers  # Rotated so the UI can still hold the previous result
+        self._target = None
+        self._geometry = None  # (source shape, target) -> (scaled size, offsets, output size)
+        self._buffers = []
+        self._scaled = None
+        self._next_buffer = 0
+        self._lock = threading.Lock()
+
+    def set_target(self, width, height):
+        """Set the widget size to render for, safe to call from the UI thread"""
+        with self._lock:
+            self._target = (int(width), int(height)) if width > 1 and height > 1 else None
+
+    def _layout(self, shape):
+        target = self._target
+        key = (shape, target)
+        if self._geometry is not None and self._geometry[0] == key:
+            return self._geometry[1]
+        src_h, src_w = shape[:2]
+        if target is None:
+            scaled = (src_w, src_h)
+        else:
+            ratio = min(target[0] / src_w, target[1] / src_h)
+            scaled = (max(1, int(src_w * ratio)), max(1, int(src_h * ratio)))
+        if self.pad and target is not None:
+            output = target
+            offsets = ((target[0] - scaled[0]) // 2, (target[1] - scaled[1]) // 2)
+        else:
+            output = scaled
+            offsets = (0, 0)
+        layout = (scaled, offsets, output)
+        self._geometry = (key, layout)
+        # New geometry, so new buffers; padded borders are cleared once here
+        self._buffers = [np.zeros((output[1], output[0], 3), dtype=np.uint8)
+                         for _ in range(self.buffer_count)]
+        self._scaled = np.empty((scaled[1], scaled[0], 3), dtype=np.uint8)
+        return layout
+
+    def render(self, frame, bgr=True):
+        """Return an RGB array of the frame scaled for the current target"""
+        with self._lock:
+            (scaled_w, scaled_h), (x, y), _ = self._layout(frame.shape)
+            out = self._buffers[self._next_buffer]
+            self._next_buffer = (self._next_buffer + 1) % len(self._buffers)
+            scaled = self._scaled
+
+        if (scaled_w, scaled_h) == (frame.shape[1], frame.shape[0]):
+            scaled = frame
+        else:
+            cv2.resize(frame, (scaled_w, scaled_h), dst=scaled, interpolation=self.interpolation)
+        region = out[y:y + scaled_h, x:x + scaled_w]
+        if bgr:
+            cv2.cvtColor(scaled, cv2.COLOR_BGR2RGB, dst=region)
+        else:
+            np.copyto(region, scaled)
+        return out
+
+
+class PhotoBlitter:
+    """Shows RGB arrays on a Tk label, reusing its PhotoImage while the size stays the same"""
+
+    def __init__(self, label):
+        self.label = label
+        self.photo = None
+        self.stats = {'frames': 0, 'last_ms': 0.0, 'mean_ms': 0.0, 'max_ms': 0.0}
+
+    def show(self, rgb):
+        start = time.perf_counter()
+        height, width = rgb.shape[:2]
+        img = Image.frombuffer('RGB', (width, height), rgb, 'raw', 'RGB', 0, 1)
+        if self.photo is None or (self.photo.width(), self.photo.height()) != (width, height):
+            self.photo = ImageTk.PhotoImage(image=img)
+            self.label.imgtk = self.photo
+            self.label.configure(image=self.photo)
+        else:
+            self.photo.paste(img)
+        self._record((time.perf_counter() - start) * 1000)
+
+    def _record(self, elapsed_ms):
+        stats = self.stats
+        stats['frames'] += 1
+        stats['last_ms'] = elapsed_ms
+        stats['mean_ms'] += (elapsed_ms - stats['mean_ms']) / stats['frames']
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
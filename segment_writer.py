@@ -0,0 +1,243 @@
+# Crash-safe recording of takes as short segment files
+# While a take is recorded it lives in "<clip>.part/" as numbered segment files of
+# about one second each plus a manifest.json listing the segments that were closed.
+# Closed segments are complete, playable files, so after a crash everything but the
+# last second can be joined into the clip, or the take can be thrown away cleanly.
+# Finished takes are joined with ffmpeg's concat demuxer without re-encoding, so
+# segmenting is only worth it when ffmpeg is installed; the OpenCV re-encode is
+# kept for recovering takes at startup. Every open take is listed in a journal
+# directory, so finding interrupted takes never has to walk the dataset tree.
+# Journal entries hold the .part path relative to the directory the journal lives
+# in, so recovered clips get the same paths as the rest of the dataset.
+
+import cv2
+import json
+import os
+import shutil
+import subprocess
+import time
+import uuid
+
+PART_SUFFIX = ".part"
+MANIFEST_NAME = "manifest.json"
+JOURNAL_NAME = ".open_takes"
+
+
+def segments_supported():
+    """Takes can only be joined without re-encoding when ffmpeg is installed"""
+    return shutil.which("ffmpeg") is not None
+
+
+def journal_directory(root):
+    """Journal of the takes being recorded under root, one small file per open take"""
+    return os.path.join(root, JOURNAL_NAME)
+
+
+def part_directory(path):
+    """Directory holding the segments of the clip at `path` while it is recorded"""
+    return path + PART_SUFFIX
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def _write_manifest(directory, manifest):
+    # Write and rename, so a crash never leaves a half-written manifest behind
+    tmp_path = os.path.join(directory, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST_NAME))
+
+
+class SegmentFileWriter:
+    """
+    Drop-in for cv2.VideoWriter that starts a new segment file every
+    `segment_seconds` of output and records each closed segment in the manifest.
+    """
+
+    def __init__(self, path, codec, fps, frame_size, segment_seconds=1.0, journal_dir=None):
+        self.path = path
+        self.directory = part_directory(path)
+        self.codec = codec
+        self.fps = fps
+        self.frame_size = tuple(frame_size)
+        self.ext = os.path.splitext(path)[1]
+        self.frames_per_segment = max(1, int(round(fps * segment_seconds)))
+        os.makedirs(self.directory, exist_ok=True)
+        self.manifest = {
+            'clip': os.path.basename(path),
+            'codec': codec,
+            'fps': fps,
+            'frame_size': list(self.frame_size),
+            'segment_frames': self.frames_per_segment,
+            'segments': [],  # Only closed segments, each {"file", "frames"}
+            'created': time.time(),
+        }
+        _write_manifest(self.directory, self.manifest)
+        self.journal_entry = None
+        if journal_dir is not None:
+            os.makedirs(journal_dir, exist_ok=True)
+            self.journal_entry = os.path.join(journal_dir, uuid.uuid4().hex)
+            with open(self.journal_entry, 'w') as f:
+                f.write(os.path.relpath(self.directory, os.path.dirname(os.path.abspath(journal_dir))))
+        self._writer = None
+        self._segment_name = None
+        self._segment_frames = 0
+        try:
+            self._open_segment()
+        except IOError:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            close_journal_entry(self)
+            raise
+
+    @property
+    def frames_written(self):
+        return sum(s['frames'] for s in self.manifest['segments']) + self._segment_frames
+
+    def isOpened(self):
+        return self._writer is not None and self._writer.isOpened()
+
+    def write(self, frame):
+        if self._segment_frames >= self.frames_per_segment:
+            self._close_segment()
+            self._open_segment()
+        self._writer.write(frame)
+        self._segment_frames += 1
+
+    def release(self):
+        if self._writer is not None:
+            self._close_segment()
+
+    def _open_segment(self):
+        self._segment_name = f"segment_{len(self.manifest['segments']):05d}{self.ext}"
+        self._writer = cv2.VideoWriter(os.path.join(self.directory, self._segment_name),
+                                       cv2.VideoWriter_fourcc(*self.codec), self.fps, self.frame_size)
+        self._segment_frames = 0
+        if not self._writer.isOpened():
+            self._writer.release()
+            self._writer = None
+            raise IOError(f"Could not open segment {self._segment_name} of {self.path}")
+
+    def _close_segment(self):
+        self._writer.release()
+        self._writer = None
+        if self._segment_frames:
+            self.manifest['segments'].append({'file': self._segment_name, 'frames': self._segment_frames})
+            _write_manifest(self.directory, self.manifest)
+        else:
+            os.remove(os.path.join(self.directory, self._segment_name))
+        self._segment_frames = 0
+
+
+def close_journal_entry(writer):
+    """Take a finished or discarded take off the journal"""
+    if writer.journal_entry is not None and os.path.exists(writer.journal_entry):
+        os.remove(writer.journal_entry)
+
+
+def join_segments(directory, output_path=None, reencode=True):
+    """
+    Join the closed segments of a .part directory into one clip and delete the
+    directory. Returns the number of frames in the clip, 0 if there was nothing to keep.
+    Without ffmpeg the segments are re-encoded with OpenCV if `reencode` is set;
+    otherwise IOError is raised and the .part directory is left for recovery.
+    """
+    manifest = load_manifest(directory)
+    if output_path is None:
+        output_path = directory[:-len(PART_SUFFIX)]
+    segments = [os.path.join(directory, s['file']) for s in manifest['segments']
+                if os.path.exists(os.path.join(directory, s['file']))]
+    frames = sum(s['frames'] for s in manifest['segments']
+                 if os.path.exists(os.path.join(directory, s['file'])))
+    if segments:
+        stem, ext = os.path.splitext(output_path)
+        joining_path = f"{stem}.joining{ext}"
+        if not _join_with_ffmpeg(segments, directory, joining_path):
+            if not reencode:
+                raise IOError(f"Could not join the segments of {output_path} without re-encoding")
+            frames = _join_with_opencv(segments, manifest, joining_path)
+        os.replace(joining_path, output_path)
+    shutil.rmtree(directory, ignore_errors=True)
+    return frames
+
+
+def _join_with_ffmpeg(segments, directory, output_path):
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return False
+    list_path = os.path.join(directory, "segments.txt")
+    with open(list_path, 'w') as f:
+        for segment in segments:
+            f.write(f"file '{os.path.abspath(segment)}'\n")
+    result = subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                             "-i", list_path, "-c", "copy", output_path],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0 and os.path.exists(output_path)
+
+
+def _join_with_opencv(segments, manifest, output_path):
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*manifest['codec']),
+                             manifest['fps'], tuple(manifest['frame_size']))
+    frames = 0
+    try:
+        for segment in segments:
+            cap = cv2.VideoCapture(segment)
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                writer.write(frame)
+                frames += 1
+            cap.release()
+    finally:
+        writer.release()
+    return frames
+
+
+def _is_within(path, directory):
+    path, directory = os.path.abspath(path), os.path.abspath(directory)
+    return os.path.commonpath([path, directory]) == directory
+
+
+def find_interrupted_takes(journal_dir, within=None):
+    """
+    (journal entry, .part directory) of every take still listed as open in the journal.
+    With `within`, entries for takes outside that directory are dropped from the journal.
+    """
+    if not os.path.isdir(journal_dir):
+        return []
+    root = os.path.dirname(journal_dir)
+    takes = []
+    for entry in os.scandir(journal_dir):
+        with open(entry.path) as f:
+            directory = os.path.join(root, f.read().strip())  # Absolute paths of older entries stay as they are
+        if within is not None and not _is_within(directory, within):
+            os.remove(entry.path)  # Not a take of this dataset, never catalog it
+        elif os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+            takes.append((entry.path, directory))
+        else:
+            os.remove(entry.path)  # Finished or deleted before the journal was updated
+    return sorted(takes, key=lambda take: take[1])
+
+
+def recover_takes(journal_dir, keep=True, within=None):
+    """
+    Join (keep=True) or delete (keep=False) every interrupted take in the journal,
+    only those inside `within` when given. Returns [(clip_path, frames)] for the clips that were recovered.
+    """
+    recovered = []
+    for entry, directory in find_interrupted_takes(journal_dir, within):
+        if keep:
+            try:
+                frames = join_segments(directory)
+            except (OSError, ValueError):
+                frames = 0
+                shutil.rmtree(directory, ignore_errors=True)  # Manifest unreadable, nothing to save
+            if frames:
+                recovered.append((directory[:-len(PART_SUFFIX)], frames))
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+        os.remove(entry)
+    return recovered
@@ -0,0 +1,193 @@
+# Watches signs_directory/static and signs_directory/dynamic for reference media
+# being added or removed while the collector is running. Uses watchdog's native
+# file system events when it is installed and falls back to polling otherwise.
+# Polling only re-lists a folder after its modification time changes. New files
+# are held back until their size and modification time stop changing.
+
+import os
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Optional dependency
+    Observer = None
+    FileSystemEventHandler = object
+
+# File types accepted as reference media for each sign type
+SIGN_EXTENSIONS = {
+    'static': ('.jpg', '.png', '.mp4'),
+    'dynamic': ('.mp4', '.avi'),
+}
+
+
+def is_sign_file(sign_type, filename):
+    return os.path.splitext(filename)[1].lower() in SIGN_EXTENSIONS[sign_type]
+
+
+class SignChange:
+    """Signs added to and removed from one sign type folder"""
+
+    def __init__(self, sign_type, added=(), removed=(), received_at=None):
+        self.sign_type = sign_type
+        self.added = list(added)
+        self.removed = list(removed)
+        self.detected_at = time.monotonic()
+        # When the watcher first heard of the change, before waiting for copies to finish
+        self.received_at = received_at if received_at is not None else self.detected_at
+
+    def latency(self):
+        """Seconds since the watcher first received the event behind this change"""
+        return time.monotonic() - self.received_at
+
+
+class SignsWatcher:
+    def __init__(self, signs_dir, callback, known_signs, poll_interval=1.0, use_native=True, settle_time=0.5):
+        """
+        `callback(change)` is called from the watcher thread with a SignChange.
+        `known_signs` is the {"static": [...], "dynamic": [...]} listing the caller already has.
+        New files are only reported once their size and modification time have not changed
+        for `settle_time` seconds, so a clip that is still being copied is not picked up half written.
+        """
+        self.signs_dir = signs_dir
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.known = {sign_type: set(known_signs.get(sign_type, [])) for sign_type in SIGN_EXTENSIONS}
+        self.native = use_native and Observer is not None
+        self._dir_mtimes = {sign_type: self._folder_mtime(sign_type) for sign_type in SIGN_EXTENSIONS}
+        # (sign_type, name) -> [received_at, (size, mtime), unchanged_since] for files still settling
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._observer = None
+        self._thread = None
+
+    def start(self):
+        if self.native:
+            self._observer = Observer()
+            for sign_type in SIGN_EXTENSIONS:
+                folder = os.path.join(self.signs_dir, sign_type)
+                if os.path.isdir(folder):
+                    self._observer.schedule(_EventHandler(self, sign_type), folder, recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+        # Settles new files in both modes, and polls the folders when there are no native events
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def _folder_mtime(self, sign_type):
+        try:
+            return os.stat(os.path.join(self.signs_dir, sign_type)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _run(self):
+        tick = min(self.poll_interval, max(self.settle_time / 4, 0.05))
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stop.wait(tick):
+            if not self.native and time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + self.poll_interval
+                for sign_type in SIGN_EXTENSIONS:
+                    mtime = self._folder_mtime(sign_type)
+                    if mtime == self._dir_mtimes[sign_type]:
+                        continue  # Nothing added, removed or renamed in this folder
+                    self._dir_mtimes[sign_type] = mtime
+                    self._rescan(sign_type)
+            self._settle()
+
+    def _rescan(self, sign_type):
+        folder = os.path.join(self.signs_dir, sign_type)
+        try:
+            current = {f for f in os.listdir(folder) if is_sign_file(sign_type, f)}
+        except OSError:
+            current = set()
+        now = time.monotonic()
+        with self._lock:
+            removed = sorted(self.known[sign_type] - current)
+            self.known[sign_type] &= current
+            for name in current - self.known[sign_type]:
+                self._pending.setdefault((sign_type, name), [now, None, now])
+            for key in [k for k in self._pending if k[0] == sign_type and k[1] not in current]:
+                del self._pending[key]
+        if removed:
+            self.callback(SignChange(sign_type, removed=removed, received_at=now))
+
+    def _settle(self):
+        """Report pending files whose size and modification time stopped changing"""
+        if not self._pending:
+            return
+        now = time.monotonic()
+        settled = {}
+        with self._lock:
+            for key, entry in list(self._pending.items()):
+                sign_type, name = key
+                try:
+                    st = os.stat(os.path.join(self.signs_dir, sign_type, name))
+                except OSError:
+                    del self._pending[key]  # Gone again before it finished arriving
+                    continue
+                signature = (st.st_size, st.st_mtime_ns)
+                if signature != entry[1]:
+                    entry[1], entry[2] = signature, now
+                elif st.st_size and now - entry[2] >= self.settle_time:
+                    del self._pending[key]
+                    if name not in self.known[sign_type]:
+                        self.known[sign_type].add(name)
+                        settled.setdefault(sign_type, []).append((entry[0], name))
+        for sign_type, items in settled.items():
+            items.sort(key=lambda item: item[1])
+            self.callback(SignChange(sign_type, [name for _, name in items],
+                                     received_at=min(received for received, _ in items)))
+
+    def _file_event(self, sign_type, added=None, removed=None):
+        now = time.monotonic()
+        added = added if added and is_sign_file(sign_type, added) else None
+        removed = removed if removed and is_sign_file(sign_type, removed) else None
+        with self._lock:
+            if removed:
+                self._pending.pop((sign_type, removed), None)
+                if removed in self.known[sign_type]:
+                    self.known[sign_type].discard(removed)
+                else:
+                    removed = None
+            if added and added not in self.known[sign_type]:
+                # Modified events for a settling file keep the time of the first event
+                self._pending.setdefault((sign_type, added), [now, None, now])
+        if removed:
+            self.callback(SignChange(sign_type, removed=[removed], received_at=now))
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher, sign_type):
+        self.watcher = watcher
+        self.sign_type = sign_type
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher._file_event(self.sign_type, added=os.path.basename(event.src_path))
+
+    def on_modified(self, event):
+        # Copies show up as one created event followed by writes, each write restarts settling
+        if not event.is_directory:
+            self.watcher._file_event(self.sign_type, added=os.path.basename(event.src_path))
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.watcher._file_event(self.sign_type, removed=os.path.basename(event.src_path))
+
+    def on_moved(self, event):
+        if event.is_directory:
+            return
+        folder = os.path.join(self.watcher.signs_dir, self.sign_type)
+        moved_into_folder = os.path.normpath(os.path.dirname(event.dest_path)) == os.path.normpath(folder)
+        added = os.path.basename(event.dest_path) if moved_into_folder else None
+        self.watcher._file_event(self.sign_type, added=added, removed=os.path.basename(event.src_path))
@@ -0,0 +1,61 @@
+import numpy as np
+
+from augment import MIRROR_ORDER, affine_matrices, flip_horizontal, warp_affine
+from landmarks import empty_landmarks
+
+WIDTH, HEIGHT = 64, 48
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+
+
+def frame_with_dot(col, row, samples=1):
+    """Black frames with a bright 3x3 dot, and landmarks with the left wrist on its centre"""
+    frames = np.zeros((samples, HEIGHT, WIDTH, 3), dtype=np.uint8)
+    frames[:, row - 1:row + 2, col - 1:col + 2] = 255
+    landmarks, mask = empty_landmarks(samples)
+    landmarks[:, LEFT_WRIST] = ((col + 0.5) / WIDTH, (row + 0.5) / HEIGHT, 0.1, 1.0)
+    mask[:, LEFT_WRIST] = True
+    return frames, landmarks, mask
+
+
+def dot_position(frame):
+    """(x, y) of the brightness-weighted centre of the dot, in pixels"""
+    weights = frame[..., 0].astype(np.float64)
+    rows, cols = np.indices(weights.shape)
+    return (cols * weights).sum() / weights.sum(), (rows * weights).sum() / weights.sum()
+
+
+def landmark_position(landmarks, index):
+    return landmarks[index, 0] * WIDTH - 0.5, landmarks[index, 1] * HEIGHT - 0.5
+
+
+def test_flip_moves_landmarks_with_the_pixels():
+    frames, landmarks, mask = frame_with_dot(10, 20)
+    flip_horizontal(frames, landmarks, mask)
+    # The signer's left wrist becomes the mirrored signer's right wrist
+    assert mask[0, RIGHT_WRIST] and not mask[0, LEFT_WRIST]
+    assert np.allclose(dot_position(frames[0]), landmark_position(landmarks[0], RIGHT_WRIST), atol=0.5)
+
+
+def test_flip_without_mask_keeps_missing_landmarks_at_zero():
+    frames, landmarks, mask = frame_with_dot(10, 20)
+    flip_horizontal(frames, landmarks)
+    assert not landmarks[0, ~mask[0][MIRROR_ORDER]].any()
+    assert np.allclose(dot_position(frames[0]), landmark_position(landmarks[0], RIGHT_WRIST), atol=0.5)
+
+
+def test_affine_moves_landmarks_with_the_pixels():
+    rng = np.random.default_rng(0)
+    frames, landmarks, mask = frame_with_dot(30, 22, samples=4)
+    matrices = affine_matrices(4, WIDTH, HEIGHT, rng, max_rotation=15, max_scale=0.1, max_shift=0.1)
+    warp_affine(frames, matrices, landmarks, mask)
+    for frame, sample in zip(frames, landmarks):
+        assert np.allclose(dot_position(frame), landmark_position(sample, LEFT_WRIST), atol=1.0)
+
+
+def test_affine_without_mask_keeps_missing_landmarks_at_zero():
+    rng = np.random.default_rng(1)
+    frames, landmarks, mask = frame_with_dot(30, 22, samples=2)
+    matrices = affine_matrices(2, WIDTH, HEIGHT, rng, max_shift=0.1)
+    warp_affine(frames, matrices, landmarks)
+    assert not landmarks[~mask].any()
+    assert landmarks[:, LEFT_WRIST, :2].any()
@@ -0,0 +1,69 @@
+import os
+
+from dataset_packer import ShardPacker, ShardReader
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def make_tree(root):
+    files = {
+        "Images/alef/user1/alef_1.jpg": b"jpeg-1" * 100,
+        "Images/alef/user1/alef_1.npz": b"landmarks-1",
+        "Images/alef/user1/alef_2.jpg": b"jpeg-2" * 50,
+        "Videos/baa/user2/baa_1.mp4": os.urandom(3000),
+        "Videos/baa/user2/baa_1.capture.json": b'{"fps": 30}',
+    }
+    for relative, data in files.items():
+        write(os.path.join(root, relative), data)
+    return files
+
+
+def pack(data_dir, shard_dir, shard_size=1024 * 1024):
+    packer = ShardPacker(str(data_dir), str(shard_dir), shard_size)
+    stats = packer.pack()
+    packer.close()
+    return stats
+
+
+def read(shard_dir, **filters):
+    return {sample['key']: sample for sample in ShardReader(str(shard_dir), **filters)}
+
+
+def test_round_trip_returns_file_contents(tmp_path):
+    files = make_tree(tmp_path / "data")
+    # A tiny shard size puts every sample in its own shard
+    stats = pack(tmp_path / "data", tmp_path / "shards", shard_size=1)
+    assert stats['samples'] == 3 and stats['shards'] == 3
+
+    samples = read(tmp_path / "shards")
+    assert set(samples) == {"Images/alef/user1/alef_1", "Images/alef/user1/alef_2", "Videos/baa/user2/baa_1"}
+    assert samples["Images/alef/user1/alef_1"]['jpg'] == files["Images/alef/user1/alef_1.jpg"]
+    assert samples["Images/alef/user1/alef_1"]['npz'] == files["Images/alef/user1/alef_1.npz"]
+    assert samples["Videos/baa/user2/baa_1"]['mp4'] == files["Videos/baa/user2/baa_1.mp4"]
+    assert samples["Videos/baa/user2/baa_1"]['capture.json'] == files["Videos/baa/user2/baa_1.capture.json"]
+    assert samples["Videos/baa/user2/baa_1"]['sign'] == "baa"
+    assert list(read(tmp_path / "shards", kind="image", user="user1")) == [
+        "Images/alef/user1/alef_1", "Images/alef/user1/alef_2"]
+
+
+def test_repack_only_adds_changes_and_drops_stale_rows(tmp_path):
+    data = tmp_path / "data"
+    make_tree(data)
+    pack(data, tmp_path / "shards")
+    assert pack(data, tmp_path / "shards")['samples'] == 0
+
+    os.remove(data / "Images/alef/user1/alef_1.npz")
+    os.remove(data / "Images/alef/user1/alef_2.jpg")
+    write(str(data / "Videos/baa/user2/baa_1.capture.json"), b'{"fps": 60}')
+    stats = pack(data, tmp_path / "shards")
+    assert stats['samples'] == 2 and stats['removed'] == 1
+
+    samples = list(ShardReader(str(tmp_path / "shards")))
+    assert sorted(sample['key'] for sample in samples) == ["Images/alef/user1/alef_1", "Videos/baa/user2/baa_1"]
+    by_key = {sample['key']: sample for sample in samples}
+    assert 'npz' not in by_key["Images/alef/user1/alef_1"]
+    assert by_key["Videos/baa/user2/baa_1"]['capture.json'] == b'{"fps": 60}'
@@ -0,0 +1,93 @@
+import os
+
+import cv2
+import numpy as np
+
+from video_writers import ConstantRateVideoWriter
+
+FPS = 30
+SIZE = (32, 24)
+
+
+def record(path, timestamps, duration=None, end_time=None, start_time=0.0):
+    """Write one small frame per capture timestamp through the resampling writer"""
+    writer = ConstantRateVideoWriter(str(path), 'MJPG', FPS, SIZE, start_time=start_time, duration=duration)
+    frame = np.zeros((SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    for timestamp in timestamps:
+        writer.write(frame, timestamp)
+    stats = writer.finalize(end_time)
+    return writer, stats
+
+
+def nearest(captures, slot_time):
+    return min(captures, key=lambda t: abs(t - slot_time))
+
+
+def test_steady_capture_maps_one_to_one(tmp_path):
+    captures = [i / FPS for i in range(FPS)]
+    writer, stats = record(tmp_path / "clip.avi", captures, duration=1.0)
+    assert stats['frames_written'] == FPS
+    assert stats['frames_duplicated'] == 0 and stats['frames_skipped'] == 0
+    assert writer.frame_timestamps == captures
+    cap = cv2.VideoCapture(str(tmp_path / "clip.avi"))
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == FPS
+    cap.release()
+
+
+def test_slots_take_the_nearest_capture_under_jitter(tmp_path):
+    rng = np.random.default_rng(0)
+    captures = sorted(i / FPS + rng.uniform(-0.4, 0.4) / FPS for i in range(1, FPS))
+    captures = [0.0] + captures
+    writer, stats = record(tmp_path / "clip.avi", captures, duration=1.0)
+    assert stats['frames_written'] == FPS
+    for slot, timestamp in enumerate(writer.frame_timestamps):
+        assert timestamp == nearest(captures, slot / FPS)
+
+
+def test_gap_is_filled_with_duplicates(tmp_path):
+    # Five frames missing in the middle of the second
+    captures = [i / FPS for i in range(FPS) if not 10 <= i < 15]
+    writer, stats = record(tmp_path / "clip.avi", captures, duration=1.0)
+    assert stats['frames_written'] == FPS
+    assert stats['frames_duplicated'] == 5
+    assert stats['frames_skipped'] == 0
+
+
+def test_burst_is_thinned_by_skipping(tmp_path):
+    # Twice the output rate: every other capture has no slot of its own
+    captures = [i / (2 * FPS) for i in range(2 * FPS)]
+    writer, stats = record(tmp_path / "clip.avi", captures, duration=1.0)
+    assert stats['frames_written'] == FPS
+    assert stats['frames_duplicated'] == 0
+    assert stats['frames_skipped'] == FPS
+
+
+def test_short_take_is_padded_to_duration(tmp_path):
+    captures = [i / FPS for i in range(FPS // 2)]
+    writer, stats = record(tmp_path / "clip.avi", captures, duration=1.0)
+    assert stats['frames_written'] == FPS
+    assert stats['frames_duplicated'] == FPS - FPS // 2
+    assert writer.frame_timestamps[-1] == captures[-1]
+
+
+def test_padding_up_to_end_time_without_duration(tmp_path):
+    captures = [i / FPS for i in range(10)]
+    writer, stats = record(tmp_path / "clip.avi", captures, end_time=1.0)
+    assert stats['frames_written'] == FPS
+    assert stats['frames_duplicated'] == FPS - 10
+
+
+def test_captures_past_duration_are_not_written(tmp_path):
+    captures = [i / FPS for i in range(2 * FPS)]
+    writer, stats = record(tmp_path / "clip.avi", captures, duration=1.0)
+    assert stats['frames_written'] == FPS
+
+
+def test_abort_deletes_the_file(tmp_path):
+    path = tmp_path / "clip.avi"
+    writer = ConstantRateVideoWriter(str(path), 'MJPG', FPS, SIZE, start_time=0.0, duration=1.0)
+    frame = np.zeros((SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    for i in range(5):
+        writer.write(frame, i / FPS)
+    writer.abort()
+    assert not os.path.exists(path)
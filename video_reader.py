@@ -0,0 +1,189 @@
+# Batched frame sampling from recorded dynamic-sign clips
+# Training samples a fixed number of frames per clip. Instead of decoding every
+# frame of every clip one after another, clips are read concurrently on a thread
+# pool (OpenCV releases the GIL while decoding). Each reader only decodes up to the
+# sampled frames: short gaps are skipped with grab(), which decodes without
+# converting, and long gaps seek directly. Frames are resized straight into one
+# preallocated (clips, T, H, W, 3) uint8 batch.
+
+import argparse
+import cv2
+import numpy as np
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import find_media
+
+DEFAULT_BENCHMARK_DIR = os.path.join("signs_directory", "dynamic")
+
+
+def sample_indices(frame_count, num_frames):
+    """`num_frames` frame indices spread uniformly over a clip, repeating frames of short clips"""
+    if frame_count <= 0:
+        return np.zeros(num_frames, dtype=np.int64)
+    # Centre of each of num_frames equal segments
+    return np.minimum(((np.arange(num_frames) + 0.5) * frame_count / num_frames).astype(np.int64),
+                      frame_count - 1)
+
+
+def read_clip_into(path, out, indices=None, seek_threshold=32, rgb=False):
+    """
+    Decode the frames of `path` at `indices` into `out`, a (T, H, W, 3) uint8 array.
+    Returns the number of frames actually decoded; slots past the end of a clip whose
+    frame count was overestimated repeat the last decoded frame.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open {path}")
+    height, width = out.shape[1:3]
+    decoded = 0
+    try:
+        if indices is None:
+            indices = sample_indices(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), len(out))
+        position = 0  # Index of the frame the next read() returns
+        frame = None
+        for slot, index in enumerate(indices):
+            if index != position - 1 or frame is None:
+                if index - position > seek_threshold or index < position:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+                    position = int(index)
+                while position < index and cap.grab():
+                    position += 1
+                ret, next_frame = cap.read()
+                if ret:
+                    frame = next_frame
+                    position += 1
+                    decoded += 1
+            if frame is None:
+                out[slot:] = 0
+                break
+            # The same frame sampled twice (short clips) is simply written again
+            if (frame.shape[1], frame.shape[0]) == (width, height):
+                np.copyto(out[slot], frame)
+            else:
+                cv2.resize(frame, (width, height), dst=out[slot], interpolation=cv2.INTER_AREA)
+            if rgb:
+                cv2.cvtColor(out[slot], cv2.COLOR_BGR2RGB, dst=out[slot])
+    finally:
+        cap.release()
+    return decoded
+
+
+class VideoBatchReader:
+    def __init__(self, num_frames=16, size=(224, 224), workers=4, seek_threshold=32, rgb=False):
+        self.num_frames = num_frames
+        self.size = tuple(size)  # (width, height) of the output frames
+        self.seek_threshold = seek_threshold
+        self.rgb = rgb
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="video-reader")
+
+    def allocate(self, clips):
+        width, height = self.size
+        return np.empty((clips, self.num_frames, height, width, 3), dtype=np.uint8)
+
+    def read_batch(self, paths, out=None):
+        """Return a (len(paths), T, H, W, 3) uint8 batch, written into `out` when given"""
+        if out is None:
+            out = self.allocate(len(paths))
+        futures = [self._executor.submit(read_clip_into, path, out[i], None, self.seek_threshold, self.rgb)
+                   for i, path in enumerate(paths)]
+        for future in futures:
+            future.result()
+        return out
+
+    def iter_batches(self, paths, batch_size):
+        """
+        Yield (paths, batch) for consecutive batches. Two batch buffers are reused:
+        the next batch is decoded while the caller works on the current one, so a
+        yielded batch is only valid until the following one is requested.
+        """
+        buffers = [self.allocate(batch_size), self.allocate(batch_size)]
+        chunks = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+        pending = None
+        for n, chunk in enumerate(chunks):
+            if pending is None:
+                pending = self._submit(chunk, buffers[n % 2])
+            current, current_chunk = pending, chunk
+            pending = self._submit(chunks[n + 1], buffers[(n + 1) % 2]) if n + 1 < len(chunks) else None
+            for future in current:
+                future.result()
+            yield current_chunk, buffers[n % 2][:len(current_chunk)]
+
+    def _submit(self, chunk, buffer):
+        return [self._executor.submit(read_clip_into, path, buffer[i], None, self.seek_threshold, self.rgb)
+                for i, path in enumerate(chunk)]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def naive_read(paths, num_frames, size):
+    """
+    Baseline: decode every frame of every clip in turn, then pick the samples. Uses
+    the same indices as read_clip_into, from the container's frame count, so both
+    return the same frames.
+    """
+    batch = []
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        indices = sample_indices(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), num_frames)
+        frames = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        # Indices past an overestimated frame count repeat the last frame, like read_clip_into
+        batch.append(np.stack([cv2.resize(frames[min(i, len(frames) - 1)], size, interpolation=cv2.INTER_AREA)
+                               for i in indices]) if frames
+                     else np.zeros((num_frames, size[1], size[0], 3), dtype=np.uint8))
+    return np.stack(batch)
+
+
+def find_clips(location):
+    """Video clips of an ArSL_Dataset tree, or of a plain folder of videos"""
+    if os.path.isdir(os.path.join(location, "Videos")):
+        return [path for kind, path in find_media(location) if kind == 'video']
+    return sorted(os.path.join(location, f) for f in os.listdir(location)
+                  if f.lower().endswith(('.mp4', '.avi')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched frame sampling against decoding every frame")
+    parser.add_argument("location", nargs="?", default=DEFAULT_BENCHMARK_DIR,
+                        help=f"ArSL_Dataset root or folder of videos (default: {DEFAULT_BENCHMARK_DIR})")
+    parser.add_argument("--frames", type=int, default=16, help="Frames sampled per clip")
+    parser.add_argument("--size", default="224x224", help="Output frame size")
+    parser.add_argument("--batch", type=int, default=8, help="Clips per batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Decoding threads (default: one per CPU)")
+    parser.add_argument("--clips", type=int, default=64, help="Number of clips to read")
+    args = parser.parse_args()
+
+    paths = find_clips(args.location)[:args.clips]
+    if not paths:
+        raise SystemExit(f"No videos found in {args.location}")
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+
+    start = time.perf_counter()
+    for i in range(0, len(paths), args.batch):
+        naive_read(paths[i:i + args.batch], args.frames, size)
+    naive_seconds = time.perf_counter() - start
+
+    reader = VideoBatchReader(args.frames, size, args.workers)
+    start = time.perf_counter()
+    for _ in reader.iter_batches(paths, args.batch):
+        pass
+    batched_seconds = time.perf_counter() - start
+    reader.close()
+
+    print(f"{len(paths)} clips, {args.frames} frames each at {size[0]}x{size[1]}, "
+          f"{args.workers} workers on {os.cpu_count()} CPUs")
+    print(f"naive loop: {len(paths) / naive_seconds:7.1f} clips/s")
+    print(f"batched:    {len(paths) / batched_seconds:7.1f} clips/s  ({naive_seconds / batched_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
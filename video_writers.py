@@ -0,0 +1,252 @@
+# Video writers used by the recording paths
+# Frames are encoded on a dedicated thread as they arrive, so finishing a clip
+# only has to flush what is still queued instead of encoding the whole take.
+
+import cv2
+import os
+import queue
+import shutil
+import threading
+import time
+
+from segment_writer import SegmentFileWriter, close_journal_entry, join_segments
+
+# Codecs tried in order of preference
+DEFAULT_CODECS = [
+    ('XVID', 'avi'),
+    ('mp4v', 'mp4'),
+    ('MJPG', 'avi'),
+]
+
+_STOP = object()
+
+
+def find_working_codec(directory, frame_size, codecs=DEFAULT_CODECS):
+    """Return (codec, extension) of the first codec OpenCV can write here, or (None, None)"""
+    for codec, ext in codecs:
+        fourcc = cv2.VideoWriter_fourcc(*codec)
+        test_path = os.path.join(directory, f"test.{ext}")
+        test_writer = cv2.VideoWriter(test_path, fourcc, 30, frame_size)
+        opened = test_writer.isOpened()
+        test_writer.release()
+        if os.path.exists(test_path):
+            os.remove(test_path)  # Clean up test file
+        if opened:
+            return codec, ext
+    return None, None
+
+
+class StreamingVideoWriter:
+    """
+    cv2.VideoWriter running on its own thread behind a bounded queue.
+    write() never encodes on the caller's thread; when the encoder falls behind
+    the caller waits up to `put_timeout` and the frame is dropped after that.
+    """
+
+    def __init__(self, path, codec, fps, frame_size, max_queue=32, put_timeout=0.5, segment_seconds=None,
+                 journal_dir=None):
+        self.path = path
+        self.fps = fps
+        self.frame_size = tuple(frame_size)
+        self.put_timeout = put_timeout
+        # With segments the take is written to "<path>.part/" and joined on finalize(),
+        # listed in `journal_dir` until then
+        self.segmented = bool(segment_seconds)
+        if self.segmented:
+            self.writer = SegmentFileWriter(path, codec, fps, self.frame_size, segment_seconds, journal_dir)
+        else:
+            self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, self.frame_size)
+            if not self.writer.isOpened():
+                self.writer.release()
+                raise IOError(f"Could not open video writer for {path}")
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.stats = {
+            'frames_queued': 0,
+            'frames_written': 0,
+            'frames_dropped': 0,
+            'max_queue_depth': 0,
+            'blocked_seconds': 0.0,  # Time producers spent waiting on a full queue
+            'encode_seconds': 0.0,
+            'finalize_seconds': 0.0,
+            'error': None,  # Why encoding stopped early, if it did
+        }
+        self.frame_timestamps = []  # Capture time of the frame behind every written frame
+        self._aborted = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, frame, timestamp=None):
+        """
+        Queue a frame for encoding, returns False if it had to be dropped.
+        The frame is encoded later, so it must not be modified until then
+        (ring buffer views are fine as long as the queue is shorter than the buffer).
+        """
+        if self._closed:
+            return False
+        try:
+            self.queue.put_nowait((frame, timestamp))
+        except queue.Full:
+            wait_start = time.monotonic()
+            try:
+                self.queue.put((frame, timestamp), timeout=self.put_timeout)
+            except queue.Full:
+                self.stats['frames_dropped'] += 1
+                return False
+            finally:
+                self.stats['blocked_seconds'] += time.monotonic() - wait_start
+        self.stats['frames_queued'] += 1
+        self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self.queue.qsize())
+        return True
+
+    def finalize(self, end_time=None):
+        """Flush queued frames, close the file and return the writer statistics"""
+        start = time.monotonic()
+        self._close()
+        if self.segmented:
+            self.stats['segments'] = len(self.writer.manifest['segments'])
+            try:
+                # Never re-encode here: the take is the finished clip within moments or
+                # stays in the journal and is recovered on the next start
+                join_segments(self.writer.directory, self.path, reencode=False)
+                close_journal_entry(self.writer)
+            except IOError as e:
+                self.stats['error'] = str(e)
+        self.stats['finalize_seconds'] = time.monotonic() - start
+        return self.stats
+
+    def abort(self):
+        """Stop encoding, throw away queued frames and delete the partial file"""
+        self._aborted = True
+        self._close()
+        if self.segmented:
+            shutil.rmtree(self.writer.directory, ignore_errors=True)
+            close_journal_entry(self.writer)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        return self.stats
+
+    def _close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            if self._aborted:
+                continue
+            frame, timestamp = item
+            start = time.monotonic()
+            try:
+                self._encode(frame, timestamp)
+            except (IOError, cv2.error) as e:
+                # E.g. the next segment file could not be opened; keep what was written and
+                # keep draining the queue so producers never block on a dead encoder
+                self.stats['error'] = str(e)
+                self._aborted = True
+            self.stats['encode_seconds'] += time.monotonic() - start
+        self._release()
+
+    def _encode(self, frame, timestamp):
+        self.writer.write(frame)
+        self.stats['frames_written'] += 1
+        self.frame_timestamps.append(timestamp)
+
+    def _release(self):
+        self.writer.release()
+
+
+class ConstantRateVideoWriter(StreamingVideoWriter):
+    """
+    Streaming writer that resamples frames onto an exact `fps` grid using their
+    capture timestamps. Every output slot gets the captured frame closest in time,
+    so frames are duplicated over capture gaps and dropped when they come in too fast.
+    With a `duration` the clip has exactly round(duration * fps) frames.
+    """
+
+    def __init__(self, path, codec, fps, frame_size, start_time=None, duration=None, **kwargs):
+        self.start_time = start_time  # None anchors the grid on the first frame
+        self.duration = duration
+        self.end_time = None
+        self._prev = None
+        self._prev_used = False
+        self._next_slot = 0
+        super().__init__(path, codec, fps, frame_size, **kwargs)
+        self.stats.update({
+            'frames_duplicated': 0,  # Output frames repeating an already written capture
+            'frames_skipped': 0,     # Captured frames that did not land on any output slot
+        })
+
+    def write(self, frame, timestamp=None):
+        if timestamp is None:
+            raise ValueError("ConstantRateVideoWriter needs a capture timestamp for every frame")
+        return super().write(frame, timestamp)
+
+    def finalize(self, end_time=None):
+        """Close the clip, padding it up to `end_time` (or `duration`) with the last frame"""
+        self.end_time = end_time
+        return super().finalize(end_time)
+
+    def _slot_time(self, slot):
+        return self.start_time + slot / self.fps
+
+    def _total_slots(self):
+        if self.duration is not None:
+            return int(round(self.duration * self.fps))
+        if self.end_time is not None:
+            return int(round((self.end_time - self.start_time) * self.fps))
+        return None
+
+    def _encode(self, frame, timestamp):
+        if self.start_time is None:
+            self.start_time = timestamp
+        if self._prev is None:
+            self._prev = (frame, timestamp)
+            self._prev_used = False
+            return
+
+        prev_frame, prev_time = self._prev
+        current_used = False
+        total = self._total_slots()
+        while total is None or self._next_slot < total:
+            slot_time = self._slot_time(self._next_slot)
+            if slot_time > timestamp:
+                break
+            # Pick whichever of the two neighbouring captures is closer to the slot
+            if slot_time - prev_time <= timestamp - slot_time:
+                self._emit(prev_frame, prev_time, self._prev_used)
+                self._prev_used = True
+            else:
+                self._emit(frame, timestamp, current_used)
+                current_used = True
+        if not self._prev_used:
+            self.stats['frames_skipped'] += 1
+        self._prev = (frame, timestamp)
+        self._prev_used = current_used
+
+    def _emit(self, frame, timestamp, already_written):
+        self.writer.write(frame)
+        self.stats['frames_written'] += 1
+        self.frame_timestamps.append(timestamp)
+        if already_written:
+            self.stats['frames_duplicated'] += 1
+        self._next_slot += 1
+
+    def _release(self):
+        if not self._aborted and self._prev is not None:
+            total = self._total_slots()
+            if total is None:
+                total = self._next_slot + (0 if self._prev_used else 1)
+            while self._next_slot < total:
+                self._emit(self._prev[0], self._prev[1], self._prev_used)
+                self._prev_used = True
+            if not self._prev_used:
+                self.stats['frames_skipped'] += 1
+        self._prev = None
+        super()._release()